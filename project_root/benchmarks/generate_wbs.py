@@ -0,0 +1,75 @@
+"""
+ベンチマーク用の合成WBSブックを生成する。
+
+    python -m benchmarks.generate_wbs --tasks 1000 --shape random_dag --output bench_wbs.xlsx
+"""
+import argparse
+import random
+from typing import List
+import openpyxl
+
+HEADER = ['タスク番号', 'タスク名', '工数(予想)', '開始日(予想)', '終了日(予想)',
+          '開始日(実際)', '終了日(実際)', '目標終了時間', '先行タスク番号', '開始遅延時間']
+
+SHAPES = ('chain', 'fanout', 'random_dag', 'teams')
+
+
+def generate_predecessors(num_tasks: int, shape: str, rng: random.Random) -> List[List[int]]:
+    """
+    形状ごとの先行関係を生成する
+
+    chain: 1本の直列, fanout: 少数の根から広く分岐, random_dag: 直近のタスクからランダムに先行を選ぶ,
+    teams: 互いに独立した複数チームのランダムDAG
+    """
+    if shape == 'chain':
+        return [[i - 1] if i else [] for i in range(num_tasks)]
+    if shape == 'fanout':
+        roots = max(1, num_tasks // 100)
+        return [[] if i < roots else [rng.randrange(min(i, roots * 10))] for i in range(num_tasks)]
+    if shape == 'random_dag':
+        window = 50
+        return [
+            sorted(set(rng.randrange(max(0, i - window), i) for _ in range(rng.randint(0, 3)))) if i else []
+            for i in range(num_tasks)
+        ]
+    if shape == 'teams':
+        team_size = 200
+        predecessors = []
+        for i in range(num_tasks):
+            base = i - i % team_size
+            local = i - base
+            predecessors.append(
+                sorted(set(base + rng.randrange(local) for _ in range(rng.randint(0, 2)))) if local else []
+            )
+        return predecessors
+    raise ValueError(f"不明な形状です: {shape} ({', '.join(SHAPES)} のいずれか)")
+
+
+def generate_wbs(path: str, num_tasks: int, shape: str = 'random_dag', seed: int = 0, sheet_name: str = 'Sheet1'):
+    """工数(予想)に小数（0.25 刻み）を含む合成WBSブックを書き出す"""
+    rng = random.Random(seed)
+    predecessors = generate_predecessors(num_tasks, shape, rng)
+
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append([])
+    sheet.append(HEADER)
+    for i in range(num_tasks):
+        duration = rng.choice([0.25, 0.5, 1, 1.5, 2, 2.75, 3, 4, 6, 8])
+        sheet.append([i, f'タスク{i}', duration, None, None, None, None, None,
+                      ','.join(map(str, predecessors[i])) or None, None])
+    workbook.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tasks', type=int, default=1000)
+    parser.add_argument('--shape', choices=SHAPES, default='random_dag')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_wbs.xlsx')
+    args = parser.parse_args()
+    generate_wbs(args.output, args.tasks, args.shape, args.seed)
+
+
+if __name__ == '__main__':
+    main()
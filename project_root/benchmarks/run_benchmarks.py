@@ -0,0 +1,180 @@
+"""
+パイプラインの各段階（読込・リストスケジューリング・モデル構築・求解・日時変換・出力）の処理時間と、
+CP-SAT とリストスケジューリングそれぞれのメイクスパンを計測する。
+
+    python -m benchmarks.run_benchmarks --sizes 100 1000 10000 --shapes chain random_dag \
+        --output bench.json --baseline bench_baseline.json
+
+--baseline を指定すると、基準より遅くなった段階を報告し、終了コード 1 を返す。
+CLI の起動時間（main.py --help）が --startup-budget を超えた場合や、起動時に重い依存を読み込んだ場合も
+終了コード 1 を返す。
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+from ortools.sat.python import cp_model
+from benchmarks.generate_wbs import SHAPES, generate_wbs
+from src.models import SolverOptions
+from src.services.task_scheduler import TaskScheduler
+from src.utils.excel_handler import ExcelHandler
+from src.config.settings import *
+
+STAGES = ('load', 'list', 'build', 'solve', 'convert', 'export')
+
+# CLI の起動時に読み込んではいけない依存
+HEAVY_MODULES = ('pandas', 'ortools', 'openpyxl', 'jpholiday')
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_case(work_dir: str, num_tasks: int, shape: str, time_limit: float, seed: int = 0) -> Dict:
+    """1つの規模・形状について各段階の処理時間（秒）を計測する"""
+    wbs_path = os.path.join(work_dir, f'wbs_{shape}_{num_tasks}.xlsx')
+    generate_wbs(wbs_path, num_tasks, shape, seed)
+    timings = {}
+
+    scheduler = TaskScheduler(num_workers=DEFAULT_NUM_WORKERS, workday_hours=DEFAULT_WORKDAY_HOURS)
+    scheduler.excel_handler = ExcelHandler(cache_dir=None)  # 解析そのものを計測する
+
+    began = time.perf_counter()
+    scheduler.load_tasks_from_excel(wbs_path, DEFAULT_SHEET_NAME)
+    timings['load'] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    heuristic = scheduler.solve_offsets(SolverOptions(engine='list'))[0]
+    timings['list'] = time.perf_counter() - began
+
+    began = time.perf_counter()
+    schedule_model = scheduler.build_model()
+    timings['build'] = time.perf_counter() - began
+
+    solver = cp_model.CpSolver()
+    solver.parameters.max_time_in_seconds = time_limit
+    began = time.perf_counter()
+    status = solver.Solve(schedule_model.model)
+    timings['solve'] = time.perf_counter() - began
+
+    case = {'shape': shape, 'tasks': num_tasks, 'status': solver.StatusName(status), 'timings': timings,
+            'list_makespan': heuristic.objective}
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return case
+    case['makespan'] = solver.ObjectiveValue() / schedule_model.scale
+
+    solution = np.asarray(solver.ResponseProto().solution)
+    starts = solution[[v.Index() for v in schedule_model.start_times]] / schedule_model.scale
+    ends = solution[[v.Index() for v in schedule_model.end_times]] / schedule_model.scale
+    began = time.perf_counter()
+    scheduler.apply_schedule(starts, ends)
+    timings['convert'] = time.perf_counter() - began
+
+    output_path = os.path.join(work_dir, f'output_{shape}_{num_tasks}.xlsx')
+    shutil.copy(wbs_path, output_path)
+    began = time.perf_counter()
+    scheduler.export_results_to_excel(output_path, DEFAULT_SHEET_NAME, [])
+    timings['export'] = time.perf_counter() - began
+    return case
+
+
+def measure_startup(repeat: int = 5) -> Dict:
+    """main.py --help の起動時間（秒、repeat 回の最小値）と、CLI の読込で読み込まれた重い依存"""
+    command = [sys.executable, os.path.join(PROJECT_ROOT, 'main.py'), '--help']
+    seconds = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        subprocess.run(command, cwd=PROJECT_ROOT, check=True, capture_output=True)
+        seconds.append(time.perf_counter() - began)
+
+    probe = (
+        'import sys, main; main.build_parser(); '
+        f'print(" ".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    )
+    loaded = subprocess.run([sys.executable, '-c', probe], cwd=PROJECT_ROOT, check=True,
+                            capture_output=True, text=True).stdout.split()
+    return {'seconds': min(seconds), 'heavy_modules': loaded}
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float, noise_floor: float) -> List[str]:
+    """基準と比べて tolerance を超えて遅くなった段階の一覧"""
+    previous = {(case['shape'], case['tasks']): case['timings'] for case in baseline}
+    regressions = []
+    for case in results:
+        base = previous.get((case['shape'], case['tasks']))
+        if not base:
+            continue
+        for stage, seconds in case['timings'].items():
+            before = base.get(stage)
+            if before is None or seconds < noise_floor:
+                continue
+            if seconds > before * (1 + tolerance):
+                regressions.append(
+                    f"{case['shape']}/{case['tasks']} {stage}: {before:.3f}s → {seconds:.3f}s (+{(seconds / before - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--shapes', choices=SHAPES, nargs='+', default=list(SHAPES))
+    parser.add_argument('--time-limit', type=float, default=10.0, help='1ケースあたりの求解の制限時間（秒）')
+    parser.add_argument('--output', default='bench.json')
+    parser.add_argument('--baseline', help='比較する基準の結果ファイル')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='許容する悪化率（0.2 = 20%%）')
+    parser.add_argument('--noise-floor', type=float, default=0.05, help='これより短い段階は比較しない（秒）')
+    parser.add_argument('--startup-budget', type=float, default=0.5, help='CLI の起動時間の上限（秒）')
+    args = parser.parse_args()
+
+    startup = measure_startup()
+    print(f"{'startup':>10} {startup['seconds']:.3f}s heavy_modules={startup['heavy_modules']}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        for shape in args.shapes:
+            for num_tasks in args.sizes:
+                try:
+                    case = run_case(work_dir, num_tasks, shape, args.time_limit)
+                except Exception as e:  # 1ケースの失敗で全体を止めない
+                    case = {'shape': shape, 'tasks': num_tasks, 'status': 'ERROR', 'error': str(e), 'timings': {}}
+                timings = ' '.join(f'{stage}={case["timings"][stage]:.3f}s' for stage in STAGES if stage in case['timings'])
+                makespans = ' '.join(f'{key}={case[key]:.1f}' for key in ('makespan', 'list_makespan') if key in case)
+                print(f"{shape:>10} {num_tasks:>7} {case['status']:>9} {timings} {makespans}")
+                results.append(case)
+
+    report = {
+        'meta': {
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'time_limit': args.time_limit,
+        },
+        'startup': startup,
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    failures = []
+    if startup['seconds'] > args.startup_budget:
+        failures.append(f"STARTUP {startup['seconds']:.3f}s > {args.startup_budget:.3f}s")
+    if startup['heavy_modules']:
+        failures.append(f"STARTUP heavy modules imported: {', '.join(startup['heavy_modules'])}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f)['results'], args.tolerance, args.noise_floor)
+        failures.extend(f"REGRESSION {line}" for line in regressions)
+    for line in failures:
+        print(line)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
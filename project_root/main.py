@@ -1,22 +1,395 @@
-from src.services.task_scheduler import TaskScheduler
+"""
+スケジューリングのコマンドラインツール。
+
+    python main.py validate [--input WBS.xlsx] [--sheet Sheet1]
+    python main.py solve [--input WBS.xlsx] [--output output.xlsx] [--engine list] [--time-limit 60]
+    python main.py export [--input output.xlsx] [--output output.xlsx|plan.csv|plan.html] [--mode conditional]
+    python main.py batch PROJECTS_DIR_OR_MANIFEST.json [--output-dir out] [--processes 4]
+    python main.py risk [--input WBS.xlsx] [--output output.xlsx] [--samples 1000] [--distribution pert]
+    python main.py cache [--clear]
+    python main.py sweep --headcounts 3 4 6 [--input WBS.xlsx] [--gantt-dir out]
+    python main.py serve [--port 8765] [--socket /tmp/plan.sock] [--workers 2]
+
+ortools・pandas・openpyxl などの重い依存は、各サブコマンドの中で必要になった時点で読み込む。
+"""
+import argparse
+import os
+import shutil
+import signal
+import sys
 from src.config.settings import *
-from src.services.calendar_service import CalendarService
 
-def main():
-    scheduler = TaskScheduler(
-        num_workers=DEFAULT_NUM_WORKERS,
-        workday_hours=DEFAULT_WORKDAY_HOURS,
-    )
-    
+
+def validate(args) -> int:
+    """WBSを読み込み、先行関係（循環・存在しない先行タスク・重複）と工数を検査する"""
+    import numpy as np
+    from src.services.precedence_graph import PrecedenceGraph, PrecedenceGraphError
+    from src.utils.excel_handler import ExcelHandler
+
+    table = ExcelHandler().load_table(args.input, args.sheet)
+    errors = []
+    try:
+        PrecedenceGraph.from_table(table)
+    except PrecedenceGraphError as e:
+        errors.append(str(e))
+    invalid = table.ids[~(np.nan_to_num(table.durations, nan=-1) >= 0)]
+    if len(invalid):
+        errors.append(f"工数が未設定または負のタスクがあります: {invalid.tolist()}")
+
+    for error in errors:
+        print(error, file=sys.stderr)
+    print(f"tasks={len(table)} predecessors={len(table.predecessor_ids)} errors={len(errors)}")
+    return 1 if errors else 0
+
+
+def solve(args) -> int:
+    """スケジューリングを実行し、結果とガントチャートを出力ブックに書き出す"""
+    from src.models import SolverOptions
+    from src.services.decomposition_solver import DecompositionSolver
+    from src.services.result_cache import ResultCache
+    from src.services.task_scheduler import TaskScheduler
+
+    scheduler = TaskScheduler(num_workers=args.workers, workday_hours=DEFAULT_WORKDAY_HOURS)
+
     # Excelからタスクを読み込む
-    scheduler.load_tasks_from_excel(DEFAULT_EXCEL_FILENAME, DEFAULT_SHEET_NAME)
-    
-    # スケジューリングの実行
-    scheduling_results = scheduler.solve_scheduling()
+    scheduler.load_tasks_from_excel(args.input, args.sheet)
+
+    # 前回の出力があれば差分再スケジューリング
+    incremental = args.incremental and os.path.exists(args.output)
+    if incremental:
+        scheduler.load_previous_schedule(args.output, args.sheet)
+
+    # スケジューリングの実行（制限時間に達した場合は最良の実行可能解を使用）
+    options = SolverOptions(
+        num_search_workers=args.search_workers,
+        max_time_in_seconds=args.time_limit,
+        relative_gap_limit=args.gap,
+        engine=args.engine,
+        priority_rule=args.priority_rule,
+    )
+
+    # 大規模なWBSは弱連結成分ごとに分割して並列に解く
+    decomposition = None if incremental else DecompositionSolver(scheduler)
+
+    def run():
+        if incremental:
+            return scheduler.solve(options, incremental=True)
+        return decomposition.solve(options)
+
+    # 入力が同じ結果がキャッシュにあれば解かずに使う
+    cache = ResultCache(RESULT_CACHE_DIR if args.cache else None)
+    try:
+        solve_result, cached = cache.solve(scheduler, options, run, incremental,
+                                           decomposition.cache_settings() if decomposition else None)
+    except ValueError as e:
+        # 循環・存在しない先行タスク（PrecedenceGraphError）や工数の未設定は、validate と同じく該当タスク番号を表示して失敗とする
+        print(e, file=sys.stderr)
+        return 1
+    print(f"status={solve_result.status} engine={solve_result.engine} makespan={solve_result.objective} "
+          f"list_makespan={solve_result.heuristic_objective} gap={solve_result.gap} cache={'hit' if cached else 'miss'}")
+    if not solve_result.has_solution:
+        return 1
+
+    # 出力ブックの結果が変わらない場合は書き直さない
+    unchanged = False
+    if os.path.exists(args.output):
+        existing = scheduler.previous_table if incremental else scheduler.excel_handler.load_table(args.output, args.sheet)
+        unchanged = scheduler.table.schedule_matches(existing)
+    if unchanged:
+        scheduler.save_solved_inputs(args.output)
+        print(f"output unchanged: {args.output}")
+    else:
+        # 結果をExcelに出力
+        if not os.path.exists(args.output):
+            shutil.copy(args.input, args.output)
+        scheduler.export_results_to_excel(args.output, args.sheet, solve_result.results)
+
+    # CSV・JSON Lines・Parquet・HTML などへの追加の出力（出力ブックを書き終えてから行う）
+    failed = False
+    for path in args.export or []:
+        try:
+            if os.path.splitext(path)[1].lower() == '.xlsx':
+                # .xlsx は入力の書式を引き継いだ出力ブックをそのまま複製する
+                if os.path.abspath(path) != os.path.abspath(args.output):
+                    shutil.copy(args.output, path)
+            else:
+                scheduler.export_results([path], args.sheet)
+        except (ImportError, OSError, ValueError) as e:
+            print(f"{path} を書き出せませんでした: {e}", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+def export(args) -> int:
+    """
+    ブックに書かれた開始日・終了日(予想)を出力する
+
+    出力が .xlsx の場合はガントチャートを描き直し、.csv・.jsonl・.parquet・.html の場合はその形式で書き出す。
+    """
+    from src.utils.excel_handler import ExcelHandler
+    from src.utils.schedule_sinks import export_schedule
+
+    handler = ExcelHandler()
+    table = handler.load_table(args.input, args.sheet)
+    is_workbook = os.path.splitext(args.output)[1].lower() == '.xlsx'
+    try:
+        if is_workbook and os.path.abspath(args.input) != os.path.abspath(args.output):
+            shutil.copy(args.input, args.output)
+        export_schedule(table, [args.output], sheet_name=args.sheet, mode=args.mode)
+    except (ImportError, OSError, ValueError) as e:
+        print(f"{args.output} を書き出せませんでした: {e}", file=sys.stderr)
+        return 1
+    print(f"tasks={len(table)} output={args.output}")
+    return 0
+
+
+def batch(args) -> int:
+    """ディレクトリまたはマニフェストの複数プロジェクトを並列に解き、結果の一覧を書き出す"""
+    from src.services.batch_runner import BatchRunner, load_projects, write_summary
+
+    defaults = {'time_limit': args.time_limit} if args.time_limit is not None else {}
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    specs = load_projects(args.projects, args.output_dir, **defaults)
+
+    def report(outcome):
+        timings = ' '.join(f'{stage}={seconds:.2f}s' for stage, seconds in outcome.timings.items())
+        print(f"{outcome.name}: status={outcome.status} tasks={outcome.tasks} makespan={outcome.makespan} "
+              f"finish={outcome.finish} late={outcome.late} {timings}" + (f" error={outcome.error}" if outcome.error else ''))
+
+    outcomes = BatchRunner(args.processes).run(specs, on_outcome=report)
+    summary_dir = args.output_dir or (args.projects if os.path.isdir(args.projects)
+                                      else os.path.dirname(os.path.abspath(args.projects)))
+    summary_path = args.summary or os.path.join(summary_dir, BATCH_SUMMARY_FILENAME)
+    write_summary(outcomes, summary_path)
+    failed = sum(not outcome.succeeded for outcome in outcomes)
+    print(f"projects={len(outcomes)} failed={failed} summary={summary_path}")
+    return 1 if failed else 0
+
+
+def sweep(args) -> int:
+    """作業者数だけを変えた複数のシナリオを解き、人数ごとのメイクスパンの表を出力する"""
+    import json
+    import numpy as np
+    from src.models import SolverOptions
+    from src.services.task_scheduler import TaskScheduler
+
+    scheduler = TaskScheduler(num_workers=min(args.headcounts), workday_hours=DEFAULT_WORKDAY_HOURS)
+    scheduler.load_tasks_from_excel(args.input, args.sheet)
+    options = SolverOptions(
+        num_search_workers=args.search_workers,
+        max_time_in_seconds=args.time_limit,
+        relative_gap_limit=args.gap,
+        engine=args.engine,
+        priority_rule=args.priority_rule,
+    )
+    scenarios = scheduler.sweep_headcounts(args.headcounts, options, args.parallel)
+
+    rows = []
+    print(f"{'workers':>7} {'status':>9} {'makespan':>9} {'bound':>9} {'list':>9}  finish")
+    for scenario in scenarios:
+        result = scenario.result
+        row = {
+            'num_workers': scenario.num_workers,
+            'status': result.status,
+            'makespan': result.objective,
+            'best_bound': result.best_bound,
+            'gap': result.gap,
+            'heuristic_makespan': result.heuristic_objective,
+            'finish': scenario.finish.isoformat() if scenario.finish else None,
+            'wall_time': result.wall_time,
+            'output': None,
+        }
+        # シナリオごとのガントチャート（タスクの読込・カレンダーは全シナリオで共有）
+        if args.gantt_dir and result.has_solution:
+            os.makedirs(args.gantt_dir, exist_ok=True)
+            stem = os.path.splitext(os.path.basename(args.input))[0]
+            row['output'] = os.path.join(args.gantt_dir, f'{stem}_w{scenario.num_workers}.xlsx')
+            shutil.copy(args.input, row['output'])
+            _, starts, ends = np.array(result.results, dtype=np.float64).T
+            scheduler.apply_schedule(starts, ends)
+            scheduler.export_results_to_excel(row['output'], args.sheet, result.results)
+        rows.append(row)
+        print(f"{scenario.num_workers:>7} {result.status:>9} {result.objective or float('nan'):>9.2f} "
+              f"{result.best_bound or float('nan'):>9.2f} {result.heuristic_objective or float('nan'):>9.2f}  "
+              f"{row['finish']}")
+
+    summary_path = args.summary or os.path.join(args.gantt_dir or os.path.dirname(os.path.abspath(args.input)),
+                                                SWEEP_SUMMARY_FILENAME)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump({'input': args.input, 'scenarios': rows}, f, ensure_ascii=False, indent=2)
+    print(f"scenarios={len(rows)} summary={summary_path}")
+    return 0 if all(scenario.result.has_solution for scenario in scenarios) else 1
+
+
+def risk(args) -> int:
+    """工数の不確実性によるリスク分析を行い、完了日のパーセンタイルとクリティカル度を出力ブックに書き出す"""
+    import numpy as np
+    from src.services.risk_analysis import RiskAnalyzer
+    from src.services.task_scheduler import TaskScheduler
+
+    scheduler = TaskScheduler(num_workers=args.workers, workday_hours=DEFAULT_WORKDAY_HOURS)
+    scheduler.load_tasks_from_excel(args.input, args.sheet)
+    ranges = scheduler.excel_handler.load_duration_ranges(args.input, args.sheet)
+    optimistic, pessimistic = (
+        np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+        for values in zip(*[ranges.get(task_id, (None, None)) for task_id in scheduler.table.ids.tolist()])
+    ) if len(scheduler.table) else (None, None)
+
+    analyzer = RiskAnalyzer(scheduler, samples=args.samples, distribution=args.distribution,
+                            max_processes=args.processes, seed=args.seed)
+    report = analyzer.analyze(optimistic, pessimistic)
+    print(f"samples={report.samples} distribution={report.distribution} baseline={report.baseline_makespan} "
+          + ' '.join(f"p{percent}={value:.2f}({report.finish_dates[percent]})"
+                     for percent, value in report.finish_percentiles.items())
+          + f" time={report.wall_time:.2f}s")
+    for i in np.argsort(-report.criticality, kind='stable')[:args.top].tolist():
+        print(f"  task {scheduler.table.ids[i]} {scheduler.table.names[i]}: criticality={report.criticality[i]:.2f}")
+
+    if not os.path.exists(args.output):
+        shutil.copy(args.input, args.output)
+    scheduler.excel_handler.export_risk(args.output, scheduler.table, report)
+    return 0
+
+
+def cache(args) -> int:
+    """結果キャッシュのヒット率と使用量を表示する"""
+    from src.services.result_cache import ResultCache
+
+    result_cache = ResultCache()
+    if args.clear:
+        result_cache.clear()
+    stats = result_cache.stats()
+    hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else '-'
+    print(f"hits={stats['hits']} misses={stats['misses']} hit_rate={hit_rate} evictions={stats['evictions']} "
+          f"entries={stats['entries']} bytes={stats['bytes']}/{stats['max_bytes']}")
+    return 0
+
+
+def serve(args) -> int:
+    """ワーカープロセスを待機させ、ローカルの HTTP でスケジューリングのジョブを受け付ける"""
+    from src.services.schedule_service import ScheduleService, create_server
+
+    service = ScheduleService(args.workers)
+    service.start()
+    server = create_server(service, args.host, args.port, args.socket)
+
+    def stop(signum, frame):
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)  # 終了処理中の再度の通知は無視する
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    print(f"listening on {args.socket or f'http://{args.host}:{server.server_address[1]}'} workers={args.workers}",
+          flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--profile', metavar='PATH', help='cProfile の結果を PATH に保存し、上位の関数を表示する')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_workbook_arguments(subparser, default_input):
+        subparser.add_argument('--input', default=default_input, help='読み込むブック')
+        subparser.add_argument('--sheet', default=DEFAULT_SHEET_NAME, help='シート名')
+
+    command = subparsers.add_parser('validate', help='WBSの先行関係と工数を検査する')
+    add_workbook_arguments(command, DEFAULT_EXCEL_FILENAME)
+    command.set_defaults(handler=validate)
+
+    command = subparsers.add_parser('solve', help='スケジューリングを実行して結果を出力する')
+    add_workbook_arguments(command, DEFAULT_EXCEL_FILENAME)
+    command.add_argument('--output', default=OUTPUT_EXCEL_FILENAME, help='出力ブック')
+    command.add_argument('--workers', type=int, default=DEFAULT_NUM_WORKERS, help='作業者数')
+    command.add_argument('--engine', choices=('cp_sat', 'list'), default=SCHEDULING_ENGINE)
+    command.add_argument('--priority-rule', choices=('critical_path', 'slack'), default=LIST_PRIORITY_RULE)
+    command.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT_SECONDS, help='制限時間（秒）')
+    command.add_argument('--gap', type=float, default=DEFAULT_RELATIVE_GAP_LIMIT, help='目標とする相対ギャップ')
+    command.add_argument('--search-workers', type=int, default=DEFAULT_SEARCH_WORKERS, help='CP-SAT の並列探索ワーカー数')
+    command.add_argument('--no-incremental', dest='incremental', action='store_false', default=INCREMENTAL_MODE,
+                         help='前回の出力を使わずに全体を解き直す')
+    command.add_argument('--no-cache', dest='cache', action='store_false', default=RESULT_CACHE_DIR is not None,
+                         help='結果キャッシュを使わずに解く')
+    command.add_argument('--export', action='append', metavar='PATH',
+                         help='結果を拡張子に応じた形式（.csv / .jsonl / .parquet / .html / .xlsx）でも書き出す（複数指定可）')
+    command.set_defaults(handler=solve)
+
+    command = subparsers.add_parser('export', help='ブックの開始日・終了日(予想)からガントチャートなどを出力する')
+    add_workbook_arguments(command, OUTPUT_EXCEL_FILENAME)
+    command.add_argument('--output', default=OUTPUT_EXCEL_FILENAME,
+                         help='出力先（.xlsx / .csv / .jsonl / .parquet / .html）')
+    command.add_argument('--mode', choices=('fill', 'conditional', 'write_only'), default=GANTT_EXPORT_MODE,
+                         help="ガントチャートの描画方法（write_only は高速だがブックの書式・列幅が失われる）")
+    command.set_defaults(handler=export)
+
+    command = subparsers.add_parser('batch', help='複数プロジェクトを並列に解く')
+    command.add_argument('projects', help='WBSブックのディレクトリ、またはマニフェスト（JSON）')
+    command.add_argument('--output-dir', help='出力ブックの保存先（省略時は各WBSブックと同じ場所）')
+    command.add_argument('--processes', type=int, default=BATCH_MAX_PROCESSES, help='同時に実行するプロジェクト数')
+    command.add_argument('--time-limit', type=float, help='各プロジェクトの制限時間（秒）')
+    command.add_argument('--summary', help=f'結果一覧の保存先（省略時は {BATCH_SUMMARY_FILENAME}）')
+    command.set_defaults(handler=batch)
+
+    command = subparsers.add_parser('risk', help='工数の不確実性による完了日のリスクを分析する')
+    add_workbook_arguments(command, DEFAULT_EXCEL_FILENAME)
+    command.add_argument('--output', default=OUTPUT_EXCEL_FILENAME, help=f'シート「{RISK_SHEET_NAME}」を書き出すブック')
+    command.add_argument('--workers', type=int, default=DEFAULT_NUM_WORKERS, help='作業者数')
+    command.add_argument('--samples', type=int, default=RISK_SAMPLES, help='試行数')
+    command.add_argument('--distribution', choices=('pert', 'triangular'), default=RISK_DISTRIBUTION)
+    command.add_argument('--processes', type=int, default=RISK_MAX_PROCESSES, help='同時に実行するプロセス数')
+    command.add_argument('--seed', type=int, default=RISK_SEED, help='乱数の種')
+    command.add_argument('--top', type=int, default=10, help='表示するクリティカル度の高いタスク数')
+    command.set_defaults(handler=risk)
+
+    command = subparsers.add_parser('cache', help='結果キャッシュのヒット率と使用量を表示する')
+    command.add_argument('--clear', action='store_true', help='キャッシュを削除する')
+    command.set_defaults(handler=cache)
+
+    command = subparsers.add_parser('sweep', help='作業者数を変えた複数のシナリオを比較する')
+    add_workbook_arguments(command, DEFAULT_EXCEL_FILENAME)
+    command.add_argument('--headcounts', type=int, nargs='+', required=True, help='比較する作業者数（例: 3 4 6）')
+    command.add_argument('--engine', choices=('cp_sat', 'list'), default=SCHEDULING_ENGINE)
+    command.add_argument('--priority-rule', choices=('critical_path', 'slack'), default=LIST_PRIORITY_RULE)
+    command.add_argument('--time-limit', type=float, default=DEFAULT_TIME_LIMIT_SECONDS, help='各シナリオの制限時間（秒）')
+    command.add_argument('--gap', type=float, default=DEFAULT_RELATIVE_GAP_LIMIT, help='目標とする相対ギャップ')
+    command.add_argument('--search-workers', type=int, default=DEFAULT_SEARCH_WORKERS, help='CP-SAT の並列探索ワーカー数')
+    command.add_argument('--parallel', type=int, default=SWEEP_MAX_PARALLEL, help='同時に解くシナリオ数')
+    command.add_argument('--gantt-dir', help='指定した場合、シナリオごとのガントチャートのブックを保存する')
+    command.add_argument('--summary', help=f'結果の表の保存先（省略時は {SWEEP_SUMMARY_FILENAME}）')
+    command.set_defaults(handler=sweep)
+
+    command = subparsers.add_parser('serve', help='常駐してローカルの HTTP でジョブを受け付ける')
+    command.add_argument('--host', default=SERVICE_HOST)
+    command.add_argument('--port', type=int, default=SERVICE_PORT)
+    command.add_argument('--socket', help='TCP の代わりに待ち受ける Unix ソケットのパス')
+    command.add_argument('--workers', type=int, default=SERVICE_WORKERS, help='待機させるワーカープロセス数')
+    command.set_defaults(handler=serve)
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    if not args.profile:
+        return args.handler(args)
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    status = profiler.runcall(args.handler, args)
+    profiler.dump_stats(args.profile)
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(30)
+    return status
 
-    
-    # 結果をExcelに出力
-    scheduler.export_results_to_excel(OUTPUT_EXCEL_FILENAME, DEFAULT_SHEET_NAME, scheduling_results)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -5,7 +5,7 @@ from typing import List, Tuple, Optional
 from datetime import datetime, timedelta, time
 from business_duration import businessDuration
 import holidays as pyholidays
-from test_jholidays import get_japanese_calendar
+from src.services.calendar_service import get_japanese_calendar
 from openpyxl.styles import PatternFill, Border, Side
 import pandas as pd 
 
@@ -127,8 +127,7 @@ class TaskScheduler:
                 # ガントチャートの図示
                 project_start_date = '2024-12-01'
                 project_end_date = '2024-12-31'
-                year = 2024
-                calendar_df = get_japanese_calendar(year,project_start_date,project_end_date)
+                calendar_df = get_japanese_calendar(project_start_date,project_end_date)
                 transposed_df = calendar_df.T
 
                 # 開始列
@@ -1,3 +1,4 @@
+import os
 from datetime import datetime
 
 # 基本設定
@@ -5,12 +6,95 @@ DEFAULT_NUM_WORKERS = 2
 DEFAULT_WORKDAY_HOURS = 9
 DEFAULT_START_DATE = datetime(2025, 1, 1, 9, 0)
 
+# CP-SAT の時間単位（時間）。None の場合は工数の最大公約数から自動で決める（例: 0.25 = 15分刻み）
+TIME_GRANULARITY_HOURS = None
+MAX_TIME_SCALE = 100  # 自動で決める場合の最小単位（1/100 時間）
+
+# ソルバー設定
+DEFAULT_SEARCH_WORKERS = 0          # 並列探索ワーカー数（0:全コア）
+DEFAULT_TIME_LIMIT_SECONDS = None   # 制限時間（秒）。None の場合は無制限
+DEFAULT_RELATIVE_GAP_LIMIT = None   # 目標とする相対ギャップ（例: 0.01）
+
+# スケジューリングエンジン（'cp_sat': CP-SATで最適化 / 'list': 優先度付きリストスケジューリングのみ）
+SCHEDULING_ENGINE = 'cp_sat'
+LIST_PRIORITY_RULE = 'critical_path'  # リストスケジューリングの優先度（'critical_path' / 'slack'）
+SEED_WITH_LIST_SCHEDULE = True        # リストスケジューリングの解を CP-SAT のヒントにする
+
+# 分割求解（弱連結成分ごとにプロセスプールで並列に解く）
+DECOMPOSITION_MIN_TASKS = 500       # これ未満のタスク数では分割しない
+DECOMPOSITION_TARGET_SIZE = 2000    # 1つの部分問題あたりの目安タスク数
+DECOMPOSITION_MAX_PROCESSES = None  # None の場合は CPU コア数
+
+# 前回の出力ブックを使った差分再スケジューリング
+INCREMENTAL_MODE = True
+SOLVED_INPUTS_SUFFIX = '.inputs.npz'  # 解いたときの工数・先行タスク・実績（<出力ファイル名><接尾辞>）
+
+# 複数プロジェクトの一括実行
+BATCH_MAX_PROCESSES = None                   # 同時に実行するプロジェクト数（None の場合は CPU コア数）
+BATCH_OUTPUT_SUFFIX = '_output'              # 出力ブック名 = <WBSブック名><接尾辞>.xlsx
+BATCH_SUMMARY_FILENAME = 'batch_summary.json'
+
+# 作業者数を変えたシナリオの比較（python main.py sweep）
+SWEEP_MAX_PARALLEL = None                    # 同時に解くシナリオ数（None の場合は CPU コア数）
+SWEEP_SUMMARY_FILENAME = 'headcount_sweep.json'
+
+# 工数の不確実性によるリスク分析（python main.py risk）
+RISK_SAMPLES = 1000                          # 試行数
+RISK_DISTRIBUTION = 'pert'                   # 'pert' / 'triangular'
+RISK_OPTIMISTIC_RATIO = 0.8                  # 工数(楽観) が空欄の場合の 工数(予想) に対する比率
+RISK_PESSIMISTIC_RATIO = 1.5                 # 工数(悲観) が空欄の場合の 工数(予想) に対する比率
+RISK_PERCENTILES = (50, 90)
+RISK_BATCH_SIZE = 250                        # 1プロセスで一度に評価する試行数
+RISK_HISTOGRAM_BINS = 100                    # タスクごとの終了時間のパーセンタイルを求める度数分布のビン数
+RISK_PILOT_SAMPLES = 50                      # 度数分布の範囲を決める予備試行の数（集計には含めない）
+RISK_MAX_PROCESSES = None                    # None の場合は CPU コア数
+RISK_SEED = None                             # 乱数の種（None の場合は毎回異なる）
+RISK_SHEET_NAME = 'リスク分析'
+
+# 常駐スケジューリングサービス（python main.py serve）
+SERVICE_HOST = '127.0.0.1'                   # ローカルからの接続のみ受け付ける
+SERVICE_PORT = 8765
+SERVICE_WORKERS = 2                          # 待機させるワーカープロセス数（同時に解くジョブ数）
+SERVICE_MAX_UPLOAD_BYTES = 64 * 1024 * 1024
+SERVICE_JOB_TTL_SECONDS = 3600               # 終了したジョブの結果を保持する時間
+SERVICE_MAX_FINISHED_JOBS = 1000             # 保持する終了済みジョブの最大数（超えた分は古い順に破棄）
+SERVICE_LOG_REQUESTS = False
+
 # プロジェクト期間
 PROJECT_START_DATE = '2025-01-01'
 PROJECT_END_DATE = '2025-01-31'
 
+# 稼働カレンダーを構築する期間（プロジェクト開始日からの日数。カレンダーの保持範囲が長ければそちらを使う）
+CALENDAR_SPAN_DAYS = 730
+
+# 稼働カレンダーの保持範囲（年）。範囲外の期間を使う場合は自動で広げる
+CALENDAR_FIRST_YEAR = 2020
+CALENDAR_LAST_YEAR = 2040
+
+# 会社独自の休業日（日付、または (開始日, 終了日) の組。例: ['2025-08-13', ('2025-12-29', '2026-01-03')]）
+COMPANY_CLOSURE_DAYS = []
+
 # Excel関連
 DEFAULT_EXCEL_FILENAME = r'C:\Project\GanttChart\myenv\Scripts\makeGanttChart\project_root\WBS.xlsx'
 DEFAULT_SHEET_NAME = 'Sheet1'
 
+# ガントチャートの出力モード（'fill' / 'conditional' / 'write_only'。None の場合は 'conditional'）
+# 'write_only' は大規模な計画を速く書き出せるが、ブックの書式・列幅が失われるため明示的に指定した場合のみ使う
+GANTT_EXPORT_MODE = None
+
+# CSV・JSON Lines・Parquet・HTML への出力で一度に書き出す行数
+SINK_CHUNK_ROWS = 10000
+
 OUTPUT_EXCEL_FILENAME = r'C:\Project\GanttChart\myenv\Scripts\makeGanttChart\project_root\output.xlsx'
+
+# 実行統計（出力ブックの隣に <出力ファイル名>.stats.json を書き出す）
+WRITE_RUN_STATS = True
+STATS_TRACE_MEMORY = False  # True の場合は tracemalloc で段階ごとのピークメモリを計測（処理は遅くなる）
+
+# キャッシュ
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), '.cache')
+PARSE_CACHE_DIR = os.path.join(CACHE_DIR, 'wbs')  # WBS解析結果（None の場合はキャッシュしない）
+PARSE_CACHE_MAX_ENTRIES = 32
+CALENDAR_STORE_DIR = os.path.join(CACHE_DIR, 'calendar')  # 稼働日ビットマップ（None の場合は保存しない）
+RESULT_CACHE_DIR = os.path.join(CACHE_DIR, 'results')  # スケジューリング結果（None の場合はキャッシュしない）
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
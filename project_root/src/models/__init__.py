@@ -1,3 +1,8 @@
-__all__ = ['Task']
+__all__ = ['Task', 'TaskTable', 'TaskTableBuilder', 'TaskView', 'SolverOptions', 'SolutionEvent', 'SolveResult',
+           'HeadcountScenario', 'ProjectSpec', 'ProjectOutcome', 'RiskReport']
 
-from .task import Task
\ No newline at end of file
+from .task import Task
+from .task_table import TaskTable, TaskTableBuilder, TaskView
+from .schedule import SolverOptions, SolutionEvent, SolveResult, HeadcountScenario
+from .batch import ProjectSpec, ProjectOutcome
+from .risk import RiskReport
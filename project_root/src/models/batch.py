@@ -0,0 +1,39 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from src.config.settings import *
+
+
+@dataclass
+class ProjectSpec:
+    """一括実行する1プロジェクトの設定"""
+    name: str
+    input: str
+    output: str
+    sheet: str = DEFAULT_SHEET_NAME
+    num_workers: int = DEFAULT_NUM_WORKERS
+    start_date: str = PROJECT_START_DATE
+    end_date: Optional[str] = None  # 指定した場合、最終タスクの終了がこれを超えると late とする
+    time_limit: Optional[float] = DEFAULT_TIME_LIMIT_SECONDS
+    engine: str = SCHEDULING_ENGINE
+    incremental: bool = INCREMENTAL_MODE
+
+
+@dataclass
+class ProjectOutcome:
+    """1プロジェクトの実行結果"""
+    name: str
+    input: str
+    output: str
+    status: str  # ソルバーのステータス、または失敗時は 'ERROR'
+    tasks: int = 0
+    makespan: Optional[float] = None  # 時間
+    heuristic_makespan: Optional[float] = None
+    finish: Optional[str] = None  # 最終タスクの終了日時（ISO 形式）
+    late: Optional[bool] = None
+    cached: bool = False  # 結果キャッシュから得た結果かどうか
+    timings: Dict[str, float] = field(default_factory=dict)  # 段階ごとの経過時間（秒）
+    error: Optional[str] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status in ('OPTIMAL', 'FEASIBLE')
@@ -0,0 +1,20 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+
+
+@dataclass
+class RiskReport:
+    """モンテカルロ法によるスケジュールリスク分析の結果（時間はすべて起点からの稼働時間）"""
+    samples: int
+    distribution: str  # 'pert' / 'triangular'
+    baseline_makespan: float  # 工数(予想)どおりの場合のメイクスパン
+    baseline_end_dates: Optional[np.ndarray] = None  # 工数(予想)どおりの場合のタスクごとの終了日時（datetime64）
+    finish_percentiles: Dict[int, float] = field(default_factory=dict)  # パーセンタイル → 完了時間
+    finish_dates: Dict[int, Optional[datetime]] = field(default_factory=dict)  # パーセンタイル → 完了日時
+    end_percentiles: Dict[int, np.ndarray] = field(default_factory=dict)  # パーセンタイル → タスクごとの終了時間（度数分布による近似）
+    end_dates: Dict[int, np.ndarray] = field(default_factory=dict)  # パーセンタイル → タスクごとの終了日時（datetime64）
+    criticality: Optional[np.ndarray] = None  # タスクごとのクリティカル度（クリティカルになった試行の割合）
+    wall_time: float = 0.0
+
@@ -0,0 +1,48 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import List, Optional, Tuple
+from src.config.settings import *
+
+
+@dataclass
+class SolverOptions:
+    num_search_workers: int = DEFAULT_SEARCH_WORKERS  # 0 の場合は全コアを使用
+    max_time_in_seconds: Optional[float] = DEFAULT_TIME_LIMIT_SECONDS
+    relative_gap_limit: Optional[float] = DEFAULT_RELATIVE_GAP_LIMIT
+    log_search_progress: bool = False
+    engine: str = SCHEDULING_ENGINE  # 'cp_sat' / 'list'
+    priority_rule: str = LIST_PRIORITY_RULE
+    seed_with_list: bool = SEED_WITH_LIST_SCHEDULE  # CP-SAT 使用時にリストスケジューリングの解をヒントにする
+
+
+@dataclass
+class SolutionEvent:
+    """探索中に改善解が見つかるたびに通知される途中経過"""
+    objective: float
+    best_bound: float
+    wall_time: float
+    results: List[Tuple[int, float, float]] = field(default_factory=list)
+
+
+@dataclass
+class SolveResult:
+    status: str
+    results: List[Tuple[int, float, float]] = field(default_factory=list)
+    objective: Optional[float] = None  # メイクスパン（時間）
+    best_bound: Optional[float] = None
+    gap: Optional[float] = None  # 相対最適性ギャップ
+    wall_time: float = 0.0
+    engine: str = 'cp_sat'  # 解を得たエンジン（'cp_sat' / 'list' / 'decomposition'）
+    heuristic_objective: Optional[float] = None  # リストスケジューリングのメイクスパン（時間）
+
+    @property
+    def has_solution(self) -> bool:
+        return self.status in ('OPTIMAL', 'FEASIBLE')
+
+
+@dataclass
+class HeadcountScenario:
+    """作業者数を変えたシナリオの結果"""
+    num_workers: int
+    result: SolveResult  # results はオフセット（時間）
+    finish: Optional[datetime] = None  # 最終タスクの終了日時
@@ -2,7 +2,7 @@ from dataclasses import dataclass, field
 from typing import List, Optional
 from datetime import datetime
 
-@dataclass
+@dataclass(slots=True)
 class Task:
     id: int
     name: str
@@ -0,0 +1,238 @@
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Sequence
+import numpy as np
+from .task import Task
+
+NAT = np.datetime64('NaT', 's')
+
+# 日時の列（datetime64[s]、未設定は NaT）
+DATETIME_COLUMNS = (
+    'cp_estimated_start_time',
+    'cp_estimated_end_time',
+    'actual_start_time',
+    'actual_end_time',
+    'target_end_time',
+)
+
+
+def to_datetime64(values: Optional[Iterable], n: int = 0) -> np.ndarray:
+    """日時のリストを datetime64[s] 配列に変換（None・NaT は NaT、values が None の場合は長さ n の NaT）"""
+    if values is None:
+        return np.full(n, NAT)
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[s]')
+    # None・NaT（自身と等しくない値）は未設定とする
+    return np.array([v if v is not None and v == v else None for v in values], dtype='datetime64[s]')
+
+
+class TaskTable:
+    """
+    タスクの列指向テーブル。
+
+    タスク番号・工数・各日時を NumPy 配列で持ち、先行タスク番号は CSR 形式
+    （predecessor_indptr と predecessor_ids）で保持します。
+    1件ずつ扱いたい場合は table[i] で TaskView を、to_tasks() で Task のリストを取得できます。
+    """
+
+    def __init__(self, ids, names, durations, predecessor_indptr=None, predecessor_ids=None,
+                 cp_estimated_start_time=None, cp_estimated_end_time=None,
+                 actual_start_time=None, actual_end_time=None, target_end_time=None,
+                 difference=None):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        n = len(self.ids)
+        self.names = np.empty(n, dtype=object)
+        self.names[:] = list(names)
+        self.durations = np.asarray(durations, dtype=np.float64)
+        self.predecessor_indptr = (np.zeros(n + 1, dtype=np.int64) if predecessor_indptr is None
+                                   else np.asarray(predecessor_indptr, dtype=np.int64))
+        self.predecessor_ids = (np.zeros(0, dtype=np.int64) if predecessor_ids is None
+                                else np.asarray(predecessor_ids, dtype=np.int64))
+        self.cp_estimated_start_time = to_datetime64(cp_estimated_start_time, n)
+        self.cp_estimated_end_time = to_datetime64(cp_estimated_end_time, n)
+        self.actual_start_time = to_datetime64(actual_start_time, n)
+        self.actual_end_time = to_datetime64(actual_end_time, n)
+        self.target_end_time = to_datetime64(target_end_time, n)
+        self.difference = (np.full(n, np.nan) if difference is None
+                           else np.asarray(difference, dtype=np.float64))
+
+    @classmethod
+    def from_tasks(cls, tasks: Sequence[Task]) -> 'TaskTable':
+        builder = TaskTableBuilder()
+        for task in tasks:
+            builder.append(
+                task.id, task.name, task.duration, task.predecessors,
+                task.cp_estimated_start_time, task.cp_estimated_end_time,
+                task.actual_start_time, task.actual_end_time, task.target_end_time,
+            )
+        table = builder.build()
+        table.difference[:] = [np.nan if task.difference is None else task.difference for task in tasks]
+        return table
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> 'TaskView':
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return TaskView(self, index)
+
+    def __iter__(self) -> Iterator['TaskView']:
+        return (TaskView(self, i) for i in range(len(self)))
+
+    def predecessors(self, index: int) -> np.ndarray:
+        """index 番目のタスクの先行タスク番号"""
+        return self.predecessor_ids[self.predecessor_indptr[index]:self.predecessor_indptr[index + 1]]
+
+    def predecessor_lists(self, start: int = 0, stop: Optional[int] = None) -> List[List[int]]:
+        """行 start〜stop（省略時は最後まで）の先行タスク番号のリスト（CSR の該当範囲のみ変換する）"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        indptr = self.predecessor_indptr[start:stop + 1]
+        ids = self.predecessor_ids[indptr[0]:indptr[-1]].tolist() if len(indptr) else []
+        offsets = (indptr - indptr[0]).tolist() if len(indptr) else []
+        return [ids[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+    def indices_of(self, task_ids) -> np.ndarray:
+        """タスク番号を行インデックスに変換（存在しない番号は -1）"""
+        task_ids = np.asarray(task_ids, dtype=np.int64)
+        if not len(self):
+            return np.full(len(task_ids), -1, dtype=np.int64)
+        order = np.argsort(self.ids, kind='stable')
+        sorted_ids = self.ids[order]
+        position = np.minimum(np.searchsorted(sorted_ids, task_ids), len(self) - 1)
+        return np.where(sorted_ids[position] == task_ids, order[position], -1)
+
+    def sorted_predecessor_ids(self) -> np.ndarray:
+        """各行の中で昇順に並べ替えた先行タスク番号（CSR の並びはそのまま）"""
+        rows = np.repeat(np.arange(len(self)), np.diff(self.predecessor_indptr))
+        return self.predecessor_ids[np.lexsort((self.predecessor_ids, rows))]
+
+    def predecessors_differ(self, other: 'TaskTable') -> np.ndarray:
+        """行ごとに先行タスク番号の集合（重複を含む）が other の同じ行と異なるかどうか"""
+        counts, other_counts = np.diff(self.predecessor_indptr), np.diff(other.predecessor_indptr)
+        differ = counts != other_counts
+        rows = np.repeat(np.arange(len(self)), counts)
+        other_rows = np.repeat(np.arange(len(other)), other_counts)
+        # 件数が同じ行は要素が同じ位置に並ぶ
+        mismatch = self.sorted_predecessor_ids()[~differ[rows]] != other.sorted_predecessor_ids()[~differ[other_rows]]
+        differ |= np.bincount(rows[~differ[rows]][mismatch], minlength=len(self)) > 0
+        return differ
+
+    def schedule_matches(self, other: 'TaskTable') -> bool:
+        """全タスクの開始日・終了日(予想)（分単位）が、other の同じ番号のタスクと一致するかどうか"""
+        found = other.indices_of(self.ids)
+        if len(self) != len(other) or (found < 0).any():
+            return False
+        other = other.take(found)
+        for column in ('cp_estimated_start_time', 'cp_estimated_end_time'):
+            values = getattr(self, column).astype('datetime64[m]')
+            other_values = getattr(other, column).astype('datetime64[m]')
+            if not ((values == other_values) | (np.isnat(values) & np.isnat(other_values))).all():
+                return False
+        return True
+
+    def take(self, indices: np.ndarray) -> 'TaskTable':
+        """指定したインデックスの行だけを持つテーブル"""
+        indices = np.asarray(indices, dtype=np.int64)
+        lengths = np.diff(self.predecessor_indptr)[indices]
+        indptr = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        positions = np.arange(indptr[-1]) - np.repeat(indptr[:-1], lengths) + np.repeat(self.predecessor_indptr[indices], lengths)
+        return TaskTable(
+            self.ids[indices], self.names[indices], self.durations[indices],
+            indptr, self.predecessor_ids[positions],
+            *(getattr(self, column)[indices] for column in DATETIME_COLUMNS),
+            difference=self.difference[indices],
+        )
+
+    def to_tasks(self) -> List[Task]:
+        return [view.to_task() for view in self]
+
+
+class TaskTableBuilder:
+    """1行ずつ追加して TaskTable を組み立てる（WBSのストリーミング読込用）"""
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.names: List[str] = []
+        self.durations: List[float] = []
+        self.predecessor_counts: List[int] = []
+        self.predecessor_ids: List[int] = []
+        self.datetimes: List[List[Optional[datetime]]] = [[] for _ in DATETIME_COLUMNS]
+
+    def append(self, task_id: int, name: str, duration: float, predecessors: Sequence[int],
+               *datetimes: Optional[datetime]):
+        """datetimes は DATETIME_COLUMNS の順（省略した列は未設定）"""
+        self.ids.append(task_id)
+        self.names.append(name)
+        self.durations.append(duration)
+        self.predecessor_counts.append(len(predecessors))
+        self.predecessor_ids.extend(predecessors)
+        for i, column in enumerate(self.datetimes):
+            column.append(datetimes[i] if i < len(datetimes) else None)
+
+    def build(self) -> TaskTable:
+        indptr = np.zeros(len(self.ids) + 1, dtype=np.int64)
+        np.cumsum(self.predecessor_counts, out=indptr[1:])
+        return TaskTable(self.ids, self.names, self.durations, indptr, self.predecessor_ids, *self.datetimes)
+
+
+class TaskView:
+    """TaskTable の1行を Task と同じ属性名で読み書きするビュー"""
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table: TaskTable, index: int):
+        self._table = table
+        self._index = index
+
+    id = property(lambda self: int(self._table.ids[self._index]))
+    name = property(lambda self: self._table.names[self._index])
+
+    @property
+    def duration(self) -> float:
+        duration = float(self._table.durations[self._index])
+        return int(duration) if duration.is_integer() else duration
+
+    @duration.setter
+    def duration(self, value: float):
+        self._table.durations[self._index] = value
+
+    @property
+    def predecessors(self) -> List[int]:
+        return self._table.predecessors(self._index).tolist()
+
+    @property
+    def difference(self) -> Optional[float]:
+        value = float(self._table.difference[self._index])
+        return None if np.isnan(value) else value
+
+    @difference.setter
+    def difference(self, value: Optional[float]):
+        self._table.difference[self._index] = np.nan if value is None else value
+
+    def to_task(self) -> Task:
+        return Task(
+            id=self.id, name=self.name, duration=self.duration,
+            **{column: getattr(self, column) for column in DATETIME_COLUMNS},
+            difference=self.difference, predecessors=self.predecessors,
+        )
+
+    def __repr__(self) -> str:
+        return f'TaskView({self.to_task()!r})'
+
+
+def _datetime_property(column: str) -> property:
+    def getter(self) -> Optional[datetime]:
+        value = getattr(self._table, column)[self._index]
+        return None if np.isnat(value) else value.item()
+
+    def setter(self, value: Optional[datetime]):
+        getattr(self._table, column)[self._index] = NAT if value is None else np.datetime64(value, 's')
+
+    return property(getter, setter)
+
+
+for _column in DATETIME_COLUMNS:
+    setattr(TaskView, _column, _datetime_property(_column))
@@ -0,0 +1,27 @@
+"""
+サービス層。
+
+各クラスは初回アクセス時にモジュールを読み込む（PEP 562）ため、
+`import src.services` だけでは ortools・pandas などの重い依存を読み込みません。
+"""
+from src.utils.lazy_exports import lazy_exports
+
+# 公開名 → 定義しているモジュール
+_EXPORTS = {
+    'TaskScheduler': 'task_scheduler',
+    'BatchRunner': 'batch_runner',
+    'ScheduleService': 'schedule_service',
+    'DecompositionSolver': 'decomposition_solver',
+    'PrecedenceGraph': 'precedence_graph',
+    'PrecedenceGraphError': 'precedence_graph',
+    'CalendarService': 'calendar_service',
+    'WorkCalendar': 'calendar_service',
+    'CalendarStore': 'calendar_store',
+    'ResultCache': 'result_cache',
+    'RiskAnalyzer': 'risk_analysis',
+    'list_schedule': 'list_scheduler',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
@@ -1,5 +0,0 @@
-__all__ = ['convert_to_datetime','task_scheduler']
-
-from .convert_to_datetime import convert_to_datetime
-from .task_scheduler import TaskScheduler
-
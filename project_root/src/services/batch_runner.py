@@ -0,0 +1,217 @@
+import glob
+import json
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, fields
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from src.models import *
+from src.utils.parallel import search_workers_per_process
+from src.config.settings import *
+
+
+def load_projects(path: str, output_dir: Optional[str] = None, **defaults) -> List[ProjectSpec]:
+    """ディレクトリ（中の .xlsx をすべて対象）またはマニフェスト（JSON）から一括実行の設定を読み込む"""
+    if os.path.isdir(path):
+        return discover_projects(path, output_dir, **defaults)
+    return load_manifest(path, output_dir, **defaults)
+
+
+def discover_projects(directory: str, output_dir: Optional[str] = None, **defaults) -> List[ProjectSpec]:
+    """ディレクトリ内のWBSブックを同じ設定で一括実行の対象にする（出力ブック・一時ファイルは除く）"""
+    specs = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.xlsx'))):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if stem.startswith('~$') or stem.endswith(BATCH_OUTPUT_SUFFIX):
+            continue
+        specs.append(ProjectSpec(name=stem, input=path, output=_output_path(path, output_dir), **defaults))
+    return specs
+
+
+def load_manifest(manifest_path: str, output_dir: Optional[str] = None, **defaults) -> List[ProjectSpec]:
+    """
+    マニフェストを読み込む
+
+    形式は ProjectSpec の項目を持つオブジェクトの配列、または
+    {"defaults": {...}, "projects": [{"input": "a.xlsx", "num_workers": 3, "start_date": "2025-04-01"}, ...]}。
+    相対パスはマニフェストのあるディレクトリを基準とする。
+    """
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {'projects': manifest}
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    known = {f.name for f in fields(ProjectSpec)}
+
+    specs = []
+    for entry in manifest.get('projects', []):
+        values = {**defaults, **manifest.get('defaults', {}), **entry}
+        unknown = set(values) - known
+        if unknown:
+            raise ValueError(f"{manifest_path}: 不明な項目があります: {sorted(unknown)}")
+        values['input'] = os.path.join(base_dir, values['input'])
+        if values.get('output'):
+            values['output'] = os.path.join(base_dir, values['output'])
+        else:
+            values['output'] = _output_path(values['input'], output_dir)
+        values.setdefault('name', os.path.splitext(os.path.basename(values['input']))[0])
+        specs.append(ProjectSpec(**values))
+    return specs
+
+
+def run_project(spec: ProjectSpec, num_search_workers: int = DEFAULT_SEARCH_WORKERS) -> ProjectOutcome:
+    """1プロジェクトを読み込み・求解・出力する（例外は ERROR の結果として返す）"""
+    from src.services.calendar_store import to_day
+    from src.services.result_cache import ResultCache
+    from src.services.task_scheduler import TaskScheduler
+
+    outcome = ProjectOutcome(name=spec.name, input=spec.input, output=spec.output, status='ERROR')
+    scheduler = None
+    try:
+        scheduler = TaskScheduler(num_workers=spec.num_workers, workday_hours=DEFAULT_WORKDAY_HOURS,
+                                  start_date=spec.start_date)
+        scheduler.load_tasks_from_excel(spec.input, spec.sheet)
+        outcome.tasks = len(scheduler.table)
+
+        incremental = spec.incremental and os.path.exists(spec.output)
+        if incremental:
+            scheduler.load_previous_schedule(spec.output, spec.sheet)
+        options = SolverOptions(num_search_workers=num_search_workers, max_time_in_seconds=spec.time_limit,
+                                engine=spec.engine)
+        result, outcome.cached = ResultCache().solve(
+            scheduler, options, lambda: scheduler.solve(options, incremental=incremental), incremental)
+        outcome.status = result.status
+        outcome.makespan = result.objective
+        outcome.heuristic_makespan = result.heuristic_objective
+        if not result.has_solution:
+            return outcome
+
+        # 出力ブックの結果が変わらない場合は書き直さない
+        if not (incremental and scheduler.table.schedule_matches(scheduler.previous_table)):
+            if not os.path.exists(spec.output):
+                shutil.copy(spec.input, spec.output)
+            scheduler.export_results_to_excel(spec.output, spec.sheet, result.results)
+        else:
+            scheduler.save_solved_inputs(spec.output)
+
+        ends = scheduler.table.cp_estimated_end_time
+        if len(ends) and not np.isnat(ends).all():
+            finish = ends[~np.isnat(ends)].max()
+            outcome.finish = finish.item().isoformat()
+            if spec.end_date:
+                outcome.late = bool(finish.astype('datetime64[D]') > to_day(spec.end_date))
+    except Exception as e:  # 1プロジェクトの失敗で一括実行全体を止めない
+        outcome.status = 'ERROR'
+        outcome.error = f"{type(e).__name__}: {e}"
+    finally:
+        if scheduler is not None:
+            for record in scheduler.profiler.stages:
+                outcome.timings[record['stage']] = outcome.timings.get(record['stage'], 0.0) + record['wall_time']
+    return outcome
+
+
+class BatchRunner:
+    """
+    複数プロジェクトの一括スケジューリング。
+
+    プロジェクトごとにプロセスプールで並列に解きます。稼働カレンダーは親プロセスで一度だけ構築して
+    ファイルに保存し、ワーカーはそれをメモリマップで共有します。WBSの解析結果もファイル内容の
+    ハッシュをキーとしたディスクキャッシュをプロセス間で共有します。
+
+    Args:
+        max_processes (int, optional): 同時に実行するプロジェクト数（None の場合は CPU コア数）
+    """
+
+    def __init__(self, max_processes: Optional[int] = BATCH_MAX_PROCESSES):
+        self.max_processes = max_processes or os.cpu_count() or 1
+
+    def run(self, specs: List[ProjectSpec],
+            on_outcome: Optional[Callable[[ProjectOutcome], None]] = None) -> List[ProjectOutcome]:
+        """全プロジェクトを実行し、specs と同じ順の結果を返す"""
+        if not specs:
+            return []
+        outcomes: Dict[int, ProjectOutcome] = {}
+
+        # 日付を解釈できないプロジェクトは実行せず ERROR とする（他のプロジェクトは続行）
+        for i, error in self._prepare_calendar(specs).items():
+            outcomes[i] = self._failed(specs[i], error)
+            if on_outcome is not None:
+                on_outcome(outcomes[i])
+        pending = [i for i in range(len(specs)) if i not in outcomes]
+        if not pending:
+            return [outcomes[i] for i in range(len(specs))]
+        processes = min(len(pending), self.max_processes)
+        search_workers = search_workers_per_process(processes)
+
+        crashed = []
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = {pool.submit(run_project, specs[i], search_workers): i for i in pending}
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    outcomes[i] = future.result()
+                except BrokenProcessPool:
+                    crashed.append(i)
+                    continue
+                except Exception as e:
+                    outcomes[i] = self._failed(specs[i], e)
+                if on_outcome is not None:
+                    on_outcome(outcomes[i])
+
+        # ワーカープロセスが異常終了するとプール全体が使えなくなるため、
+        # 巻き添えになったプロジェクトは1つずつ別のプロセスで実行し直す
+        for i in sorted(crashed):
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                try:
+                    outcomes[i] = pool.submit(run_project, specs[i], os.cpu_count() or 1).result()
+                except Exception as e:
+                    outcomes[i] = self._failed(specs[i], e)
+            if on_outcome is not None:
+                on_outcome(outcomes[i])
+        return [outcomes[i] for i in range(len(specs))]
+
+    @staticmethod
+    def _prepare_calendar(specs: List[ProjectSpec]) -> Dict[int, Exception]:
+        """
+        全プロジェクトの期間を含む稼働カレンダーのファイルを用意する
+
+        開始日・終了日を解釈できなかったプロジェクトは、インデックス → 例外 として返す。
+        """
+        from src.services.calendar_store import get_calendar_store, to_day
+
+        dates, errors = [], {}
+        for i, spec in enumerate(specs):
+            try:
+                dates.extend([to_day(d) for d in (spec.start_date, spec.end_date) if d])
+            except (ValueError, TypeError) as e:
+                errors[i] = ValueError(f"日付を解釈できません (start_date={spec.start_date!r}, end_date={spec.end_date!r}): {e}")
+        if dates:
+            get_calendar_store(min(dates), max(dates))
+        return errors
+
+    @staticmethod
+    def _failed(spec: ProjectSpec, error: BaseException) -> ProjectOutcome:
+        return ProjectOutcome(name=spec.name, input=spec.input, output=spec.output, status='ERROR',
+                              error=f"{type(error).__name__}: {error}")
+
+
+def write_summary(outcomes: List[ProjectOutcome], path: str):
+    """全プロジェクトの結果を1つの JSON にまとめて書き出す"""
+    summary = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'projects': len(outcomes),
+        'succeeded': sum(outcome.succeeded for outcome in outcomes),
+        'failed': [outcome.name for outcome in outcomes if not outcome.succeeded],
+        'late': [outcome.name for outcome in outcomes if outcome.late],
+        'results': [asdict(outcome) for outcome in outcomes],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+
+def _output_path(input_path: str, output_dir: Optional[str]) -> str:
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir or os.path.dirname(input_path), f'{stem}{BATCH_OUTPUT_SUFFIX}.xlsx')
@@ -1,51 +1,208 @@
-import pandas as pd
-import jpholiday
+from datetime import date, datetime
+from functools import lru_cache
 import numpy as np
+from src.services.calendar_store import (
+    COMPANY_CLOSURE, NATIONAL_HOLIDAY, WEEKEND, CalendarStore, get_calendar_store, to_day,
+)
+
+WEEKDAY_NAMES = ['月', '火', '水', '木', '金', '土', '日']
 
 class CalendarService:
     @staticmethod
-    def get_calendar_data(year, project_start_date, project_end_date):
+    def get_calendar_data(project_start_date, project_end_date):
         """
-        指定された年と期間に基づいてカレンダーデータを取得します。
+        指定された期間のカレンダーデータを取得します。年をまたぐ期間にも対応します。
         
         Args:
-            year (int): 年度
             project_start_date (datetime): プロジェクトの開始日
             project_end_date (datetime): プロジェクトの終了日
 
         Returns:
             pd.DataFrame: カレンダーデータ
         """
-        return get_japanese_calendar(year, project_start_date, project_end_date)
+        return get_japanese_calendar(project_start_date, project_end_date)
+
+    @staticmethod
+    def get_work_calendar(start_date, end_date, work_start_hour=9, work_hours_per_day=9,
+                          lunch_period_start=3, lunch_period_end=4):
+        """
+        稼働カレンダーを取得します。同じ引数での呼び出しはキャッシュを返します。
+
+        Args:
+            start_date (datetime | str): 稼働カレンダーの開始日
+            end_date (datetime | str): 稼働カレンダーの終了日
+            work_start_hour (int): 勤務開始時刻
+            work_hours_per_day (int): 1日の稼働時間
+            lunch_period_start (int): 昼休憩開始（勤務開始からの経過時間）
+            lunch_period_end (int): 昼休憩終了（勤務開始からの経過時間）
+
+        Returns:
+            WorkCalendar: 稼働カレンダー
+        """
+        return _build_work_calendar(
+            to_day(start_date).item(), to_day(end_date).item(),
+            work_start_hour, work_hours_per_day, lunch_period_start, lunch_period_end,
+        )
+
+
+class WorkCalendar:
+    """
+    稼働日と稼働時間のインデックス。
 
-def get_japanese_calendar(year, project_start_date, project_end_date):
+    稼働日（土日・祝日・休業日を除く日）をエポックからの日数として昇順に保持し、
+    ソルバーのオフセット（稼働時間）を日時へ O(1) で変換します。
+    昼休憩は稼働時間→時刻のオフセット表で二分探索により補正します。
+    """
+
+    def __init__(self, start_date: date, end_date: date, work_start_hour: int = 9,
+                 work_hours_per_day: int = 9, lunch_period_start: int = 3, lunch_period_end: int = 4,
+                 store: CalendarStore = None):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.work_start_hour = work_start_hour
+        self.work_hours_per_day = work_hours_per_day
+
+        # 稼働日のエポック日数（昇順）
+        store = store or get_calendar_store(start_date, end_date)
+        self.working_day_ordinals = store.working_day_ordinals(start_date, end_date)
+
+        # 稼働時間→時刻のオフセット表（昼休憩以降は休憩時間分を加算）
+        self.hour_breaks = np.array([lunch_period_start], dtype=np.float64)
+        self.hour_offsets = np.array([0, lunch_period_end - lunch_period_start], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.working_day_ordinals)
+
+    def is_working_day(self, day) -> bool:
+        """稼働日かどうかを判定"""
+        ordinal = int(to_day(day).astype(np.int64))
+        i = np.searchsorted(self.working_day_ordinals, ordinal)
+        return i < len(self.working_day_ordinals) and self.working_day_ordinals[i] == ordinal
+
+    def first_working_index(self, day) -> int:
+        """指定日以降で最初の稼働日のインデックスを返す"""
+        ordinal = int(to_day(day).astype(np.int64))
+        return int(np.searchsorted(self.working_day_ordinals, ordinal))
+
+    def offset_to_datetime(self, base_index: int, hours: float, is_end: bool = False) -> datetime:
+        """
+        稼働時間のオフセットを日時に変換します。
+
+        Args:
+            base_index (int): 起点となる稼働日のインデックス
+            hours (float): 起点からの稼働時間
+            is_end (bool): 終了時刻として扱う場合は True（日の区切りは前日の終業時刻とする）
+
+        Returns:
+            datetime: 変換後の日時
+        """
+        return self.offsets_to_datetime64(base_index, [hours], is_end)[0].item()
+
+    def offsets_to_datetime64(self, base_index: int, hours, is_end: bool = False) -> np.ndarray:
+        """
+        稼働時間のオフセット配列を一括で日時配列に変換します。
+
+        Args:
+            base_index (int): 起点となる稼働日のインデックス
+            hours (array-like): 起点からの稼働時間の配列
+            is_end (bool): 終了時刻として扱う場合は True（日の区切りは前日の終業時刻とする）
+
+        Returns:
+            np.ndarray: datetime64[s] の配列
+        """
+        hours = np.asarray(hours, dtype=np.float64)
+        days, remaining = np.divmod(hours, self.work_hours_per_day)
+
+        # 昼休憩を考慮した時間調整
+        remaining = remaining + self.hour_offsets[np.searchsorted(self.hour_breaks, remaining, side='right')]
+
+        # 終了時間の調整
+        if is_end:
+            rollover = (remaining == 0) & (days != 0)
+            days = np.where(rollover, days - 1, days)
+            remaining = np.where(rollover, self.work_hours_per_day, remaining)
+
+        index = base_index + days.astype(np.int64)
+        if index.size and index.max() >= len(self.working_day_ordinals):
+            raise ValueError(
+                f"稼働カレンダーの範囲外です: {self.start_date} - {self.end_date} (オフセット {hours.max()} 時間)"
+            )
+        day = self.working_day_ordinals[index].astype('datetime64[D]')
+        seconds = np.rint((remaining + self.work_start_hour) * 3600).astype('timedelta64[s]')
+        return day + seconds
+
+    def datetime64_to_offsets(self, base_index: int, datetimes) -> np.ndarray:
+        """
+        日時配列を稼働時間のオフセット配列に一括で逆変換します。
+
+        休日の日時は翌稼働日の始業時刻、昼休憩中の日時は休憩開始時刻とみなします。
+
+        Args:
+            base_index (int): 起点となる稼働日のインデックス
+            datetimes (array-like): datetime64 の配列（NaT を含んでもよい）
+
+        Returns:
+            np.ndarray: 起点からの稼働時間の配列（NaT は NaN）
+        """
+        values = np.asarray(datetimes, dtype='datetime64[s]')
+        is_valid = ~np.isnat(values)
+        day = np.where(is_valid, values, np.datetime64(0, 's')).astype('datetime64[D]')
+        clock = (np.where(is_valid, values, np.datetime64(0, 's')) - day) / np.timedelta64(1, 'h') - self.work_start_hour
+
+        ordinals = day.astype(np.int64)
+        index = np.searchsorted(self.working_day_ordinals, ordinals)
+        bounded = np.minimum(index, len(self.working_day_ordinals) - 1)
+        on_working_day = (index < len(self.working_day_ordinals)) & (self.working_day_ordinals[bounded] == ordinals)
+        clock = np.where(on_working_day, clock, 0.0)
+
+        # 時刻→稼働時間（昼休憩分を除去し、休憩中は休憩開始時刻に丸める）
+        clock_breaks = self.hour_breaks + self.hour_offsets[1:]
+        segment = np.searchsorted(clock_breaks, clock, side='right')
+        hours = clock - self.hour_offsets[segment]
+        limits = np.append(self.hour_breaks, np.inf)
+        hours = np.clip(np.minimum(hours, limits[segment]), 0, self.work_hours_per_day)
+
+        offsets = np.maximum((index - base_index) * self.work_hours_per_day + hours, 0)
+        return np.where(is_valid, offsets, np.nan)
+
+
+@lru_cache(maxsize=None)
+def _build_work_calendar(start_date, end_date, work_start_hour, work_hours_per_day,
+                         lunch_period_start, lunch_period_end):
+    return WorkCalendar(start_date, end_date, work_start_hour, work_hours_per_day,
+                        lunch_period_start, lunch_period_end)
+
+def get_japanese_calendar(project_start_date, project_end_date):
     """
     日本のカレンダー情報を生成する関数。
+
+    土日・祝日・休業日の判定は共有のカレンダー（CalendarStore）を参照します。
     
     Args:
-        year (int): 年度
         project_start_date (datetime): プロジェクトの開始日
         project_end_date (datetime): プロジェクトの終了日
     
     Returns:
         pd.DataFrame: カレンダーデータフレーム
     """
-    # 全日付を生成
-    dates = pd.date_range(start=f"{year}-01-01", end=f"{year}-12-31")
+    import jpholiday
+    import pandas as pd
+
+    start, end = to_day(project_start_date).item(), to_day(project_end_date).item()
+    flags = get_calendar_store(start, end).flags_between(start, end)
+    dates = pd.date_range(start=start, end=end)
     df = pd.DataFrame({'date': dates})
-    
+
     # 曜日情報を追加
-    df['weekday'] = df['date'].dt.weekday  # 0:月曜日, ..., 6:日曜日
-    df['weekday_name'] = df['date'].dt.day_name(locale='ja_JP')  # 日本語で曜日名
+    weekday = df['date'].dt.weekday.to_numpy()  # 0:月曜日, ..., 6:日曜日
+    df['weekday_name'] = np.array(WEEKDAY_NAMES)[weekday]
 
-    # 曜日名から「曜日」を削除
-    df['weekday_name'] = df['weekday_name'].str.replace("曜日", "")
-    
-    # 祝日情報を追加
-    df['holiday_name'] = df['date'].apply(lambda x: jpholiday.is_holiday_name(x))
-    
-    # 土曜日・日曜日の名前を祝日情報に追加
-    df['holiday_name'] = df['holiday_name'].where(~df['weekday_name'].isin(["土", "日"]), df['weekday_name'])
+    # 祝日名（祝日名は期間内のみ取得）、土曜日・日曜日は曜日名、休業日は「休業日」
+    holiday_names = dict(jpholiday.between(start, end))
+    names = [holiday_names.get(d) for d in dates.date]
+    names = np.where(flags & WEEKEND, df['weekday_name'], np.array(names, dtype=object))
+    names = np.where((flags & COMPANY_CLOSURE) & ~(flags & (WEEKEND | NATIONAL_HOLIDAY)), '休業日', names)
+    df['holiday_name'] = names
 
     # 祝日フラグを追加
     df['holiday'] = np.where(df['holiday_name'].notna(), '祝', '')
@@ -53,17 +210,4 @@ def get_japanese_calendar(year, project_start_date, project_end_date):
     # 日付ごとの情報を整理
     df["day"] = df["date"].dt.day
     columns = ["date", "day", "weekday_name", "holiday_name", "holiday"]
-    df = df[columns]
-
-    # 指定された期間でフィルタリング
-    df = df.loc[
-        (df['date'] >= project_start_date) & (df['date'] <= project_end_date)
-    ].copy()
-
-    return df
-
-
-project_start_date = '2025-01-11'
-project_end_date = '2025-01-31'
-calendar_df = CalendarService.get_calendar_data(2025, project_start_date, project_end_date)
-
+    return df[columns]
@@ -0,0 +1,158 @@
+import hashlib
+import os
+from functools import lru_cache
+from importlib import metadata
+from typing import Iterable, Optional, Tuple
+import numpy as np
+from src.utils.file_io import atomic_write
+from src.config.settings import *
+
+STORE_FORMAT_VERSION = 1
+
+# 日ごとのフラグ（1日1バイト）
+WORKING_DAY = 1       # 稼働日
+WEEKEND = 2           # 土曜日・日曜日
+NATIONAL_HOLIDAY = 4  # 祝日
+COMPANY_CLOSURE = 8   # 会社独自の休業日
+
+
+class CalendarStore:
+    """
+    複数年分の稼働日ビットマップ。
+
+    first_year の1月1日から last_year の12月31日までの各日について、稼働日・土日・祝日・休業日のフラグを
+    1バイトで保持します。構築結果は .npy ファイルとして保存し、2回目以降（別プロセスを含む）は
+    メモリマップで開くため、祝日判定を再計算せず、ワーカープロセス間で同じページを共有します。
+
+    Args:
+        first_year (int): 最初の年
+        last_year (int): 最後の年
+        closure_days (Iterable): 会社独自の休業日。日付、または (開始日, 終了日) の組
+        directory (str, optional): 保存先ディレクトリ（None の場合は保存しない）
+    """
+
+    def __init__(self, first_year: int, last_year: int, closure_days: Iterable = (),
+                 directory: Optional[str] = CALENDAR_STORE_DIR):
+        if first_year > last_year:
+            raise ValueError(f"年の範囲が不正です: {first_year} - {last_year}")
+        self.first_year = first_year
+        self.last_year = last_year
+        self.first_day = np.datetime64(f'{first_year}-01-01', 'D')
+        self.last_day = np.datetime64(f'{last_year}-12-31', 'D')
+        self.closure_days = _expand_closure_days(closure_days)
+        self.path = os.path.join(directory, f'calendar-{self._key()}.npy') if directory else None
+        self.flags = self._load_or_compile()
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def compile(self) -> np.ndarray:
+        """全期間のフラグを計算する"""
+        import jpholiday  # 保存済みのファイルを使う場合は読み込まない
+
+        days = np.arange(self.first_day, self.last_day + 1)
+        weekday = (days.astype(np.int64) + 3) % 7  # 1970-01-01 は木曜日 (0:月曜日, ..., 6:日曜日)
+        start, end = self.first_day.item(), self.last_day.item()
+        holidays = np.array([d for d, _ in jpholiday.between(start, end)], dtype='datetime64[D]')
+
+        flags = np.zeros(len(days), dtype=np.uint8)
+        flags[weekday >= 5] |= WEEKEND
+        flags[np.isin(days, holidays)] |= NATIONAL_HOLIDAY
+        flags[np.isin(days, self.closure_days)] |= COMPANY_CLOSURE
+        flags[flags == 0] = WORKING_DAY
+        return flags
+
+    def covers(self, start_date, end_date) -> bool:
+        return self.first_day <= to_day(start_date) and to_day(end_date) <= self.last_day
+
+    def flags_between(self, start_date, end_date) -> np.ndarray:
+        """開始日から終了日まで（両端を含む）のフラグ"""
+        start, end = to_day(start_date), to_day(end_date)
+        if not self.covers(start, end):
+            raise ValueError(
+                f"稼働カレンダーの範囲外です: {start} - {end} ({self.first_day} - {self.last_day} を保持)"
+            )
+        offset = int((start - self.first_day).astype(np.int64))
+        return self.flags[offset:offset + int((end - start).astype(np.int64)) + 1]
+
+    def working_day_ordinals(self, start_date, end_date) -> np.ndarray:
+        """期間内の稼働日をエポックからの日数（昇順）で返す"""
+        flags = self.flags_between(start_date, end_date)
+        first = to_day(start_date).astype(np.int64)
+        return first + np.flatnonzero(flags & WORKING_DAY).astype(np.int64)
+
+    def is_working_day(self, day) -> bool:
+        return bool(self.flags_between(day, day)[0] & WORKING_DAY)
+
+    def _key(self) -> str:
+        """年の範囲・休業日・祝日データのバージョンが変わればファイル名も変わる"""
+        try:
+            holiday_version = metadata.version('jpholiday')
+        except metadata.PackageNotFoundError:
+            holiday_version = ''
+        closures = ','.join(str(day) for day in self.closure_days)
+        digest = hashlib.sha256(f'{holiday_version}|{closures}'.encode('utf-8')).hexdigest()[:16]
+        return f'v{STORE_FORMAT_VERSION}-{self.first_year}-{self.last_year}-{digest}'
+
+    def _load_or_compile(self) -> np.ndarray:
+        if self.path:
+            try:
+                flags = np.load(self.path, mmap_mode='r')
+                if len(flags) == int((self.last_day - self.first_day).astype(np.int64)) + 1:
+                    return flags
+            except (OSError, ValueError):
+                pass
+
+        flags = self.compile()
+        if self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with atomic_write(self.path) as f:
+                    np.save(f, flags)
+            except OSError:
+                pass  # 保存できなくても計算結果はそのまま使う
+        return flags
+
+
+@lru_cache(maxsize=None)
+def _get_store(first_year: int, last_year: int, closure_days: Tuple, directory: Optional[str]) -> CalendarStore:
+    return CalendarStore(first_year, last_year, closure_days, directory)
+
+
+def get_calendar_store(start_date=None, end_date=None) -> CalendarStore:
+    """
+    設定の年範囲（CALENDAR_FIRST_YEAR〜CALENDAR_LAST_YEAR）と休業日による共有のカレンダーを返します。
+
+    指定した期間が設定の範囲を超える場合は、その期間を含むように範囲を広げます。
+    """
+    first_year, last_year = CALENDAR_FIRST_YEAR, CALENDAR_LAST_YEAR
+    if start_date is not None:
+        first_year = min(first_year, to_day(start_date).item().year)
+    if end_date is not None:
+        last_year = max(last_year, to_day(end_date).item().year)
+    closure_days = tuple(tuple(day) if isinstance(day, (list, tuple)) else day for day in COMPANY_CLOSURE_DAYS)
+    return _get_store(first_year, last_year, closure_days, CALENDAR_STORE_DIR)
+
+
+def _expand_closure_days(closure_days: Iterable) -> np.ndarray:
+    """日付と (開始日, 終了日) の組の並びを、重複のない日付の配列にする"""
+    days = []
+    for entry in closure_days:
+        if isinstance(entry, (list, tuple)):
+            start, end = entry
+            days.append(np.arange(to_day(start), to_day(end) + 1))
+        else:
+            days.append(np.array([to_day(entry)]))
+    return np.unique(np.concatenate(days)) if days else np.array([], dtype='datetime64[D]')
+
+
+def to_day(value) -> np.datetime64:
+    """日付（date・datetime・datetime64・'2025-01-01' や '2025/01/01' などの文字列）を datetime64[D] に変換"""
+    if isinstance(value, np.datetime64):
+        return value.astype('datetime64[D]')
+    try:
+        return np.datetime64(value, 'D')
+    except ValueError:  # ISO 形式以外の文字列（'2025/01/01' など）
+        import pandas as pd
+
+        return np.datetime64(pd.Timestamp(value).date(), 'D')
@@ -0,0 +1,214 @@
+import heapq
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.models import *
+from src.services.list_scheduler import exceeds_capacity, list_schedule, longest_paths
+from src.services.precedence_graph import PrecedenceGraph
+from src.services.task_scheduler import TaskScheduler
+from src.utils.parallel import search_workers_per_process
+from src.config.settings import *
+
+
+def _solve_partition(table: TaskTable, num_workers: int, workday_hours: int, start_date,
+                     options: SolverOptions) -> Tuple[SolveResult, np.ndarray, np.ndarray]:
+    """ワーカープロセスで部分問題を解く"""
+    scheduler = TaskScheduler(num_workers=num_workers, workday_hours=workday_hours, start_date=start_date)
+    scheduler.tasks = table
+    return scheduler.solve_offsets(options)
+
+
+def repair_schedule(graph: PrecedenceGraph, starts: np.ndarray, durations: np.ndarray,
+                    num_workers: int, pinned: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    部分スケジュールを統合した結果を、全体の作業者数のもとで詰め直します。
+
+    元の開始時間の早い順を優先度としてリストスケジューリングし直すため、先行関係と作業者数の制約を満たし、
+    部分問題に配分した作業者の空き時間を他の部分問題のタスクで埋めます。
+    実績で固定されたタスクは元の時間のまま配置します。
+
+    Args:
+        graph (PrecedenceGraph): 先行関係グラフ
+        starts (np.ndarray): 部分スケジュールでの開始時間
+        durations (np.ndarray): 所要時間
+        num_workers (int): 全体の作業者数
+        pinned (np.ndarray): 時間を固定するタスクのマスク
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 修復後の (開始時間, 終了時間)
+    """
+    n = len(starts)
+    rank = np.empty(n, dtype=np.int64)
+    rank[graph.order] = np.arange(n)
+    priority = np.empty(n, dtype=np.int64)
+    priority[np.lexsort((rank, starts))] = np.arange(n)
+    return list_schedule(graph, durations, num_workers, priority, np.where(pinned, starts, np.nan))
+
+
+def allocate_workers(work: np.ndarray, critical_paths: np.ndarray, num_workers: int) -> np.ndarray:
+    """
+    作業者を部分問題に配分します（各1人以上、合計は num_workers）。
+
+    max(クリティカルパス長, 工数合計/作業者数) が最も大きい部分問題に1人ずつ追加します。
+    作業者を増やしても短くならない（クリティカルパス長で決まる）部分問題は後回しにします。
+
+    Args:
+        work (np.ndarray): 部分問題ごとの工数合計
+        critical_paths (np.ndarray): 部分問題ごとのクリティカルパス長
+        num_workers (int): 全体の作業者数（部分問題の数以上）
+
+    Returns:
+        np.ndarray: 部分問題ごとの作業者数
+    """
+    workers = np.ones(len(work), dtype=np.int64)
+    for _ in range(num_workers - len(work)):
+        load = work / workers
+        improvable = load > critical_paths
+        workers[int(np.argmax(np.where(improvable, load, -np.inf) if improvable.any() else load))] += 1
+    return workers
+
+
+class DecompositionSolver:
+    """
+    大規模WBS向けの分割求解。
+
+    先行関係グラフを弱連結成分に分割し、全体の作業者を部分問題に配分して、プロセスプールで並列に解きます。
+    部分問題どうしは先行関係を持たず、作業者数の合計が全体の作業者数と等しいため、
+    各部分問題のスケジュールをそのまま統合したものが全体の実行可能解になります。
+    その開始順で全体の作業者数のもとで詰め直した解と比べ、短い方を返します。
+    """
+
+    def __init__(self, scheduler: TaskScheduler, max_processes: Optional[int] = DECOMPOSITION_MAX_PROCESSES,
+                 min_tasks: int = DECOMPOSITION_MIN_TASKS, target_size: int = DECOMPOSITION_TARGET_SIZE):
+        self.scheduler = scheduler
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self.min_tasks = min_tasks
+        self.target_size = target_size
+
+    def cache_settings(self) -> Dict:
+        """求解の経路と部分問題への分け方を決める設定（結果キャッシュの鍵に含める）"""
+        return {
+            'solver': 'decomposition',
+            'min_tasks': self.min_tasks,
+            'target_size': self.target_size,
+            'max_processes': self.max_processes,
+            # プロセスあたりの探索ワーカー数は CPU コア数で決まる
+            'cpu_count': os.cpu_count(),
+        }
+
+    def partition(self, graph: PrecedenceGraph) -> List[np.ndarray]:
+        """
+        弱連結成分を部分問題にまとめる
+
+        部分問題の数は作業者数以下とし、小さな成分は工数の大きい順に、工数合計が最も小さい部分問題へ詰める。
+        """
+        labels = graph.weakly_connected_components()
+        durations = self.scheduler.table.durations
+        num_components = int(labels.max()) + 1 if len(labels) else 0
+        work = np.bincount(labels, weights=durations, minlength=num_components)
+
+        num_partitions = min(num_components, self.scheduler.num_workers,
+                             max(self.max_processes, -(-len(labels) // self.target_size)))
+        if num_partitions <= 1:
+            return [np.arange(len(labels))]
+
+        loads = [(0.0, k) for k in range(num_partitions)]
+        assignment = np.empty(num_components, dtype=np.int64)
+        for component in np.argsort(-work, kind='stable').tolist():
+            load, k = heapq.heappop(loads)
+            assignment[component] = k
+            heapq.heappush(loads, (load + work[component], k))
+        partition_of_task = assignment[labels]
+        return [idx for idx in (np.flatnonzero(partition_of_task == k) for k in range(num_partitions)) if len(idx)]
+
+    def solve(self, options: Optional[SolverOptions] = None) -> SolveResult:
+        options = options or SolverOptions()
+        scheduler = self.scheduler
+        table = scheduler.table
+        if len(table) < self.min_tasks or options.engine == 'list':
+            return scheduler.solve(options)
+
+        graph = PrecedenceGraph.from_table(table)
+        partitions = self.partition(graph)
+        if len(partitions) <= 1:
+            # 分割できない場合は構築済みのグラフでそのまま全体を解く
+            pinned_starts, sizes = scheduler._actual_pins()
+            return scheduler._solve_model(graph, (pinned_starts, sizes, None), options, None)
+
+        began = time.perf_counter()
+        # 稼働カレンダーのファイルを先に用意し、ワーカープロセスはそれをメモリマップで共有する
+        scheduler.date_converter.calendar
+        pinned_starts, sizes = scheduler._actual_pins()
+        durations = np.where(np.isnan(sizes), table.durations, sizes)
+        head, tail = longest_paths(graph, durations, pinned_starts)
+
+        # 部分問題ごとの作業者数（工数合計とクリティカルパス長に応じて配分）
+        workers = allocate_workers(np.array([durations[idx].sum() for idx in partitions]),
+                                   np.array([(head + durations)[idx].max() for idx in partitions]),
+                                   scheduler.num_workers)
+        processes = min(len(partitions), self.max_processes)
+        sub_options = replace(options, num_search_workers=search_workers_per_process(processes))
+
+        n = len(table)
+        starts = np.zeros(n)
+        ends = np.zeros(n)
+        with scheduler.profiler.stage('solve', partitions=len(partitions), processes=processes,
+                                      workers=workers.tolist()) as record:
+            pool = ProcessPoolExecutor(max_workers=processes)
+            try:
+                futures = {
+                    pool.submit(_solve_partition, table.take(idx), num_workers, scheduler.workday_hours,
+                                scheduler.start_date, sub_options): idx
+                    for idx, num_workers in zip(partitions, workers.tolist())
+                }
+                for future in as_completed(futures):
+                    result, sub_starts, sub_ends = future.result()
+                    if not result.has_solution:
+                        record['status'] = result.status
+                        return SolveResult(status=result.status, wall_time=time.perf_counter() - began)
+                    idx = futures[future]
+                    starts[idx] = sub_starts
+                    ends[idx] = sub_ends
+            finally:
+                # 解けない部分問題があった場合は、残りの部分問題の完了を待たない
+                pool.shutdown(wait=False, cancel_futures=True)
+
+            # 配分した作業者数の合計は全体と等しいため、統合したスケジュールは通常そのまま実行可能。
+            # 部分問題の開始順を優先度として全体の作業者数で詰め直し、短くなればそちらを採用する
+            # （実績が配分を超えて重なっている場合は詰め直したものを使う）
+            actual = scheduler._actual_mask()
+            packed_starts, packed_ends = repair_schedule(graph, starts, durations, scheduler.num_workers, actual)
+            record.update(merged_objective=float(ends.max()), packed_objective=float(packed_ends.max()))
+            if exceeds_capacity(starts, ends, scheduler.num_workers, actual) or packed_ends.max() < ends.max():
+                starts, ends = packed_starts, packed_ends
+
+            # 全体に対するリストスケジューリングの方が短ければそちらを採用
+            engine = 'decomposition'
+            heuristic_objective = None
+            if options.seed_with_list:
+                heuristic, heuristic_starts, heuristic_ends = scheduler._run_list_scheduler(
+                    graph, pinned_starts, sizes, options.priority_rule, paths=(head, tail))
+                heuristic_objective = heuristic.heuristic_objective
+                if heuristic.has_solution and heuristic.objective < ends.max():
+                    starts, ends = heuristic_starts, heuristic_ends
+                    engine = 'list'
+
+            # 部分問題の下界は配分した作業者数でのものなので、全体の下界は全体の最長経路と総工数から求める
+            objective = float(ends.max())
+            best_bound = scheduler.makespan_bound(head, durations, pinned_starts)
+            result = SolveResult(
+                status='OPTIMAL' if objective <= best_bound + 1e-9 else 'FEASIBLE',
+                objective=objective,
+                best_bound=best_bound,
+                gap=(objective - best_bound) / max(objective, 1e-9),
+                wall_time=time.perf_counter() - began,
+                engine=engine,
+                heuristic_objective=heuristic_objective,
+            )
+            record.update(status=result.status, engine=engine, objective=objective, best_bound=best_bound,
+                          gap=result.gap)
+        result.results = scheduler.apply_schedule(starts, ends)
+        return result
@@ -0,0 +1,238 @@
+import bisect
+import heapq
+from typing import Optional, Sequence, Tuple
+import numpy as np
+from src.services.precedence_graph import PrecedenceGraph
+
+# 優先度ルール（'critical_path': 残りの最長経路が長い順 / 'slack': 余裕時間が小さい順）
+PRIORITY_RULES = ('critical_path', 'slack')
+
+
+def longest_paths(graph: PrecedenceGraph, durations: Sequence[float],
+                  fixed_starts: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    作業者数を考慮しない最長経路を求めます。
+
+    Args:
+        graph (PrecedenceGraph): 先行関係グラフ
+        durations (Sequence[float]): 所要時間
+        fixed_starts (np.ndarray, optional): 開始を固定するタスクの開始時間（固定しない場合は NaN）。
+            固定されたタスクへの先行関係は制約として扱わない
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (最早開始, 自身を含む終端までの最長経路長)
+    """
+    durations = np.asarray(durations, dtype=np.float64)
+    n = len(durations)
+    if fixed_starts is None:
+        fixed_starts = np.full(n, np.nan)
+    is_fixed = (~np.isnan(fixed_starts)).tolist()
+    head = np.where(is_fixed, fixed_starts, 0.0).tolist()
+    durations = durations.tolist()
+    tail = durations[:]
+    indptr, indices = graph.successor_indptr.tolist(), graph.successor_indices.tolist()
+
+    # 1タスクあたりの処理が小さいため、NumPy の配列操作ではなくリストで計算する
+    for i in graph.order:
+        finish = head[i] + durations[i]
+        for j in indices[indptr[i]:indptr[i + 1]]:
+            if not is_fixed[j] and finish > head[j]:
+                head[j] = finish
+    for i in reversed(graph.order):
+        longest = 0.0
+        for j in indices[indptr[i]:indptr[i + 1]]:
+            if not is_fixed[j] and tail[j] > longest:
+                longest = tail[j]
+        tail[i] = durations[i] + longest
+    return np.array(head), np.array(tail)
+
+
+def priorities(head: np.ndarray, tail: np.ndarray, rule: str = 'critical_path') -> np.ndarray:
+    """
+    longest_paths の結果から、優先度ルールに従った各タスクの優先順位（小さいほど先に割り当てる）を返します。
+
+    'critical_path' は残りの最長経路が長いタスク、'slack' は余裕時間（最遅開始 - 最早開始）が
+    小さいタスクを優先し、同順位はもう一方の値で比較します。
+    """
+    if rule not in PRIORITY_RULES:
+        raise ValueError(f"不明な優先度ルールです: {rule} ({', '.join(PRIORITY_RULES)} のいずれか)")
+    critical_path = float((head + tail).max()) if len(head) else 0.0
+    slack = critical_path - tail - head
+    keys = (slack, -tail) if rule == 'critical_path' else (-tail, slack)
+    rank = np.empty(len(head), dtype=np.int64)
+    rank[np.lexsort(keys)] = np.arange(len(head))
+    return rank
+
+
+class UsageProfile:
+    """
+    固定区間の同時実行数の階段関数。
+
+    区間の端点で区切った各区間の同時実行数を保持し、任意の時間範囲での最大値を
+    スパーステーブルにより O(1) で返します（構築は O(区間数 log 区間数)）。
+    長さ 0 の区間は作業者を占有しないものとして除きます。
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        starts, ends = np.asarray(starts), np.asarray(ends)
+        keep = ends > starts
+        starts, ends = np.sort(starts[keep]), np.sort(ends[keep])
+        self.breakpoints = np.unique(np.concatenate([starts, ends]))
+        # usage[k] は [breakpoints[k], breakpoints[k + 1]) の同時実行数（最後の区間以降は 0）
+        self.usage = (np.searchsorted(starts, self.breakpoints, side='right')
+                      - np.searchsorted(ends, self.breakpoints, side='right'))
+        self._breakpoints = self.breakpoints.tolist()
+        self._levels = [self.usage.tolist()]
+        width = 1
+        while 2 * width <= len(self.usage):
+            previous = np.asarray(self._levels[-1])
+            self._levels.append(np.maximum(previous[:-width], previous[width:]).tolist())
+            width *= 2
+
+    def at(self, time: float) -> int:
+        """時刻 time の同時実行数"""
+        k = bisect.bisect_right(self._breakpoints, time) - 1
+        return self._levels[0][k] if k >= 0 else 0
+
+    def peak(self, begin: float, end: float) -> int:
+        """[begin, end) の同時実行数の最大値（end <= begin の場合は時刻 begin の値）"""
+        lo = bisect.bisect_right(self._breakpoints, begin) - 1
+        hi = bisect.bisect_left(self._breakpoints, end) - 1 if end > begin else lo
+        if hi < 0:
+            return 0
+        lo = max(lo, 0)
+        level = (hi - lo + 1).bit_length() - 1
+        values = self._levels[level]
+        return max(values[lo], values[hi - (1 << level) + 1])
+
+    def next_change(self, time: float) -> Optional[float]:
+        """time より後で同時実行数が変わる最初の時刻（ない場合は None）"""
+        k = bisect.bisect_right(self._breakpoints, time)
+        return self._breakpoints[k] if k < len(self._breakpoints) else None
+
+    def segments(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """同時実行数が 1 以上の区間の (開始, 長さ, 同時実行数)"""
+        busy = np.flatnonzero(self.usage[:-1] > 0)
+        return self.breakpoints[busy], self.breakpoints[busy + 1] - self.breakpoints[busy], self.usage[busy]
+
+
+def exceeds_capacity(starts: np.ndarray, ends: np.ndarray, num_workers: int,
+                     tolerated: Optional[np.ndarray] = None) -> bool:
+    """
+    同時実行数が作業者数を超える時刻があるかどうか
+
+    tolerated のタスク（実績など）は互いに作業者数を超えて重なってもよく、
+    その時間帯は作業者数までを占有するものとして扱う。
+    """
+    starts, ends = np.asarray(starts, dtype=np.float64), np.asarray(ends, dtype=np.float64)
+    if tolerated is None:
+        tolerated = np.zeros(len(starts), dtype=bool)
+    planned = UsageProfile(starts[~tolerated], ends[~tolerated])
+    actual = UsageProfile(starts[tolerated], ends[tolerated])
+    times = np.union1d(planned.breakpoints, actual.breakpoints)
+    if not len(times):
+        return False
+
+    def usage_at(profile: UsageProfile) -> np.ndarray:
+        if not len(profile.usage):
+            return np.zeros(len(times), dtype=np.int64)
+        k = np.searchsorted(profile.breakpoints, times, side='right') - 1
+        return np.where(k >= 0, profile.usage[np.maximum(k, 0)], 0)
+
+    return bool((usage_at(planned) + np.minimum(usage_at(actual), num_workers) > num_workers).any())
+
+
+def list_schedule(graph: PrecedenceGraph, durations: Sequence[float], num_workers: int,
+                  priority: Sequence[float], fixed_starts: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    優先度付きリストスケジューリング（並列スケジュール生成法）。
+
+    時刻を進めながら、先行タスクが全て終わったタスクのうち優先度の高いものから空いている作業者に割り当てます。
+    先行関係と作業者数を守り、計算量は O((タスク数 + 先行関係数) log タスク数) です。
+    開始を固定したタスクは作業者数に関わらずその時間に配置し、その間は作業者を1人ずつ占有します。
+    固定されていないタスクは、終了までの間に固定されたタスクと合わせて作業者数を超えない場合のみ開始し、
+    超える場合は優先度の低いタスクを先に割り当てて、空きができる時刻まで待ちます。
+
+    Args:
+        graph (PrecedenceGraph): 先行関係グラフ
+        durations (Sequence[float]): 所要時間
+        num_workers (int): 作業者数
+        priority (Sequence[float]): 優先順位（小さいほど先に割り当てる）
+        fixed_starts (np.ndarray, optional): 開始を固定するタスクの開始時間（固定しない場合は NaN）。
+            固定されたタスクへの先行関係は制約として扱わない
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (開始時間, 終了時間)
+    """
+    durations = np.asarray(durations, dtype=np.float64)
+    n = len(durations)
+    if fixed_starts is None:
+        fixed_starts = np.full(n, np.nan)
+    is_fixed = ~np.isnan(fixed_starts)
+    starts = np.where(is_fixed, fixed_starts, 0.0)
+    ends = starts + durations
+    fixed_usage = UsageProfile(starts[is_fixed], ends[is_fixed])
+
+    # 固定されたタスクの終了は最初から分かっているため、後続の開始可能時間に反映しておく
+    sources, targets = graph.sources, graph.targets
+    free_edges = ~is_fixed[targets]
+    ready_time = np.zeros(n)
+    from_fixed = free_edges & is_fixed[sources]
+    np.maximum.at(ready_time, targets[from_fixed], ends[sources[from_fixed]])
+    remaining = np.bincount(targets[free_edges & ~is_fixed[sources]], minlength=n).tolist()
+
+    durations_list = durations.tolist()
+    priority_list = np.asarray(priority).tolist()
+    ready_list = ready_time.tolist()
+    is_fixed_list = is_fixed.tolist()
+    starts_list, ends_list = starts.tolist(), ends.tolist()
+    indptr, indices = graph.successor_indptr.tolist(), graph.successor_indices.tolist()
+
+    pending = [(ready_list[i], i) for i in range(n) if not is_fixed_list[i] and remaining[i] == 0]
+    heapq.heapify(pending)
+    released = []
+    running = []  # 実行中の固定されていないタスクの終了時間
+    unscheduled = n - int(is_fixed.sum())
+    now = 0.0
+
+    while unscheduled:
+        while running and running[0] <= now:
+            heapq.heappop(running)
+        while pending and pending[0][0] <= now:
+            i = heapq.heappop(pending)[1]
+            heapq.heappush(released, (priority_list[i], i))
+
+        deferred = []
+        while released and len(running) + fixed_usage.at(now) < num_workers:
+            entry = heapq.heappop(released)
+            i = entry[1]
+            end = now + durations_list[i]
+            if len(running) + 1 + fixed_usage.peak(now, end) > num_workers:
+                deferred.append(entry)  # 終了までに固定されたタスクと重なって作業者が足りなくなる
+                continue
+            starts_list[i], ends_list[i] = now, end
+            heapq.heappush(running, end)
+            unscheduled -= 1
+            for j in indices[indptr[i]:indptr[i + 1]]:
+                if is_fixed_list[j]:
+                    continue
+                ready_list[j] = max(ready_list[j], end)
+                remaining[j] -= 1
+                if remaining[j] == 0:
+                    heapq.heappush(pending, (ready_list[j], j))
+        for entry in deferred:
+            heapq.heappush(released, entry)
+
+        events = []
+        if running:
+            events.append(running[0])
+        if pending:
+            events.append(pending[0][0])
+        change = fixed_usage.next_change(now)
+        if change is not None:
+            events.append(change)
+        if not events:
+            break
+        now = max(now, min(events))
+
+    return np.array(starts_list), np.array(ends_list)
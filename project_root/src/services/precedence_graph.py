@@ -0,0 +1,227 @@
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+from src.models import Task, TaskTable
+
+
+class PrecedenceGraphError(ValueError):
+    """先行関係の不整合（循環・存在しない先行タスク・タスク番号の重複）"""
+
+
+class PrecedenceGraph:
+    """
+    タスクの先行関係グラフ。
+
+    タスク番号→インデックスの対応（ソート済み配列の二分探索）と、CSR形式の後続・先行隣接リストを保持します。
+    構築時に循環参照・存在しない先行タスク番号・タスク番号の重複を検出します。
+    """
+
+    def __init__(self, task_ids: Sequence[int], predecessor_indptr: np.ndarray, predecessor_ids: np.ndarray):
+        self.task_ids = np.asarray(task_ids, dtype=np.int64)
+        predecessor_indptr = np.asarray(predecessor_indptr, dtype=np.int64)
+        predecessor_ids = np.asarray(predecessor_ids, dtype=np.int64)
+        n = len(self.task_ids)
+        errors = []
+
+        self._id_order = np.argsort(self.task_ids, kind='stable')
+        self._sorted_ids = self.task_ids[self._id_order]
+        duplicates = np.unique(self._sorted_ids[1:][self._sorted_ids[1:] == self._sorted_ids[:-1]])
+        if len(duplicates):
+            errors.append(f"タスク番号が重複しています: {duplicates.tolist()}")
+
+        # 辺の収集（先行 → 後続）
+        targets = np.repeat(np.arange(n, dtype=np.int64), np.diff(predecessor_indptr))
+        sources = self.indices_of(predecessor_ids)
+        dangling = sources < 0
+        if dangling.any():
+            details = ", ".join(
+                f"タスク{task_id}→先行{missing}"
+                for task_id, missing in zip(self.task_ids[targets[dangling]].tolist(), predecessor_ids[dangling].tolist())
+            )
+            errors.append(f"存在しない先行タスク番号が指定されています: {details}")
+
+        self.sources = sources[~dangling]
+        self.targets = targets[~dangling]
+        self.successor_indptr, self.successor_indices = _to_csr(self.sources, self.targets, n)
+        self.predecessor_indptr, self.predecessor_indices = _to_csr(self.targets, self.sources, n)
+
+        self._level_edges = None
+        if not errors:
+            self.order = self._topological_order()
+            if len(self.order) < n:
+                errors.append(f"先行関係が循環しています: {self._find_cycle()}")
+        if errors:
+            raise PrecedenceGraphError("\n".join(errors))
+
+    @classmethod
+    def from_tasks(cls, tasks: Sequence[Task]) -> "PrecedenceGraph":
+        counts = [len(task.predecessors) for task in tasks]
+        indptr = np.zeros(len(tasks) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls([task.id for task in tasks], indptr, [p for task in tasks for p in task.predecessors])
+
+    @classmethod
+    def from_table(cls, table: TaskTable) -> "PrecedenceGraph":
+        return cls(table.ids, table.predecessor_indptr, table.predecessor_ids)
+
+    def indices_of(self, task_ids) -> np.ndarray:
+        """タスク番号をインデックスに変換（存在しない番号は -1）"""
+        task_ids = np.asarray(task_ids, dtype=np.int64)
+        if not len(self._sorted_ids):
+            return np.full(len(task_ids), -1, dtype=np.int64)
+        position = np.minimum(np.searchsorted(self._sorted_ids, task_ids), len(self._sorted_ids) - 1)
+        found = self._sorted_ids[position] == task_ids
+        return np.where(found, self._id_order[position], -1)
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+    def edges(self) -> List[Tuple[int, int]]:
+        """(先行タスクのインデックス, 後続タスクのインデックス) の一覧"""
+        return list(zip(self.sources.tolist(), self.targets.tolist()))
+
+    def successors(self, i: int) -> np.ndarray:
+        return self.successor_indices[self.successor_indptr[i]:self.successor_indptr[i + 1]]
+
+    def predecessors(self, i: int) -> np.ndarray:
+        return self.predecessor_indices[self.predecessor_indptr[i]:self.predecessor_indptr[i + 1]]
+
+    def descendants(self, mask: np.ndarray) -> np.ndarray:
+        """指定されたタスクとその後続（推移的）を表すマスクを返す"""
+        reached = np.asarray(mask, dtype=bool).copy()
+        indptr, indices = self.successor_indptr, self.successor_indices
+        for i in self.order:
+            if reached[i]:
+                reached[indices[indptr[i]:indptr[i + 1]]] = True
+        return reached
+
+    def weakly_connected_components(self) -> np.ndarray:
+        """弱連結成分のラベル（0 始まり、タスクのインデックス順）を返す"""
+        parent = list(range(len(self.task_ids)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in zip(self.sources.tolist(), self.targets.tolist()):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                parent[root_j] = root_i
+        roots = np.array([find(i) for i in range(len(parent))], dtype=np.int64)
+        return np.unique(roots, return_inverse=True)[1]
+
+    @property
+    def level_edges(self) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        トポロジカル順の段ごとの辺 (先行タスクのインデックス, 後続タスクのインデックス)
+
+        k 段目は先行のないタスクから最長 k 本の辺でたどり着くタスクを先行とする辺で、
+        後続タスクの先行はすべてそれより前の段にある。初回の参照時に求めて保持する。
+        """
+        if self._level_edges is None:
+            indptr, indices = self.successor_indptr, self.successor_indices
+            indegree = np.diff(self.predecessor_indptr)
+            frontier = np.flatnonzero(indegree == 0)
+            self._level_edges = []
+            while len(frontier):
+                counts = indptr[frontier + 1] - indptr[frontier]
+                offsets = np.repeat(indptr[frontier] - np.cumsum(counts) + counts, counts)
+                targets = indices[offsets + np.arange(int(counts.sum()))]
+                self._level_edges.append((np.repeat(frontier, counts), targets))
+                np.subtract.at(indegree, targets, 1)
+                frontier = np.unique(targets[indegree[targets] == 0])
+        return self._level_edges
+
+    def earliest_starts(self, durations: Sequence[int], fixed_starts: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        各タスクの最早開始を、トポロジカル順の段ごとにまとめて求める
+
+        fixed_starts は開始を固定するタスクの開始時間（固定しない場合は -1）。
+        固定されたタスクへの先行関係は制約として扱わない。
+        """
+        durations = np.asarray(durations, dtype=np.int64)
+        if fixed_starts is None:
+            fixed_starts = np.full(len(durations), -1, dtype=np.int64)
+        is_fixed = fixed_starts >= 0
+        earliest_start = np.where(is_fixed, fixed_starts, 0).astype(np.int64)
+        for sources, targets in self.level_edges:
+            keep = ~is_fixed[targets]
+            np.maximum.at(earliest_start, targets[keep], (earliest_start + durations)[sources[keep]])
+        return earliest_start
+
+    def latest_finishes(self, durations: Sequence[int], horizon: int,
+                        fixed_starts: Optional[np.ndarray] = None) -> np.ndarray:
+        """各タスクの最遅終了を、トポロジカル順の段を逆にたどってまとめて求める（引数は earliest_starts と同じ）"""
+        durations = np.asarray(durations, dtype=np.int64)
+        if fixed_starts is None:
+            fixed_starts = np.full(len(durations), -1, dtype=np.int64)
+        is_fixed = fixed_starts >= 0
+        latest_finish = np.where(is_fixed, fixed_starts + durations, horizon).astype(np.int64)
+        for sources, targets in reversed(self.level_edges):
+            keep = ~is_fixed[sources] & ~is_fixed[targets]
+            np.minimum.at(latest_finish, sources[keep], (latest_finish - durations)[targets[keep]])
+        return latest_finish
+
+    def compute_bounds(self, durations: Sequence[int], horizon: int,
+                       fixed_starts: Optional[np.ndarray] = None,
+                       earliest_start: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        トポロジカル順の最長経路計算により、各タスクの最早開始・最遅終了を求めます。
+
+        Args:
+            durations (Sequence[int]): 各タスクの所要時間
+            horizon (int): スケジュール全体の上限
+            fixed_starts (np.ndarray, optional): 開始を固定するタスクの開始時間（固定しない場合は -1）。
+                固定されたタスクへの先行関係は制約として扱わない
+            earliest_start (np.ndarray, optional): 求め済みの最早開始（earliest_starts の結果）
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (最早開始, 最遅終了)
+        """
+        durations = np.asarray(durations, dtype=np.int64)
+        if earliest_start is None:
+            earliest_start = self.earliest_starts(durations, fixed_starts)
+        latest_finish = self.latest_finishes(durations, horizon, fixed_starts)
+
+        critical_path = int((earliest_start + durations).max()) if len(durations) else 0
+        if critical_path > horizon:
+            raise PrecedenceGraphError(
+                f"クリティカルパス長 {critical_path} がスケジュール上限 {horizon} を超えています"
+            )
+        return earliest_start, latest_finish
+
+    def _topological_order(self) -> List[int]:
+        indptr, indices = self.successor_indptr, self.successor_indices
+        indegree = np.diff(self.predecessor_indptr).tolist()
+        stack = [i for i, d in enumerate(indegree) if d == 0]
+        order = []
+        while stack:
+            i = stack.pop()
+            order.append(i)
+            for j in indices[indptr[i]:indptr[i + 1]].tolist():
+                indegree[j] -= 1
+                if indegree[j] == 0:
+                    stack.append(j)
+        return order
+
+    def _find_cycle(self) -> str:
+        """循環の一例をタスク番号の列として返す"""
+        remaining = set(range(len(self.task_ids))) - set(self.order)
+        # 循環上の頂点は必ず残存頂点の先行を持つため、先行をたどると循環に入る
+        node = next(iter(remaining))
+        seen = {}
+        path = []
+        while node not in seen:
+            seen[node] = len(path)
+            path.append(node)
+            node = next(j for j in self.predecessors(node).tolist() if j in remaining)
+        cycle = path[seen[node]:][::-1]
+        return " → ".join(str(self.task_ids[i]) for i in cycle + [cycle[0]])
+
+
+def _to_csr(rows: np.ndarray, cols: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    return indptr, cols[order]
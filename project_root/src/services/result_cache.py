@@ -0,0 +1,229 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+from dataclasses import asdict, replace
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+from src.models import *
+from src.utils.file_io import atomic_write
+from src.config.settings import *
+
+# キャッシュ形式のバージョン（鍵の構成や保存内容を変えた場合は更新する）
+RESULT_CACHE_FORMAT_VERSION = 2
+
+STATS_FILENAME = 'stats.json'
+
+
+class ResultCache:
+    """
+    スケジューリング結果のディスクキャッシュ。
+
+    タスク番号・工数・先行タスク・実績、作業者数・稼働時間・稼働カレンダー、ソルバー設定から
+    正規化したハッシュを鍵として、各タスクの開始・終了オフセットを保存します。
+    ソルバー設定には、どの経路（分割求解・リストスケジューリング・CP-SAT）で解くかを決める設定も含みます。
+    行の並び順や先行タスク番号の書き順が違っても同じ鍵になります。
+    合計サイズが max_bytes を超えた場合は、最後に使われた時刻が古いものから削除します。
+
+    Args:
+        directory (str, optional): 保存先ディレクトリ（None の場合はキャッシュしない）
+        max_bytes (int): 保存するファイルの合計サイズの上限
+    """
+
+    def __init__(self, directory: Optional[str] = RESULT_CACHE_DIR, max_bytes: int = RESULT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def key(self, scheduler, options: SolverOptions, previous: Optional[TaskTable] = None,
+            solver_settings: Optional[Dict] = None) -> str:
+        """
+        求解の入力の正規化したハッシュ
+
+        previous を指定した場合（差分再スケジューリング）は、その開始日・終了日(予想)も鍵に含める。
+        solver_settings は solve() に渡す求解の経路の設定（None の場合は TaskScheduler.solve で直接解く）。
+        """
+        table = scheduler.table
+        order = np.argsort(table.ids, kind='stable')
+        canonical = table.take(order)
+        calendar = scheduler.date_converter.calendar
+        settings = {
+            'version': RESULT_CACHE_FORMAT_VERSION,
+            'num_workers': scheduler.num_workers,
+            'workday_hours': scheduler.workday_hours,
+            'start_date': str(scheduler.start_date),
+            'time_granularity': TIME_GRANULARITY_HOURS,
+            'max_time_scale': MAX_TIME_SCALE,
+            'calendar': [calendar.work_start_hour, calendar.work_hours_per_day,
+                         calendar.hour_breaks.tolist(), calendar.hour_offsets.tolist()],
+            # 探索ログの有無は結果に影響しない
+            'options': {name: value for name, value in asdict(options).items() if name != 'log_search_progress'},
+            # 0 の場合は全コアを使うため、実際の探索ワーカー数で区別する
+            'search_workers': options.num_search_workers or os.cpu_count(),
+            'solver': solver_settings or {'solver': 'monolithic'},
+        }
+        digest = hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode('utf-8'))
+        arrays = [
+            canonical.ids,
+            canonical.durations,
+            canonical.predecessor_indptr,
+            canonical.sorted_predecessor_ids(),
+            canonical.actual_start_time,
+            canonical.actual_end_time,
+            calendar.working_day_ordinals,
+        ]
+        if previous is not None:
+            # Excel への書き出し・読み込みで生じる端数を除くため、分単位に丸める
+            found = previous.indices_of(canonical.ids)
+            for column in ('cp_estimated_start_time', 'cp_estimated_end_time'):
+                values = np.where(found >= 0, getattr(previous, column)[found], np.datetime64('NaT', 's'))
+                arrays.append((values + np.timedelta64(30, 's')).astype('datetime64[m]'))
+            arrays.append(found >= 0)
+        for array in arrays:
+            array = np.ascontiguousarray(array)
+            digest.update(f'{array.dtype.str}{array.shape}'.encode('ascii'))
+            digest.update(array.tobytes())
+        return digest.hexdigest()
+
+    def solve(self, scheduler, options: SolverOptions, solve: Callable[[], SolveResult],
+              incremental: bool = False, solver_settings: Optional[Dict] = None) -> Tuple[SolveResult, bool]:
+        """
+        キャッシュにあればその結果をタスクに設定して返し、なければ solve() で解いて保存する
+
+        solve() が DecompositionSolver を使う場合は、その cache_settings() を solver_settings に渡す。
+
+        差分再スケジューリングでは、前回の出力がこのキャッシュの結果そのもの（入力が変わっていない）
+        であればそれを返す。そうでなければ前回の出力を含めた鍵で探す。
+
+        Returns:
+            Tuple[SolveResult, bool]: (結果, キャッシュにあったかどうか)
+        """
+        if not self.directory:
+            return solve(), False
+
+        previous = scheduler.previous_table if incremental else None
+        key = self.key(scheduler, options, solver_settings=solver_settings)
+        result = self.get(key, scheduler)
+        if result is not None and previous is not None and not scheduler.table.schedule_matches(previous):
+            result = None
+        if result is None and previous is not None:
+            key = self.key(scheduler, options, previous, solver_settings)
+            result = self.get(key, scheduler)
+        self._record(hit=result is not None)
+        if result is not None:
+            return result, True
+
+        result = solve()
+        if result.has_solution:
+            self.put(key, scheduler.table, result)
+            if previous is not None:
+                # この結果を出力した後の実行では、前回の出力 = この結果 として探す
+                self.put(self.key(scheduler, options, scheduler.table, solver_settings), scheduler.table, result)
+        return result, False
+
+    def get(self, key: str, scheduler) -> Optional[SolveResult]:
+        """保存された結果をタスクに設定して返す（ない場合は None）"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(path)  # 最後に使われた時刻を更新する（LRU）
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+        found = np.searchsorted(entry['ids'], scheduler.table.ids)
+        starts, ends = entry['starts'][found], entry['ends'][found]
+        result = replace(entry['result'], wall_time=0.0)
+        result.results = scheduler.apply_schedule(starts, ends)
+        return result
+
+    def put(self, key: str, table: TaskTable, result: SolveResult):
+        """結果を保存し、合計サイズが上限を超えた分を古いものから削除する"""
+        order = np.argsort(table.ids, kind='stable')
+        _, starts, ends = np.array(result.results, dtype=np.float64).reshape(-1, 3).T
+        entry = {
+            'ids': table.ids[order],
+            'starts': starts[order],
+            'ends': ends[order],
+            'result': replace(result, results=[]),
+        }
+        path = self._path(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with atomic_write(path) as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._evict()
+        except OSError:
+            pass  # キャッシュに書けなくても結果はそのまま使う
+
+    def stats(self) -> Dict:
+        """ヒット率と保存数・合計サイズ"""
+        stats = self._load_stats()
+        lookups = stats['hits'] + stats['misses']
+        entries = self._entries()
+        return {
+            **stats,
+            'hit_rate': stats['hits'] / lookups if lookups else None,
+            'entries': len(entries),
+            'bytes': sum(size for _, _, size in entries),
+            'max_bytes': self.max_bytes,
+        }
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            os.remove(path)
+        if self.directory and os.path.exists(os.path.join(self.directory, STATS_FILENAME)):
+            os.remove(os.path.join(self.directory, STATS_FILENAME))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'v{RESULT_CACHE_FORMAT_VERSION}-{key}.pkl')
+
+    def _entries(self):
+        """(パス, 最後に使われた時刻, サイズ) の一覧"""
+        if not self.directory:
+            return []
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.pkl')):
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, status.st_mtime, status.st_size))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[1], reverse=True)
+        total, evicted = 0, 0
+        for path, _, size in entries:
+            total += size
+            if total > self.max_bytes:
+                os.remove(path)
+                evicted += 1
+        if evicted:
+            self._update_stats(evictions=evicted)
+
+    def _record(self, hit: bool):
+        self._update_stats(**{'hits' if hit else 'misses': 1})
+
+    def _load_stats(self) -> Dict:
+        stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        if self.directory:
+            try:
+                with open(os.path.join(self.directory, STATS_FILENAME), encoding='utf-8') as f:
+                    stats.update(json.load(f))
+            except (OSError, ValueError):
+                pass
+        return stats
+
+    def _update_stats(self, **increments):
+        """集計を加算する（複数プロセスから同時に更新した場合は一部が失われることがある）"""
+        stats = self._load_stats()
+        for name, value in increments.items():
+            stats[name] += value
+        path = os.path.join(self.directory, STATS_FILENAME)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with atomic_write(path, 'w', encoding='utf-8') as f:
+                json.dump(stats, f)
+        except OSError:
+            pass
@@ -0,0 +1,284 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Sequence, Tuple
+import numpy as np
+from src.models import *
+from src.services.list_scheduler import list_schedule, longest_paths, priorities
+from src.services.precedence_graph import PrecedenceGraph
+from src.config.settings import *
+
+DISTRIBUTIONS = ('pert', 'triangular')
+
+
+def sample_durations(rng: np.random.Generator, low: np.ndarray, mode: np.ndarray, high: np.ndarray,
+                     samples: int, distribution: str = RISK_DISTRIBUTION) -> np.ndarray:
+    """
+    タスクごとの (最小, 最頻, 最大) の分布から所要時間を抽出し、(タスク数, 試行数) の配列で返す
+
+    'pert' はベータ分布（平均 = (最小 + 4×最頻 + 最大) / 6）、'triangular' は三角分布。
+    最小 = 最大 のタスクは常に最頻値とする。
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"不明な分布です: {distribution} ({', '.join(DISTRIBUTIONS)} のいずれか)")
+    low, mode, high = (np.asarray(values, dtype=np.float64)[:, None] for values in (low, mode, high))
+    width = high - low
+    spread = width > 0
+    safe_width = np.where(spread, width, 1.0)
+    size = (len(low), samples)
+    if distribution == 'pert':
+        alpha = np.where(spread, 1 + 4 * (mode - low) / safe_width, 1.0)
+        beta = np.where(spread, 1 + 4 * (high - mode) / safe_width, 1.0)
+        fraction = rng.beta(np.broadcast_to(alpha, size), np.broadcast_to(beta, size))
+    else:
+        # 逆関数法（最頻値の位置で左右の二次関数を切り替える）
+        u = rng.random(size)
+        peak = (mode - low) / safe_width
+        fraction = np.where(u < peak, np.sqrt(u * peak), 1 - np.sqrt((1 - u) * (1 - peak)))
+    return np.where(spread, low + width * fraction, mode)
+
+
+def evaluate_samples(order: np.ndarray, predecessor_indptr: np.ndarray, predecessor_indices: np.ndarray,
+                     successor_indptr: np.ndarray, successor_indices: np.ndarray, durations: np.ndarray,
+                     num_workers: int, pinned_starts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    全試行のスケジュールを同時に求め、(タスクごとの終了時間, クリティカルかどうか) を (タスク数, 試行数) で返す
+
+    タスクを order の順（先行関係を満たす順）に、先行タスクがすべて終わった後で最も早く空く作業者へ
+    割り当てる。試行ごとの違いは配列の列として扱い、タスク数に比例した回数の配列演算で全試行を評価する。
+    クリティカル度は、先行関係と同じ作業者の次のタスクによる最遅開始を後ろから求め、
+    余裕時間が 0 のタスクをクリティカルとする。開始を固定したタスク（実績）はクリティカルとしない。
+    """
+    n, samples = durations.shape
+    columns = np.arange(samples)
+    is_fixed = ~np.isnan(pinned_starts)
+    fixed = is_fixed.tolist()
+    starts = np.empty((n, samples))
+    ends = np.empty((n, samples))
+    workers = np.empty((n, samples), dtype=np.int64)
+    free = np.zeros((num_workers, samples))  # 作業者ごとの空く時間
+
+    indptr = predecessor_indptr.tolist()
+    for j in order.tolist():
+        worker = free.argmin(axis=0)
+        available = free[worker, columns]
+        if fixed[j]:
+            start = np.full(samples, pinned_starts[j])
+        else:
+            predecessors = predecessor_indices[indptr[j]:indptr[j + 1]]
+            start = available
+            if len(predecessors):
+                start = np.maximum(start, ends[predecessors].max(axis=0))
+        end = start + durations[j]
+        starts[j], ends[j], workers[j] = start, end, worker
+        free[worker, columns] = np.maximum(available, end)
+
+    finish = ends.max(axis=0) if n else np.zeros(samples)
+    latest_starts = np.empty((n, samples))
+    next_start = np.broadcast_to(finish, (num_workers, samples)).copy()  # 作業者ごとの次のタスクの最遅開始
+    indptr = successor_indptr.tolist()
+    for j in order[::-1].tolist():
+        worker = workers[j]
+        latest_finish = np.minimum(finish, next_start[worker, columns])
+        successors = successor_indices[indptr[j]:indptr[j + 1]]
+        successors = successors[~is_fixed[successors]]
+        if len(successors):
+            latest_finish = np.minimum(latest_finish, latest_starts[successors].min(axis=0))
+        latest_starts[j] = starts[j] if fixed[j] else latest_finish - durations[j]
+        next_start[worker, columns] = latest_starts[j]
+
+    critical = (latest_starts - starts <= 1e-9) & ~is_fixed[:, None]
+    return ends, critical
+
+
+def end_histogram(ends: np.ndarray, lower: np.ndarray, upper: np.ndarray, bins: int) -> np.ndarray:
+    """タスクごとの終了時間 (タスク数, 試行数) を、[lower, upper] を bins 等分した度数分布 (タスク数, bins) に集計する"""
+    n = len(ends)
+    width = np.where(upper > lower, upper - lower, 1.0)
+    index = np.clip(((ends - lower[:, None]) / width[:, None] * bins).astype(np.int64), 0, bins - 1)
+    index += np.arange(n)[:, None] * bins
+    return np.bincount(index.ravel(), minlength=n * bins).reshape(n, bins).astype(np.int32)
+
+
+def histogram_percentile(counts: np.ndarray, lower: np.ndarray, upper: np.ndarray, percent: float) -> np.ndarray:
+    """end_histogram の度数分布からタスクごとのパーセンタイルを求める（ビンの中は一様に分布するとして補間）"""
+    n, bins = counts.shape
+    cumulative = counts.cumsum(axis=1)
+    target = cumulative[:, -1] * (percent / 100) if bins else np.zeros(n)
+    rows = np.arange(n)
+    b = np.minimum((cumulative < target[:, None]).sum(axis=1), bins - 1)
+    before = np.where(b > 0, cumulative[rows, b - 1], 0)
+    inside = (target - before) / np.maximum(counts[rows, b], 1)
+    return lower + (upper - lower) * (b + np.clip(inside, 0, 1)) / bins
+
+
+def _run_batch(arrays: Tuple[np.ndarray, ...], low: np.ndarray, mode: np.ndarray, high: np.ndarray,
+               num_workers: int, samples: int, distribution: str, seed: np.random.SeedSequence,
+               end_range: Tuple[np.ndarray, np.ndarray], bins: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ワーカープロセスで1バッチ分の試行を評価する
+
+    (試行ごとの完了時間, タスクごとの終了時間の度数分布, クリティカルになった回数) を返し、
+    (タスク数, 試行数) の終了時間はプロセスの外へ出さない。
+    """
+    order, predecessor_indptr, predecessor_indices, successor_indptr, successor_indices, pinned_starts = arrays
+    durations = sample_durations(np.random.default_rng(seed), low, mode, high, samples, distribution)
+    ends, critical = evaluate_samples(order, predecessor_indptr, predecessor_indices, successor_indptr,
+                                      successor_indices, durations, num_workers, pinned_starts)
+    finish = ends.max(axis=0) if len(ends) else np.zeros(samples)
+    return finish, end_histogram(ends, *end_range, bins), critical.sum(axis=1)
+
+
+class RiskAnalyzer:
+    """
+    工数の不確実性によるスケジュールリスクのモンテカルロ分析。
+
+    タスクごとに工数(予想)を最頻値とする分布から所要時間を抽出し、作業者数を考慮したスケジュールを
+    試行の軸でベクトル化して評価します。試行はバッチに分けてプロセスプールで並列に実行します。
+    割り当ての順序は工数(予想)でのリストスケジューリングの開始順に固定します。
+
+    各バッチは完了時間とクリティカル回数、タスクごとの終了時間の度数分布だけを返すため、
+    メモリは試行数によらずタスク数 × RISK_HISTOGRAM_BINS 程度です。度数分布の範囲は予備試行の
+    終了時間の幅を前後に広げたものとし、範囲外の値は両端のビンに数えます。
+
+    Args:
+        scheduler (TaskScheduler): タスクを読み込んだスケジューラー
+        samples (int): 試行数
+        distribution (str): 'pert' または 'triangular'
+        max_processes (int, optional): 同時に実行するプロセス数（None の場合は CPU コア数）
+        batch_size (int): 1プロセスで一度に評価する試行数
+        seed (int, optional): 乱数の種（None の場合は毎回異なる）
+        bins (int): タスクごとの終了時間のパーセンタイルを求める度数分布のビン数
+    """
+
+    def __init__(self, scheduler, samples: int = RISK_SAMPLES, distribution: str = RISK_DISTRIBUTION,
+                 max_processes: Optional[int] = RISK_MAX_PROCESSES, batch_size: int = RISK_BATCH_SIZE,
+                 seed: Optional[int] = RISK_SEED, bins: int = RISK_HISTOGRAM_BINS):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"不明な分布です: {distribution} ({', '.join(DISTRIBUTIONS)} のいずれか)")
+        self.scheduler = scheduler
+        self.samples = samples
+        self.distribution = distribution
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.seed = seed
+        self.bins = bins
+
+    def analyze(self, optimistic: Optional[np.ndarray] = None, pessimistic: Optional[np.ndarray] = None,
+                percentiles: Sequence[int] = RISK_PERCENTILES) -> RiskReport:
+        """
+        分析を実行する
+
+        Args:
+            optimistic (np.ndarray, optional): タスクごとの最小工数（NaN の場合は 工数(予想) × RISK_OPTIMISTIC_RATIO）
+            pessimistic (np.ndarray, optional): タスクごとの最大工数（NaN の場合は 工数(予想) × RISK_PESSIMISTIC_RATIO）
+            percentiles (Sequence[int]): 求めるパーセンタイル
+        """
+        scheduler = self.scheduler
+        started = time.perf_counter()
+        with scheduler.profiler.stage('risk', samples=self.samples, distribution=self.distribution) as record:
+            table = scheduler.table
+            graph = PrecedenceGraph.from_table(table)
+            pinned_starts, sizes = scheduler._actual_pins()
+            mode = np.where(np.isnan(sizes), table.durations, sizes)
+            low, high = self.duration_ranges(mode, optimistic, pessimistic)
+            # 実績のあるタスクは工数を確定値とする
+            has_actual = ~np.isnan(sizes)
+            low, high = np.where(has_actual, mode, low), np.where(has_actual, mode, high)
+
+            # 割り当ての順序（工数(予想)でのリストスケジュールの開始順、同時刻は先行関係の順）
+            head, tail = longest_paths(graph, mode, pinned_starts)
+            baseline_starts, baseline_ends = list_schedule(
+                graph, mode, scheduler.num_workers, priorities(head, tail, LIST_PRIORITY_RULE), pinned_starts)
+            rank = np.empty(len(table), dtype=np.int64)
+            rank[graph.order] = np.arange(len(table))
+            order = np.lexsort((rank, baseline_starts))
+
+            arrays = (order, graph.predecessor_indptr, graph.predecessor_indices,
+                      graph.successor_indptr, graph.successor_indices, pinned_starts)
+            seeds = np.random.SeedSequence(self.seed).spawn(self._num_batches() + 1)
+            end_range = self._end_range(arrays, low, mode, high, seeds[-1])
+            finish, histogram, critical_counts = self._run_batches(arrays, low, mode, high, end_range, seeds[:-1])
+
+            report = RiskReport(
+                samples=self.samples,
+                distribution=self.distribution,
+                baseline_makespan=float(baseline_ends.max()) if len(table) else 0.0,
+                criticality=critical_counts / self.samples,
+            )
+            converter = scheduler.date_converter
+            _, report.baseline_end_dates = converter.convert_batch(baseline_ends, baseline_ends)
+            for percent in percentiles:
+                report.finish_percentiles[percent] = float(np.percentile(finish, percent))
+                report.end_percentiles[percent] = histogram_percentile(histogram, *end_range, percent)
+                _, report.end_dates[percent] = converter.convert_batch(
+                    report.end_percentiles[percent], report.end_percentiles[percent])
+                report.finish_dates[percent] = converter.convert_offset(report.finish_percentiles[percent], is_end=True)
+            record.update(tasks=len(table), baseline_makespan=report.baseline_makespan,
+                          **{f'p{percent}': value for percent, value in report.finish_percentiles.items()})
+        report.wall_time = time.perf_counter() - started
+        return report
+
+    @staticmethod
+    def duration_ranges(mode: np.ndarray, optimistic: Optional[np.ndarray] = None,
+                        pessimistic: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(最小, 最大) 工数を求める（指定がない場合は工数(予想)に対する比率、最頻値を挟むように補正）"""
+        low = mode * RISK_OPTIMISTIC_RATIO
+        high = mode * RISK_PESSIMISTIC_RATIO
+        if optimistic is not None:
+            low = np.where(np.isnan(optimistic), low, optimistic)
+        if pessimistic is not None:
+            high = np.where(np.isnan(pessimistic), high, pessimistic)
+        return np.minimum(low, mode), np.maximum(high, mode)
+
+    def _num_batches(self) -> int:
+        return -(-self.samples // self.batch_size)
+
+    def _end_range(self, arrays: Tuple[np.ndarray, ...], low: np.ndarray, mode: np.ndarray, high: np.ndarray,
+                   seed: np.random.SeedSequence) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        タスクごとの終了時間の度数分布の範囲 (下限, 上限) を予備試行から決める
+
+        順序を固定した割り当てでは終了時間が工数に対して単調なため、全タスクを最小・最大工数とした
+        場合の終了時間が取り得る範囲になる。予備試行の終了時間の幅をその範囲内で前後に広げて使う。
+        """
+        order, predecessor_indptr, predecessor_indices, successor_indptr, successor_indices, pinned_starts = arrays
+        graph_arrays = (order, predecessor_indptr, predecessor_indices, successor_indptr, successor_indices)
+        num_workers = self.scheduler.num_workers
+        bounds, _ = evaluate_samples(*graph_arrays, np.stack([low, high], axis=1), num_workers, pinned_starts)
+        pilot = sample_durations(np.random.default_rng(seed), low, mode, high,
+                                 min(self.samples, RISK_PILOT_SAMPLES), self.distribution)
+        ends, _ = evaluate_samples(*graph_arrays, pilot, num_workers, pinned_starts)
+        first, last = ends.min(axis=1), ends.max(axis=1)
+        margin = np.maximum(last - first, (bounds[:, 1] - bounds[:, 0]) * 0.05)
+        return np.maximum(first - margin, bounds[:, 0]), np.minimum(last + margin, bounds[:, 1])
+
+    def _run_batches(self, arrays: Tuple[np.ndarray, ...], low: np.ndarray, mode: np.ndarray, high: np.ndarray,
+                     end_range: Tuple[np.ndarray, np.ndarray],
+                     seeds: Sequence[np.random.SeedSequence]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        試行をバッチに分けて評価し、(試行ごとの完了時間, タスクごとの終了時間の度数分布, クリティカルになった回数) を返す
+
+        バッチの結果は届いた順に加算し、保持しない。
+        """
+        sizes = [min(self.batch_size, self.samples - offset) for offset in range(0, self.samples, self.batch_size)]
+        batches = [(arrays, low, mode, high, self.scheduler.num_workers, size, self.distribution, seed,
+                    end_range, self.bins) for size, seed in zip(sizes, seeds)]
+
+        processes = min(len(batches), self.max_processes)
+        if processes <= 1:
+            return self._accumulate((_run_batch(*batch) for batch in batches), len(low))
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            return self._accumulate(pool.map(_run_batch, *zip(*batches)), len(low))
+
+    def _accumulate(self, results: Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]],
+                    n: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """バッチの結果を届いた順に加算する"""
+        finishes = []
+        histogram = np.zeros((n, self.bins), dtype=np.int32)
+        critical_counts = np.zeros(n, dtype=np.int64)
+        for finish, counts, critical in results:
+            finishes.append(finish)
+            histogram += counts
+            critical_counts += critical
+        return np.concatenate(finishes), histogram, critical_counts
@@ -0,0 +1,419 @@
+"""
+常駐スケジューリングサービス。
+
+起動時に ortools などの依存と稼働カレンダーを読み込んだワーカープロセスを待機させておき、
+ローカルの HTTP（TCP または Unix ソケット）で受け付けたジョブを優先度順に解きます。
+CP-SAT が改善解を見つけるたびに、その途中経過を NDJSON（1行1イベント）でクライアントへ送ります。
+
+    POST /jobs                WBS を JSON、または xlsx の本体で送信（?priority=&stream=0 など）
+    GET  /jobs/<id>           ジョブの状態とこれまでのイベント
+    GET  /jobs/<id>/events    イベントの NDJSON ストリーム（最初から）
+    GET  /health              ワーカー・待ち行列の状態
+"""
+import http.server
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import socketserver
+import tempfile
+import threading
+import time
+from dataclasses import asdict, fields
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import parse_qs, urlparse
+from src.utils.parallel import search_workers_per_process
+from src.config.settings import *
+
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# ジョブの設定として受け付ける項目と型
+JOB_PARAMETERS = {
+    'sheet': str,
+    'num_workers': int,
+    'start_date': str,
+    'time_limit': float,
+    'gap': float,
+    'engine': str,
+    'priority_rule': str,
+}
+
+
+def _worker_main(connection, num_search_workers: int):
+    """
+    ウォームワーカーの本体。
+
+    起動時に重い依存の読込と稼働カレンダーの構築を済ませ、以降は接続からジョブを受け取って順に解く。
+    num_search_workers は1ジョブあたりの CP-SAT 探索ワーカー数（他のワーカープロセスと CPU コアを分け合う）。
+    """
+    from ortools.sat.python import cp_model  # noqa: F401  起動時に読み込んでおく
+    from src.utils.data_converter import DateConverter
+
+    DateConverter(PROJECT_START_DATE).calendar
+    connection.send(('ready', os.getpid()))
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        try:
+            connection.send(('result', _solve_job(job, connection, num_search_workers)))
+        except Exception as e:  # ジョブの失敗でワーカーを止めない
+            connection.send(('error', f"{type(e).__name__}: {e}"))
+
+
+def _solve_job(job: Dict, connection, num_search_workers: int) -> Dict:
+    """ワーカープロセスで1つのジョブを解き、結果を辞書で返す"""
+    from src.models import SolverOptions, Task
+    from src.services.task_scheduler import TaskScheduler
+    from src.utils.wbs_reader import parse_datetime
+
+    params = job['params']
+    scheduler = TaskScheduler(num_workers=params.get('num_workers', DEFAULT_NUM_WORKERS),
+                              workday_hours=DEFAULT_WORKDAY_HOURS,
+                              start_date=params.get('start_date', PROJECT_START_DATE))
+    if job.get('xlsx') is not None:
+        with tempfile.TemporaryDirectory() as work_dir:
+            path = os.path.join(work_dir, 'wbs.xlsx')
+            with open(path, 'wb') as f:
+                f.write(job['xlsx'])
+            scheduler.load_tasks_from_excel(path, params.get('sheet', DEFAULT_SHEET_NAME))
+    else:
+        names = {f.name for f in fields(Task)}
+        datetimes = {'cp_estimated_start_time', 'cp_estimated_end_time', 'actual_start_time',
+                     'actual_end_time', 'target_end_time'}
+        scheduler.tasks = [
+            Task(**{key: parse_datetime(value) if key in datetimes else value
+                    for key, value in task.items() if key in names})
+            for task in job['tasks']
+        ]
+
+    def on_solution(event):
+        connection.send(('solution', {
+            'objective': event.objective,
+            'best_bound': event.best_bound,
+            'wall_time': event.wall_time,
+            'results': event.results,
+        }))
+
+    options = SolverOptions(
+        num_search_workers=num_search_workers,
+        max_time_in_seconds=params.get('time_limit', DEFAULT_TIME_LIMIT_SECONDS),
+        relative_gap_limit=params.get('gap', DEFAULT_RELATIVE_GAP_LIMIT),
+        engine=params.get('engine', SCHEDULING_ENGINE),
+        priority_rule=params.get('priority_rule', LIST_PRIORITY_RULE),
+    )
+    result = scheduler.solve(options, on_solution=on_solution)
+    table = scheduler.table
+    schedule = [
+        {'id': task_id, 'start': start, 'end': end,
+         'start_time': start_time.isoformat() if start_time else None,
+         'end_time': end_time.isoformat() if end_time else None}
+        for (task_id, start, end), start_time, end_time in zip(
+            result.results, table.cp_estimated_start_time.tolist(), table.cp_estimated_end_time.tolist())
+    ]
+    summary = asdict(result)
+    summary['results'] = schedule
+    return summary
+
+
+class Job:
+    """
+    受け付けたジョブ。イベントの履歴を保持し、複数のクライアントが途中から購読できる
+
+    途中経過（solution）のイベントは最新の1件のみ保持し、入力の WBS はワーカーへ渡した時点で破棄する。
+    """
+
+    def __init__(self, job_id: int, priority: int, params: Dict, tasks: Optional[List[Dict]] = None,
+                 xlsx: Optional[bytes] = None):
+        self.id = job_id
+        self.priority = priority
+        self.params = params
+        self.tasks = tasks
+        self.xlsx = xlsx
+        self.status = 'queued'
+        self.events: List[Dict] = []
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self._sequence: List[int] = []  # events の各イベントの通し番号
+        self._emitted = 0
+        self._changed = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ('done', 'error')
+
+    def emit(self, event: str, state: Optional[str] = None, **values):
+        with self._changed:
+            if state is not None:
+                self.status = state
+                if self.finished:
+                    self.finished_at = time.time()
+            self._emitted += 1
+            # 改善解は結果全体を含むため、直前の途中経過を置き換える
+            if event == 'solution' and self.events and self.events[-1]['event'] == 'solution':
+                self.events.pop()
+                self._sequence.pop()
+            self.events.append({'event': event, 'job': self.id, **values})
+            self._sequence.append(self._emitted)
+            self._changed.notify_all()
+
+    def follow(self, timeout: float = 1.0) -> Iterator[Dict]:
+        """最初のイベントから順に返し、ジョブが終わるまで新しいイベントを待つ（置き換えられた途中経過は飛ばす）"""
+        seen = 0
+        while True:
+            with self._changed:
+                while seen >= self._emitted and not self.finished:
+                    self._changed.wait(timeout)
+                pending = [event for event, number in zip(self.events, self._sequence) if number > seen]
+                seen = self._emitted
+                finished = self.finished
+            yield from pending
+            if finished:
+                return
+
+    def take_payload(self) -> Dict:
+        """ワーカーへ渡す入力を返し、ジョブからは破棄する"""
+        payload = {'params': self.params, 'tasks': self.tasks, 'xlsx': self.xlsx}
+        self.tasks = self.xlsx = None
+        return payload
+
+
+class WarmWorker:
+    """依存と稼働カレンダーを読み込み済みで待機するワーカープロセスと、その接続"""
+
+    def __init__(self, context, num_search_workers: int):
+        self._context = context
+        self.num_search_workers = num_search_workers
+        self.pid = None
+        self._start()
+
+    def _start(self):
+        self.connection, child = self._context.Pipe()
+        self.process = self._context.Process(target=_worker_main, args=(child, self.num_search_workers), daemon=True)
+        self.process.start()
+        child.close()
+        _, self.pid = self.connection.recv()  # 準備完了まで待つ
+
+    def run(self, job: Job):
+        """ジョブを解き、途中経過と結果をジョブのイベントとして記録する"""
+        job.emit('started', state='running', worker=self.pid)
+        try:
+            self.connection.send(job.take_payload())
+            while True:
+                kind, value = self.connection.recv()
+                if kind == 'solution':
+                    job.emit('solution', **value)
+                elif kind == 'result':
+                    job.emit('result', state='done', **value)
+                    return
+                else:
+                    job.emit('error', state='error', message=value)
+                    return
+        except (EOFError, OSError) as e:
+            # ワーカープロセスが異常終了した場合は、このジョブのみ失敗として新しいプロセスを起動する
+            job.emit('error', state='error', message=f"ワーカープロセスが終了しました: {e!r}")
+            self.process.join(timeout=1)
+            self._start()
+
+    def close(self):
+        try:
+            self.connection.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class ScheduleService:
+    """
+    ジョブの待ち行列とウォームワーカーの管理。
+
+    ジョブは priority の大きい順（同じ場合は受付順）に、空いているワーカーへ割り当てます。
+    終了したジョブは job_ttl 秒を過ぎるか、max_finished_jobs 件を超えると古い順に破棄します。
+
+    Args:
+        num_workers (int): 待機させるワーカープロセス数
+        job_ttl (float): 終了したジョブを保持する秒数
+        max_finished_jobs (int): 保持する終了済みジョブの最大数
+    """
+
+    def __init__(self, num_workers: int = SERVICE_WORKERS, job_ttl: float = SERVICE_JOB_TTL_SECONDS,
+                 max_finished_jobs: int = SERVICE_MAX_FINISHED_JOBS):
+        self.num_workers = num_workers
+        self.job_ttl = job_ttl
+        self.max_finished_jobs = max_finished_jobs
+        self.jobs: Dict[int, Job] = {}
+        self._queue: queue.PriorityQueue = queue.PriorityQueue()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._workers: List[WarmWorker] = []
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        # Windows と同じ spawn 方式（サーバーのスレッドを fork で複製しない）
+        context = multiprocessing.get_context('spawn')
+        # 各ワーカーが同時に解くため、CP-SAT の探索ワーカー数は CPU コアを等分する
+        search_workers = search_workers_per_process(self.num_workers)
+        self._workers = [WarmWorker(context, search_workers) for _ in range(self.num_workers)]
+        for worker in self._workers:
+            thread = threading.Thread(target=self._dispatch, args=(worker,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def close(self):
+        for _ in self._workers:
+            self._queue.put((float('inf'), float('inf'), None))
+        for thread in self._threads:
+            thread.join(timeout=5)
+        for worker in self._workers:
+            worker.close()
+
+    def submit(self, params: Dict, tasks: Optional[List[Dict]] = None, xlsx: Optional[bytes] = None,
+               priority: int = 0) -> Job:
+        with self._lock:
+            self._evict_finished()
+            job = Job(next(self._ids), priority, params, tasks, xlsx)
+            self.jobs[job.id] = job
+        job.emit('queued', position=self._queue.qsize(), priority=priority)
+        self._queue.put((-priority, job.id, job))
+        return job
+
+    def health(self) -> Dict:
+        with self._lock:
+            self._evict_finished()
+            jobs = list(self.jobs.values())
+        return {
+            'workers': [worker.pid for worker in self._workers],
+            'queued': self._queue.qsize(),
+            'running': sum(job.status == 'running' for job in jobs),
+            'jobs': len(jobs),
+        }
+
+    def _evict_finished(self):
+        """保持期間を過ぎた、または件数の上限を超えた終了済みジョブを破棄する（_lock を取得して呼ぶ）"""
+        expires = time.time() - self.job_ttl
+        finished = sorted((job.finished_at, job.id) for job in self.jobs.values() if job.finished_at is not None)
+        excess = len(finished) - self.max_finished_jobs
+        for i, (finished_at, job_id) in enumerate(finished):
+            if i >= excess and finished_at >= expires:
+                break
+            del self.jobs[job_id]
+
+    def _dispatch(self, worker: WarmWorker):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            try:
+                worker.run(job)
+            except Exception as e:  # 待ち行列の処理は止めない
+                job.emit('error', state='error', message=f"{type(e).__name__}: {e}")
+
+
+class ScheduleRequestHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # NDJSON をチャンク転送で送る
+    service: ScheduleService = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        if parts == ['health']:
+            return self._send_json(200, self.service.health())
+        if len(parts) >= 2 and parts[0] == 'jobs':
+            job = self.service.jobs.get(int(parts[1])) if parts[1].isdigit() else None
+            if job is None:
+                return self._send_json(404, {'error': 'ジョブがありません'})
+            if parts[2:] == ['events']:
+                return self._stream(job)
+            if not parts[2:]:
+                return self._send_json(200, {'job': job.id, 'status': job.status, 'priority': job.priority,
+                                             'events': job.events})
+        self._send_json(404, {'error': 'not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/jobs':
+            return self._send_json(404, {'error': 'not found'})
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > SERVICE_MAX_UPLOAD_BYTES:
+            return self._send_json(413, {'error': f'{SERVICE_MAX_UPLOAD_BYTES} バイトを超えています'})
+        body = self.rfile.read(length)
+
+        try:
+            content_type = self.headers.get('Content-Type', '').split(';')[0].strip()
+            if content_type == XLSX_CONTENT_TYPE or body[:2] == b'PK':
+                params, tasks, xlsx = _parse_params(query), None, body
+            else:
+                payload = json.loads(body or b'{}')
+                params, tasks, xlsx = _parse_params({**payload, **query}), payload.get('tasks'), None
+                if not isinstance(tasks, list):
+                    raise ValueError("tasks（タスクの配列）が必要です")
+            priority = int(query.get('priority', params.pop('priority', 0)))
+        except (ValueError, TypeError) as e:
+            return self._send_json(400, {'error': str(e)})
+
+        job = self.service.submit(params, tasks=tasks, xlsx=xlsx, priority=priority)
+        if query.get('stream', '1') in ('0', 'false'):
+            return self._send_json(202, {'job': job.id, 'status': job.status})
+        self._stream(job)
+
+    def address_string(self) -> str:
+        # Unix ソケットでは接続元アドレスが空になる
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if SERVICE_LOG_REQUESTS:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, value):
+        body = json.dumps(value, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, job: Job):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for event in job.follow():
+                line = json.dumps(event, ensure_ascii=False, default=str).encode('utf-8') + b'\n'
+                self.wfile.write(f'{len(line):X}\r\n'.encode('ascii') + line + b'\r\n')
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # クライアントが切断してもジョブはそのまま続ける
+
+
+def _parse_params(values: Dict) -> Dict:
+    params = {}
+    for key, cast in JOB_PARAMETERS.items():
+        if values.get(key) not in (None, ''):
+            params[key] = cast(values[key])
+    if 'priority' in values:
+        params['priority'] = int(values['priority'])
+    return params
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(service: ScheduleService, host: str = SERVICE_HOST, port: int = SERVICE_PORT,
+                  unix_socket: Optional[str] = None) -> socketserver.BaseServer:
+    """サービスを公開する HTTP サーバーを作る（unix_socket を指定した場合は Unix ソケットで待ち受ける）"""
+    handler = type('BoundScheduleRequestHandler', (ScheduleRequestHandler,), {'service': service})
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        return ThreadingUnixHTTPServer(unix_socket, handler)
+    return http.server.ThreadingHTTPServer((host, port), handler)
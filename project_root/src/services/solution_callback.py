@@ -0,0 +1,30 @@
+from typing import Callable, List
+from ortools.sat.python import cp_model
+from src.models import SolutionEvent
+
+
+class ScheduleSolutionCallback(cp_model.CpSolverSolutionCallback):
+    """改善解が見つかるたびにスケジュールを通知するコールバック"""
+
+    def __init__(self, task_ids: List[int], start_times, end_times, scale: float,
+                 on_solution: Callable[[SolutionEvent], None]):
+        super().__init__()
+        self._task_ids = task_ids
+        self._start_times = start_times
+        self._end_times = end_times
+        self._scale = scale
+        self._on_solution = on_solution
+        self.solution_count = 0
+
+    def on_solution_callback(self):
+        self.solution_count += 1
+        results = [
+            (task_id, self.Value(start) / self._scale, self.Value(end) / self._scale)
+            for task_id, start, end in zip(self._task_ids, self._start_times, self._end_times)
+        ]
+        self._on_solution(SolutionEvent(
+            objective=self.ObjectiveValue() / self._scale,
+            best_bound=self.BestObjectiveBound() / self._scale,
+            wall_time=self.WallTime(),
+            results=results,
+        ))
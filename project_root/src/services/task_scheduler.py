@@ -1,78 +1,576 @@
-from typing import List, Tuple
-from datetime import datetime
-from ortools.sat.python import cp_model # 仮想環境内にインストール済み
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple, Union
+import os
+import numpy as np
 from src.models import *
+from src.services.list_scheduler import UsageProfile, exceeds_capacity, list_schedule, longest_paths, priorities
+from src.services.precedence_graph import PrecedenceGraph
 from src.utils.data_converter import DateConverter
 from src.utils.excel_handler import ExcelHandler
+from src.utils.file_io import atomic_write
+from src.utils.parallel import search_workers_per_process
+from src.utils.run_profiler import RunProfiler
 from src.config.settings import *
 
 
+def time_scale(hours: np.ndarray, granularity: Optional[float] = None) -> float:
+    """
+    時間→CP-SAT内部単位の倍率を求める
+
+    granularity（時間）を指定した場合はその刻みを単位とする。
+    指定しない場合は 1/MAX_TIME_SCALE 時間単位に丸めた値の最大公約数を単位とする。
+    """
+    if granularity is not None:
+        return 1 / granularity
+    units = np.rint(np.asarray(hours) * MAX_TIME_SCALE).astype(np.int64)
+    divisor = int(np.gcd.reduce(units[units > 0])) if (units > 0).any() else MAX_TIME_SCALE
+    return MAX_TIME_SCALE / divisor
+
+
+def to_units(hours: np.ndarray, scale: float, round_up: bool = False) -> np.ndarray:
+    """時間を CP-SAT 内部単位の整数に変換する（round_up の場合は刻みに切り上げる）"""
+    values = np.asarray(hours, dtype=np.float64) * scale
+    return (np.ceil(values - 1e-9) if round_up else np.rint(values)).astype(np.int64)
+
+
+class ScheduleModel(NamedTuple):
+    model: Any  # cp_model.CpModel
+    graph: PrecedenceGraph
+    start_times: list
+    end_times: list
+    intervals: list
+    makespan: Any  # cp_model.IntVar
+    scale: float  # 時間→CP-SAT内部単位の倍率
+    horizon: int  # スケジュールの上限（CP-SAT内部単位）
+    capacity: Any = None  # 作業者数の累積制約（cp_model.Constraint）
+    critical_path: int = 0  # クリティカルパス長（CP-SAT内部単位）
+    work: int = 0  # 実績のないタスクの総工数（CP-SAT内部単位）
+    reserved: Tuple[np.ndarray, np.ndarray] = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    # 実績による占有（区間の長さ, 同時実行数）。累積制約の末尾に同じ順で並ぶ
+
+    def lower_bound(self, num_workers: int) -> int:
+        """メイクスパンの下界（クリティカルパス長と、実績の占有を作業者数までとした総工数/作業者数の大きい方）"""
+        sizes, usage = self.reserved
+        work = self.work + int((sizes * np.minimum(usage, num_workers)).sum())
+        return min(max(self.critical_path, -(-work // num_workers)), self.horizon)
+
+
+ENGINES = ('cp_sat', 'list')
+
+
 class TaskScheduler:
-    def __init__(self, num_workers: int, workday_hours: int):
-        self.tasks: List[Task] = []
+    def __init__(self, num_workers: int, workday_hours: int, start_date=PROJECT_START_DATE):
+        self.table = TaskTable([], [], [])
+        self.previous_table: Optional[TaskTable] = None
         self.num_workers = num_workers
         self.workday_hours = workday_hours
-        self.start_date = PROJECT_START_DATE
+        self.start_date = start_date
         self.excel_handler = ExcelHandler()
         self.date_converter = DateConverter(self.start_date)
+        self.profiler = RunProfiler(trace_memory=STATS_TRACE_MEMORY)
+
+    @property
+    def tasks(self) -> List[TaskView]:
+        """タスクを1件ずつ扱うためのビュー（実体は self.table）"""
+        return list(self.table)
+
+    @tasks.setter
+    def tasks(self, tasks: Union[TaskTable, List[Task]]):
+        self.table = tasks if isinstance(tasks, TaskTable) else TaskTable.from_tasks(tasks)
 
     def load_tasks_from_excel(self, file_path: str, sheet_name: str):
-        self.tasks = self.excel_handler.load_tasks(file_path, sheet_name)
+        with self.profiler.stage('load', file=file_path) as record:
+            self.table = self.excel_handler.load_table(file_path, sheet_name)
+            record['tasks'] = len(self.table)
+
+    def load_previous_schedule(self, file_path: str, sheet_name: str):
+        """
+        前回の出力ブックから推定開始・終了時間を読み込む（差分再スケジューリング用）
+
+        出力ブックの工数・先行タスク・実績の列は書き換えないため、save_solved_inputs で保存した
+        前回解いたときの値があればそちらを使う。
+        """
+        previous = self.excel_handler.load_table(file_path, sheet_name)
+        inputs = self.load_solved_inputs(file_path)
+        if inputs is not None:
+            found = previous.indices_of(inputs.ids)
+            if len(inputs) == len(previous) and (found >= 0).all():
+                inputs.cp_estimated_start_time = previous.cp_estimated_start_time[found]
+                inputs.cp_estimated_end_time = previous.cp_estimated_end_time[found]
+                previous = inputs
+        self.previous_table = previous
+
+    @staticmethod
+    def solved_inputs_path(output_path: str) -> str:
+        return f'{os.path.splitext(output_path)[0]}{SOLVED_INPUTS_SUFFIX}'
+
+    def save_solved_inputs(self, output_path: str):
+        """解いたときの工数・先行タスク・実績を出力ブックの隣に保存する"""
+        table = self.table
+        path = self.solved_inputs_path(output_path)
+        with atomic_write(path) as f:
+            np.savez(f, ids=table.ids, durations=table.durations, predecessor_indptr=table.predecessor_indptr,
+                     predecessor_ids=table.predecessor_ids, actual_start_time=table.actual_start_time,
+                     actual_end_time=table.actual_end_time)
+
+    def load_solved_inputs(self, output_path: str) -> Optional[TaskTable]:
+        """save_solved_inputs で保存した値（ない場合は None）"""
+        try:
+            with np.load(self.solved_inputs_path(output_path)) as saved:
+                return TaskTable(saved['ids'], [''] * len(saved['ids']), saved['durations'],
+                                 saved['predecessor_indptr'], saved['predecessor_ids'],
+                                 actual_start_time=saved['actual_start_time'],
+                                 actual_end_time=saved['actual_end_time'])
+        except (OSError, ValueError, KeyError):
+            return None
 
-    def _parse_predecessors(self, predecessor_str: str) -> List[int]:
-        if not predecessor_str or str(predecessor_str).lower() == 'nan':
-            return []
-        return [int(p) for p in str(predecessor_str).split(',') if p.strip().isdigit()]
+    def build_model(self, pinned_starts: Optional[np.ndarray] = None, sizes: Optional[np.ndarray] = None,
+                    hints: Optional[np.ndarray] = None, num_workers: Optional[int] = None,
+                    graph: Optional[PrecedenceGraph] = None) -> ScheduleModel:
+        """
+        タスクと先行関係からCP-SATモデルを構築する
+
+        pinned_starts・sizes・hints は時間単位の配列で、NaN の要素は指定なしとして扱う。
+        pinned_starts で開始を固定したタスクへの先行関係は制約に含めない。
+        実績のあるタスクは作業者数を超えて重なっていてもよいため累積制約には含めず、
+        その同時実行数を作業者数までの固定の占有として扱う。
+        num_workers を省略した場合は self.num_workers を使う。
+        graph を省略した場合は先行関係グラフをここで構築する。
+        """
+        from ortools.sat.python import cp_model  # 起動を速くするため、使用時に読み込む
+
+        num_workers = num_workers or self.num_workers
 
-    def solve_scheduling(self) -> List[Tuple[int, int, int]]:
         model = cp_model.CpModel()
         start_times = []
         end_times = []
         intervals = []
 
-        for task in self.tasks:
-            task.duration = int(task.duration * 100)  # cp-satの計算のために、小数を整数に変換
-            start = model.NewIntVar(0, 100000, f'start_{task.id}')
-            end = model.NewIntVar(0, 100000, f'end_{task.id}')
-            interval = model.NewIntervalVar(start, task.duration, end, f'interval_{task.id}')
+        # 先行関係グラフの構築（循環・存在しない先行タスクはここで検出）
+        graph = graph or PrecedenceGraph.from_table(self.table)
+
+        hours = self.table.durations
+        if sizes is not None:
+            hours = np.where(np.isnan(sizes), hours, sizes)
+        if pinned_starts is None:
+            pinned_starts = np.full(len(self.table), np.nan)
+        is_fixed = ~np.isnan(pinned_starts)
+        actual = is_fixed & self._actual_mask()
+
+        # cp-satの計算のために、時間を整数の単位に変換（タスクのデータは変更しない）
+        scale = time_scale(np.concatenate([hours, pinned_starts[is_fixed]]), TIME_GRANULARITY_HOURS)
+        durations = to_units(hours, scale, TIME_GRANULARITY_HOURS is not None)
+        fixed_starts = np.where(is_fixed, to_units(np.nan_to_num(pinned_starts), scale), -1)
+
+        # 最長経路による各タスクの開始・終了可能範囲（最早開始から上限を求め、最遅終了はその上限から求める）
+        earliest_start = graph.earliest_starts(durations, fixed_starts)
+        horizon = self.schedule_horizon(earliest_start, durations, fixed_starts, num_workers)
+        earliest_start, latest_finish = graph.compute_bounds(durations, horizon, fixed_starts, earliest_start)
+
+        for task_id, es, lf, duration in zip(self.table.ids.tolist(), earliest_start.tolist(),
+                                             latest_finish.tolist(), durations.tolist()):
+            start = model.NewIntVar(es, lf - duration, f'start_{task_id}')
+            end = model.NewIntVar(es + duration, lf, f'end_{task_id}')
+            interval = model.NewIntervalVar(start, duration, end, f'interval_{task_id}')
             start_times.append(start)
             end_times.append(end)
             intervals.append(interval)
 
         # 依存関係の追加
-        for task in self.tasks:
-            for predecessor_id in task.predecessors:
-                predecessor_index = next((i for i, t in enumerate(self.tasks) if t.id == predecessor_id), None)
-                if predecessor_index is not None:
-                    model.Add(end_times[predecessor_index] <= start_times[self.tasks.index(task)])
+        for predecessor_index, task_index in graph.edges():
+            if not is_fixed[task_index]:
+                model.Add(end_times[predecessor_index] <= start_times[task_index])
+
+        # 前回の解をヒントとして与える
+        if hints is not None:
+            for i in np.flatnonzero(~np.isnan(hints) & ~is_fixed).tolist():
+                model.AddHint(start_times[i], int(round(hints[i] * scale)))
 
-        # リソース制約
-        model.AddCumulative(intervals, [1] * len(intervals), self.num_workers)
+        # リソース制約（実績の区間は同時実行数ごとの固定区間にまとめ、作業者数までを占有する）
+        profile = UsageProfile(fixed_starts[actual], (fixed_starts + durations)[actual])
+        reserved_starts, reserved_sizes, reserved_usage = profile.segments()
+        reserved = [model.NewFixedSizeIntervalVar(start, size, f'actual_{k}') for k, (start, size) in
+                    enumerate(zip(reserved_starts.tolist(), reserved_sizes.tolist()))]
+        planned = [interval for interval, is_actual in zip(intervals, actual.tolist()) if not is_actual]
+        capacity = model.AddCumulative(
+            planned + reserved, [1] * len(planned) + np.minimum(reserved_usage, num_workers).tolist(), num_workers)
 
         # 最速完了時間の最小化
-        makespan = model.NewIntVar(0, 100000, 'makespan')
+        critical_path = int((earliest_start + durations).max()) if len(durations) else 0
+        schedule_model = ScheduleModel(model, graph, start_times, end_times, intervals, None, scale, horizon,
+                                       capacity, critical_path, int(durations[~actual].sum()),
+                                       (reserved_sizes, reserved_usage))
+        makespan = model.NewIntVar(schedule_model.lower_bound(num_workers), horizon, 'makespan')
         model.AddMaxEquality(makespan, end_times)
         model.Minimize(makespan)
+        return schedule_model._replace(makespan=makespan)
+
+    def schedule_horizon(self, earliest_start: np.ndarray, durations: np.ndarray, fixed_starts: np.ndarray,
+                         num_workers: Optional[int] = None) -> int:
+        """
+        スケジュールの上限を求める
+
+        固定されていないタスクは、固定されたタスクが全て終わった後にリストスケジューリングしても
+        総工数/作業者数 + (1 - 1/作業者数) × クリティカルパス長 以内に終わる（Graham の上界）。
+        クリティカルパス長には PrecedenceGraph.earliest_starts の最早開始から求めたもの
+        （固定されていないタスクだけの最長経路以上で、この上界以下）を使う。
+        """
+        is_fixed = fixed_starts >= 0
+        free_durations = np.where(is_fixed, 0, durations)
+        pinned_end = int((fixed_starts + durations)[is_fixed].max()) if is_fixed.any() else 0
+        critical_path = int((earliest_start + durations).max()) if len(durations) else 0
+        work = int(free_durations.sum())
+        workers = num_workers or self.num_workers
+        return pinned_end + -(-(work + (workers - 1) * critical_path) // workers)
+
+    def solve(self, options: Optional[SolverOptions] = None,
+              on_solution: Optional[Callable[[SolutionEvent], None]] = None,
+              incremental: bool = False) -> SolveResult:
+        """
+        スケジューリングを実行し、ステータス・ギャップを含む結果を返す
+
+        制限時間に達した場合も、それまでに見つかった最良の実行可能解を返す。
+        on_solution を指定すると、改善解が見つかるたびに途中経過を通知する。
+        incremental=True の場合は load_previous_schedule で読み込んだ前回の結果を
+        ヒントとし、変更されたタスクとその後続のみを再最適化する。
+        options.engine='list' の場合は CP-SAT を使わず、リストスケジューリングの解を返す。
+        """
+        options = options or SolverOptions()
+        if options.engine not in ENGINES:
+            raise ValueError(f"不明なエンジンです: {options.engine} ({', '.join(ENGINES)} のいずれか)")
+        # 先行関係グラフは求解ごとに1回だけ構築し、計画・モデル構築・リストスケジューリングで共有する
+        graph = PrecedenceGraph.from_table(self.table)
+        if incremental and self.previous_table is not None:
+            result = self._solve_model(graph, self._plan_incremental(graph), options, on_solution)
+            if result.has_solution:
+                return result
+            # 前回の結果を固定すると解がない場合（作業者数の減少など）は、実績のみ固定して解き直す
+            return self._solve_model(graph, self._plan_incremental(graph, keep_unchanged=False), options, on_solution)
+
+        pinned_starts, sizes = self._actual_pins()
+        return self._solve_model(graph, (pinned_starts, sizes, None), options, on_solution)
+
+    def solve_offsets(self, options: Optional[SolverOptions] = None) -> Tuple[SolveResult, np.ndarray, np.ndarray]:
+        """
+        日時への変換を行わずに解き、(結果, 開始オフセット, 終了オフセット) を返す
+
+        オフセットは時間単位。分割求解のワーカープロセスなど、日時が不要な場合に使用する。
+        """
+        pinned_starts, sizes = self._actual_pins()
+        return self._solve_plan(PrecedenceGraph.from_table(self.table), pinned_starts, sizes, None,
+                                options or SolverOptions(), None)
+
+    def solve_list(self, rule: str = LIST_PRIORITY_RULE) -> SolveResult:
+        """リストスケジューリングのみで解き、結果をタスクに設定する"""
+        pinned_starts, sizes = self._actual_pins()
+        graph = PrecedenceGraph.from_table(self.table)
+        result, starts, ends = self._run_list_scheduler(graph, pinned_starts, sizes, rule)
+        if result.has_solution:
+            result.results = self.apply_schedule(starts, ends)
+        return result
+
+    def sweep_headcounts(self, headcounts: Sequence[int], options: Optional[SolverOptions] = None,
+                         max_parallel: Optional[int] = None) -> List[HeadcountScenario]:
+        """
+        作業者数だけを変えた複数のシナリオを解き、作業者数の昇順で結果を返す
+
+        モデルは最少の作業者数で1回だけ構築し（その上限・開始可能範囲は人数が多くても成り立つ）、
+        シナリオごとに複製したモデルの累積制約の容量とメイクスパンの下界のみを書き換える。
+        最少人数のシナリオを先に解き、その解（人数が多くてもそのまま実行可能）を
+        ヒントとして残りのシナリオをスレッドで並列に解く。
+        各シナリオの results はオフセット（時間）で、タスクには設定しない（apply_schedule で設定する）。
+        """
+        options = options or SolverOptions()
+        counts = sorted({int(n) for n in headcounts})
+        if not counts or counts[0] < 1:
+            raise ValueError(f"作業者数は1以上で指定してください: {list(headcounts)}")
+        pinned_starts, sizes = self._actual_pins()
+        # 先行関係グラフと最長経路は作業者数によらないため、全シナリオで共有する
+        graph = PrecedenceGraph.from_table(self.table)
+        paths = longest_paths(graph, np.where(np.isnan(sizes), self.table.durations, sizes), pinned_starts)
+
+        def run(num_workers: int, hints: Optional[np.ndarray], scenario_options: SolverOptions) -> HeadcountScenario:
+            heuristic, heuristic_starts, heuristic_ends = self._run_list_scheduler(
+                graph, pinned_starts, sizes, scenario_options.priority_rule, num_workers, paths)
+            if scenario_options.engine == 'list':
+                result, starts, ends = heuristic, heuristic_starts, heuristic_ends
+            else:
+                if hints is None and scenario_options.seed_with_list:
+                    hints = heuristic_starts
+                result, starts, ends = self._run_solver(
+                    self._scenario_model(base_model, num_workers, hints), scenario_options, None)
+                result.heuristic_objective = heuristic.heuristic_objective
+                if result.status == 'UNKNOWN' and heuristic.has_solution:
+                    heuristic.wall_time += result.wall_time
+                    result, starts, ends = heuristic, heuristic_starts, heuristic_ends
+            scenario = HeadcountScenario(num_workers=num_workers, result=result)
+            if result.has_solution:
+                result.results = list(zip(self.table.ids.tolist(), starts.tolist(), ends.tolist()))
+                scenario.finish = self.date_converter.convert_offset(result.objective, is_end=True)
+            return scenario
+
+        base_model = self._build(graph, pinned_starts, sizes, None, counts[0]) if options.engine != 'list' else None
+        first = run(counts[0], None, options)
+        rest = counts[1:]
+        if not rest:
+            return [first]
+
+        # 残りのシナリオは最少人数の解をヒントにして並列に解く（CP-SAT の探索中は GIL を解放する）
+        parallel = min(len(rest), max_parallel or SWEEP_MAX_PARALLEL or os.cpu_count() or 1)
+        scenario_options = options
+        if options.num_search_workers == 0:
+            scenario_options = replace(options, num_search_workers=search_workers_per_process(parallel))
+        hints = np.array([start for _, start, _ in first.result.results]) if first.result.has_solution else None
+        with ThreadPoolExecutor(max_workers=parallel) as pool:
+            scenarios = list(pool.map(lambda n: run(n, hints, scenario_options), rest))
+        return [first] + scenarios
+
+    def _scenario_model(self, base: ScheduleModel, num_workers: int, hints: Optional[np.ndarray]) -> ScheduleModel:
+        """構築済みのモデルを複製し、作業者数とヒントだけを差し替える"""
+        model = base.model.clone()
+        proto = model.Proto()
+        cumulative = proto.constraints[base.capacity.Index()].cumulative
+        cumulative.capacity.offset = num_workers
+        # 実績による占有は作業者数までとする
+        usage = base.reserved[1]
+        first = len(cumulative.demands) - len(usage)
+        for k, value in enumerate(np.minimum(usage, num_workers).tolist()):
+            cumulative.demands[first + k].offset = value
+        proto.variables[base.makespan.Index()].domain[0] = base.lower_bound(num_workers)
+        model.clear_hints()
+        if hints is not None:
+            for variable, value in zip(base.start_times, to_units(hints, base.scale).tolist()):
+                model.AddHint(model.get_int_var_from_proto_index(variable.Index()), value)
+        return base._replace(model=model)
+
+    def _build(self, graph: PrecedenceGraph, pinned_starts: np.ndarray, sizes: np.ndarray,
+               hints: Optional[np.ndarray], num_workers: Optional[int] = None) -> ScheduleModel:
+        """計測付きでモデルを構築する"""
+        with self.profiler.stage('build') as record:
+            schedule_model = self.build_model(pinned_starts, sizes, hints, num_workers, graph)
+            proto = schedule_model.model.Proto()
+            record.update(tasks=len(self.table), edges=len(schedule_model.graph.sources),
+                          scale=schedule_model.scale, horizon=schedule_model.horizon,
+                          variables=len(proto.variables), constraints=len(proto.constraints))
+        return schedule_model
+
+    def _solve_model(self, graph: PrecedenceGraph, plan: Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]],
+                     options: SolverOptions, on_solution: Optional[Callable[[SolutionEvent], None]]) -> SolveResult:
+        result, starts, ends = self._solve_plan(graph, *plan, options, on_solution)
+        if result.has_solution:
+            result.results = self.apply_schedule(starts, ends)
+        return result
+
+    def _solve_plan(self, graph: PrecedenceGraph, pinned_starts: np.ndarray, sizes: np.ndarray,
+                    hints: Optional[np.ndarray],
+                    options: SolverOptions, on_solution: Optional[Callable[[SolutionEvent], None]]
+                    ) -> Tuple[SolveResult, np.ndarray, np.ndarray]:
+        """
+        指定されたエンジンで (固定開始, 所要時間, ヒント) の計画を解く
+
+        CP-SAT を使う場合も、seed_with_list が有効ならリストスケジューリングの解をヒントにし、
+        制限時間内に CP-SAT が解を見つけられなければその解を返す。
+        """
+        if options.engine == 'list':
+            return self._run_list_scheduler(graph, pinned_starts, sizes, options.priority_rule)
+        if not options.seed_with_list:
+            return self._run_solver(self._build(graph, pinned_starts, sizes, hints), options, on_solution)
+
+        heuristic, heuristic_starts, heuristic_ends = self._run_list_scheduler(
+            graph, pinned_starts, sizes, options.priority_rule)
+        hints = heuristic_starts if hints is None else np.where(np.isnan(hints), heuristic_starts, hints)
+        result, starts, ends = self._run_solver(self._build(graph, pinned_starts, sizes, hints), options, on_solution)
+        result.heuristic_objective = heuristic.heuristic_objective
+        if result.status == 'UNKNOWN' and heuristic.has_solution:
+            heuristic.wall_time += result.wall_time
+            return heuristic, heuristic_starts, heuristic_ends
+        return result, starts, ends
+
+    def _run_list_scheduler(self, graph: PrecedenceGraph, pinned_starts: np.ndarray, sizes: np.ndarray, rule: str,
+                            num_workers: Optional[int] = None,
+                            paths: Optional[Tuple[np.ndarray, np.ndarray]] = None
+                            ) -> Tuple[SolveResult, np.ndarray, np.ndarray]:
+        """
+        リストスケジューリングで解き、(結果, 開始オフセット, 終了オフセット) を返す
+
+        paths は求め済みの longest_paths の (最早開始, 終端までの最長経路長)（省略した場合はここで求める）。
+        """
+        num_workers = num_workers or self.num_workers
+        with self.profiler.stage('list_schedule', rule=rule, num_workers=num_workers) as record:
+            durations = np.where(np.isnan(sizes), self.table.durations, sizes)
+            head, tail = paths if paths is not None else longest_paths(graph, durations, pinned_starts)
+            starts, ends = list_schedule(graph, durations, num_workers, priorities(head, tail, rule), pinned_starts)
+
+            objective = float(ends.max()) if len(ends) else 0.0
+            best_bound = self.makespan_bound(head, durations, pinned_starts, num_workers)
+            if exceeds_capacity(starts, ends, num_workers, ~np.isnan(pinned_starts) & self._actual_mask()):
+                status = 'INFEASIBLE'  # 前回の結果に固定したタスクが作業者数を超えて重なっている
+            else:
+                status = 'OPTIMAL' if objective <= best_bound + 1e-9 else 'FEASIBLE'
+            result = SolveResult(
+                status=status,
+                objective=objective,
+                best_bound=best_bound,
+                gap=(objective - best_bound) / max(objective, 1e-9),
+                engine='list',
+                heuristic_objective=objective if status != 'INFEASIBLE' else None,
+            )
+            record.update(status=result.status, objective=objective, best_bound=best_bound, gap=result.gap)
+        result.wall_time = record['wall_time']
+        return result, starts, ends
+
+    def makespan_bound(self, head: np.ndarray, durations: np.ndarray, pinned_starts: np.ndarray,
+                       num_workers: Optional[int] = None) -> float:
+        """
+        メイクスパンの下界（時間）
+
+        最長経路（longest_paths の最早開始 head + 所要時間）と、総工数/作業者数のうち大きい方。
+        実績の区間は作業者数までの占有として数える。
+        """
+        num_workers = num_workers or self.num_workers
+        actual = ~np.isnan(pinned_starts) & self._actual_mask()
+        _, sizes, usage = UsageProfile(pinned_starts[actual], (pinned_starts + durations)[actual]).segments()
+        work = float(durations[~actual].sum() + (sizes * np.minimum(usage, num_workers)).sum())
+        return max(float((head + durations).max()) if len(head) else 0.0, work / num_workers)
+
+    def _run_solver(self, schedule_model: ScheduleModel, options: SolverOptions,
+                    on_solution: Optional[Callable[[SolutionEvent], None]]) -> Tuple[SolveResult, np.ndarray, np.ndarray]:
+        from ortools.sat.python import cp_model
+        from src.services.solution_callback import ScheduleSolutionCallback
 
         # 解の取得
         solver = cp_model.CpSolver()
-        status = solver.Solve(model)
-
-        results = []
-        if status == cp_model.OPTIMAL:
-            for i, task in enumerate(self.tasks):
-                start_time = solver.Value(start_times[i]) /100
-                end_time = solver.Value(end_times[i]) / 100
-                
-                # CP-SATによる推定開始・終了時間の設定
-                task.cp_estimated_start_time, task.cp_estimated_end_time = self.date_converter.convert_to_datetime(start_time, end_time)
-                
-                # 手動入力の予想終了時間との差を計算
-                if task.target_end_time:
-                    task.difference = (task.target_end_time - task.cp_estimated_end_time).total_seconds() / 3600
-                results.append((task.id, start_time, end_time))
-        
-        return results
+        solver.parameters.num_search_workers = options.num_search_workers
+        if options.max_time_in_seconds is not None:
+            solver.parameters.max_time_in_seconds = options.max_time_in_seconds
+        if options.relative_gap_limit is not None:
+            solver.parameters.relative_gap_limit = options.relative_gap_limit
+        solver.parameters.log_search_progress = options.log_search_progress
+
+        callback = None
+        if on_solution is not None:
+            callback = ScheduleSolutionCallback(
+                self.table.ids.tolist(), schedule_model.start_times,
+                schedule_model.end_times, schedule_model.scale, on_solution,
+            )
+        with self.profiler.stage('solve') as record:
+            status = solver.Solve(schedule_model.model, callback)
+
+        result = SolveResult(status=solver.StatusName(status), wall_time=solver.WallTime())
+        record.update(
+            status=result.status,
+            conflicts=solver.NumConflicts(),
+            branches=solver.NumBranches(),
+            solver_wall_time=solver.WallTime(),
+            num_search_workers=options.num_search_workers,
+        )
+        starts = ends = np.empty(0)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            scale = schedule_model.scale
+            result.objective = solver.ObjectiveValue() / scale
+            result.best_bound = solver.BestObjectiveBound() / scale
+            result.gap = (result.objective - result.best_bound) / max(result.objective, 1e-9)
+            solution = np.asarray(solver.ResponseProto().solution)
+            starts = solution[[v.Index() for v in schedule_model.start_times]] / scale
+            ends = solution[[v.Index() for v in schedule_model.end_times]] / scale
+            record.update(objective=result.objective, best_bound=result.best_bound, gap=result.gap)
+
+        return result, starts, ends
+
+    def _actual_pins(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        実績開始・終了時間のあるタスクを固定区間とする (固定開始, 所要時間)
+
+        起点より前の実績はオフセット 0 に丸められるため、固定区間は起点以降の部分のみとなる
+        （起点より前に終わったタスクは長さ 0）。
+        工数が未設定（空欄）または負のタスクがある場合は ValueError を送出する。
+        """
+        invalid = self.table.ids[~(np.nan_to_num(self.table.durations, nan=-1) >= 0)]
+        if len(invalid):
+            raise ValueError(f"工数が未設定または負のタスクがあります: {invalid.tolist()}")
+        actual_starts = self.date_converter.to_offsets(self.table.actual_start_time)
+        actual_ends = self.date_converter.to_offsets(self.table.actual_end_time)
+        durations = self.table.durations
+
+        # 終了実績のみの場合は予想工数から開始を逆算
+        pinned_starts = np.where(np.isnan(actual_starts), np.maximum(actual_ends - durations, 0), actual_starts)
+        sizes = np.where(np.isnan(actual_ends), np.nan, np.maximum(actual_ends - pinned_starts, 0))
+        return pinned_starts, sizes
+
+    def _actual_mask(self) -> np.ndarray:
+        """実績のあるタスク（作業者数を超えて重なっていてもよい）"""
+        return ~np.isnat(self.table.actual_start_time) | ~np.isnat(self.table.actual_end_time)
+
+    def _plan_incremental(self, graph: PrecedenceGraph,
+                          keep_unchanged: bool = True) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        差分再スケジューリングの (固定開始, 所要時間, ヒント) を求める
+
+        実績のあるタスクは固定し、前回から変更のないタスク（変更タスクの後続を除く）は
+        前回の開始時間に固定する。それ以外は前回の開始時間をヒントとして再最適化する。
+        """
+        table = self.table
+        found = self.previous_table.indices_of(table.ids)
+        is_new = found < 0
+        previous = self.previous_table.take(np.where(is_new, 0, found)) if len(self.previous_table) else table
+        hints = self.date_converter.to_offsets(
+            np.where(is_new, np.datetime64('NaT', 's'), previous.cp_estimated_start_time)
+        )
+        pinned_starts, sizes = self._actual_pins()
+        if not keep_unchanged:
+            return pinned_starts, sizes, hints
+
+        def differs(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+            return (a != b) & ~(np.isnat(a) & np.isnat(b))
+
+        # 工数・先行タスク・実績が変わったタスクと、前回の結果がないタスク
+        changed = (
+            is_new
+            | (previous.durations != table.durations)
+            | table.predecessors_differ(previous)
+            | differs(previous.actual_start_time, table.actual_start_time)
+            | differs(previous.actual_end_time, table.actual_end_time)
+            | np.isnan(hints)
+        )
+        affected = graph.descendants(changed)
+
+        pinned_starts = np.where(np.isnan(pinned_starts) & ~affected, hints, pinned_starts)
+        return pinned_starts, sizes, hints
+
+    def solve_scheduling(self, options: Optional[SolverOptions] = None,
+                         on_solution: Optional[Callable[[SolutionEvent], None]] = None) -> List[Tuple[int, int, int]]:
+        return self.solve(options, on_solution).results
+
+    def apply_schedule(self, starts: np.ndarray, ends: np.ndarray) -> List[Tuple[int, int, int]]:
+        """開始・終了オフセット（時間）を日時に変換してタスクに設定する"""
+        with self.profiler.stage('convert', tasks=len(self.table)):
+            return self._convert_schedule(starts, ends)
+
+    def _convert_schedule(self, starts: np.ndarray, ends: np.ndarray) -> List[Tuple[int, int, int]]:
+        # CP-SATによる推定開始・終了時間を一括で変換
+        start_datetimes, end_datetimes = self.date_converter.convert_batch(starts, ends)
+
+        # 手動入力の予想終了時間との差を一括で計算
+        table = self.table
+        differences = self.date_converter.compute_differences(table.target_end_time, end_datetimes)
+
+        table.cp_estimated_start_time = start_datetimes
+        table.cp_estimated_end_time = end_datetimes
+        table.difference = np.where(np.isnan(differences), table.difference, differences)
+        return list(zip(table.ids.tolist(), starts.tolist(), ends.tolist()))
+
+    def export_results(self, output_paths: Sequence[str], sheet_name: str = DEFAULT_SHEET_NAME):
+        """結果を拡張子に応じた形式（.xlsx / .csv / .jsonl / .parquet / .html）で各ファイルに書き出す"""
+        from src.utils.schedule_sinks import sink_for
+
+        for path in output_paths:
+            with self.profiler.stage('export', file=path, tasks=len(self.table)):
+                with sink_for(path, sheet_name=sheet_name) as sink:
+                    sink.write(self.table)
 
     def export_results_to_excel(self, output_file_path: str, sheet_name: str, scheduling_results: List[Tuple[int, int, int]]):
-        self.excel_handler.export_results(output_file_path, sheet_name, self.tasks, scheduling_results)
\ No newline at end of file
+        self.export_results([output_file_path], sheet_name)
+        self.save_solved_inputs(output_file_path)
+        if WRITE_RUN_STATS:
+            self.profiler.write_sidecar(output_file_path)
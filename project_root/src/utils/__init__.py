@@ -0,0 +1,28 @@
+"""
+ユーティリティ。
+
+各クラスは初回アクセス時にモジュールを読み込む（PEP 562）ため、
+`import src.utils` だけでは openpyxl・pandas などの重い依存を読み込みません。
+"""
+from .lazy_exports import lazy_exports
+
+# 公開名 → 定義しているモジュール
+_EXPORTS = {
+    'DateConverter': 'data_converter',
+    'ExcelHandler': 'excel_handler',
+    'GanttExporter': 'gantt_exporter',
+    'RiskExporter': 'risk_exporter',
+    'ScheduleSink': 'schedule_sinks',
+    'sink_for': 'schedule_sinks',
+    'WbsReader': 'wbs_reader',
+    'RunProfiler': 'run_profiler',
+    'AtomicFile': 'file_io',
+    'atomic_write': 'file_io',
+    'search_workers_per_process': 'parallel',
+    'ORANGE_FILL': 'style_constants',
+    'THIN_BORDER': 'style_constants',
+}
+
+__all__ = list(_EXPORTS)
+
+__getattr__, __dir__ = lazy_exports(globals(), _EXPORTS)
@@ -1,7 +0,0 @@
-# エクスポートする項目を指定
-__all__ = ['DateConverter', 'ExcelHandler', 'ORANGE_FILL', 'THIN_BORDER']
-
-# 必要なモジュールを相対インポート
-from .data_converter import DateConverter
-from .excel_handler import ExcelHandler
-from .style_constants import ORANGE_FILL, THIN_BORDER
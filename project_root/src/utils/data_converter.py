@@ -1,8 +1,10 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Tuple
+from src.models.task_table import to_datetime64
 from src.services.calendar_service import CalendarService
+from src.services.calendar_store import to_day
 from src.config.settings import *
-import pandas as pd
+import numpy as np
 
 class DateConverter:
     def __init__(self, start_date: datetime):
@@ -11,54 +13,72 @@ class DateConverter:
         self.LUNCH_PERIOD_START = 3
         self.LUNCH_PERIOD_END = 4
         self.WORK_HOURS_PER_DAY = 9
+        self._calendar = None
+        self._base_index = 0
+
+    @property
+    def calendar(self):
+        """稼働カレンダー（初回アクセス時に一度だけ構築）"""
+        if self._calendar is None:
+            start = to_day(self.start_date).item()
+            end = max(start + timedelta(days=CALENDAR_SPAN_DAYS), date(CALENDAR_LAST_YEAR, 12, 31))
+            self._calendar = CalendarService.get_work_calendar(
+                start,
+                end,
+                work_start_hour=self.WORK_START_HOUR,
+                work_hours_per_day=self.WORK_HOURS_PER_DAY,
+                lunch_period_start=self.LUNCH_PERIOD_START,
+                lunch_period_end=self.LUNCH_PERIOD_END,
+            )
+            # 開始日が休日の場合は次の稼働日を起点とする
+            self._base_index = self._calendar.first_working_index(start)
+        return self._calendar
 
     def convert_to_datetime(self, task_start: int, task_end: int) -> tuple[datetime, datetime]:
         """
         タスクの開始時間と終了時間をdatetime型に変換
-        """
-        WORK_START_HOUR = 9      # 勤務開始時間
-        WORK_HOURS_PER_DAY = 9   # 1日の稼働時間時間
-        LUNCH_PERIOD_START = 3   # 昼休憩開始時間
-        LUNCH_PERIOD_END = 4     # 昼休憩終了時間
-
-        # カレンダー取得
-        calendar_df = CalendarService.get_calendar_data(2025, PROJECT_START_DATE, PROJECT_END_DATE)
 
-        # 昼休憩を考慮した時間調整
-        def adjust_for_lunch(hours: int) -> int:
-            """昼休憩を考慮して実際の経過時間を計算"""
-            days = hours // WORK_HOURS_PER_DAY
-            remaining_hours = hours % WORK_HOURS_PER_DAY
-            if remaining_hours >= LUNCH_PERIOD_START:  # 昼休憩時間を超える場合
-                remaining_hours += 1  # 昼休憩時間分を加算
-            return days, remaining_hours
+        稼働日インデックスを用いるため、休日・昼休憩を考慮した変換を O(1) で行う
+        """
+        calendar = self.calendar
+        start_time = calendar.offset_to_datetime(self._base_index, task_start)
+        end_time = calendar.offset_to_datetime(self._base_index, task_end, is_end=True)
+        return start_time, end_time
 
-        # 休日判定
-        def is_holiday(date: datetime) -> bool:
-            return calendar_df.loc[calendar_df['date'].dt.date == date.date(), 'holiday_name'].notna().any()
+    def convert_offset(self, hours: float, is_end: bool = False) -> datetime:
+        """
+        1つのオフセット（起点からの稼働時間）を datetime に変換
 
-        # 開始時間・終了時間の計算
-        start_days, start_remaining = adjust_for_lunch(task_start)
-        end_days, end_remaining = adjust_for_lunch(task_end)
+        is_end=True の場合は終了時刻として扱う（日の区切りは前日の終業時刻とする）
+        """
+        return self.calendar.offset_to_datetime(self._base_index, hours, is_end)
 
-        # 終了時間の調整
-        if end_remaining == 0 and end_days != 0:
-            end_days -= 1
-            end_remaining = WORK_HOURS_PER_DAY
+    def convert_batch(self, task_starts: np.ndarray, task_ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        全タスクの開始時間・終了時間を一括でdatetime64配列に変換
 
-        # 開始・終了時刻の設定
-        start_date = pd.to_datetime(self.start_date)
+        昼休憩・日の区切り・休日の考慮をすべて配列演算で行う
+        """
+        calendar = self.calendar
+        start_times = calendar.offsets_to_datetime64(self._base_index, task_starts)
+        end_times = calendar.offsets_to_datetime64(self._base_index, task_ends, is_end=True)
+        return start_times, end_times
 
-        start_time = start_date + timedelta(days=start_days, hours=start_remaining + WORK_START_HOUR)
-        end_time = start_date + timedelta(days=end_days, hours=end_remaining + WORK_START_HOUR)
+    def to_offsets(self, datetimes) -> np.ndarray:
+        """
+        日時のリストを起点からの稼働時間（オフセット）に一括で逆変換
 
-        # 休日を考慮して調整
-        while is_holiday(start_time):
-            start_time += timedelta(days=1)
-        #     start_time = start_time.replace(hour=WORK_START_HOUR)
+        未設定(None・NaT)の要素は NaN を返す
+        """
+        calendar = self.calendar
+        return calendar.datetime64_to_offsets(self._base_index, to_datetime64(datetimes))
 
-        while is_holiday(end_time):
-            end_time += timedelta(days=1)
-        #     end_time = end_time.replace(hour=WORK_START_HOUR)
+    @staticmethod
+    def compute_differences(target_end_times: np.ndarray, end_times: np.ndarray) -> np.ndarray:
+        """
+        目標終了時間と推定終了時間の差（時間）を一括で計算
 
-        return start_time, end_time
\ No newline at end of file
+        目標終了時間が未設定(NaT)のタスクは NaN を返す
+        """
+        delta = np.asarray(target_end_times, dtype='datetime64[s]') - np.asarray(end_times, dtype='datetime64[s]')
+        return delta / np.timedelta64(1, 'h')
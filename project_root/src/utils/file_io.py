@@ -0,0 +1,46 @@
+import os
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
+
+
+class AtomicFile:
+    """
+    一時ファイル経由でのファイルの置き換え。
+
+    tmp_path に書き出してから commit で path に置き換えるため、書き出しの途中で失敗しても
+    既存のファイルは壊れません。with 文では一時ファイルのパスを返し、例外がなければ置き換え、
+    例外の場合は一時ファイルを削除します。
+
+    Args:
+        path (str): 出力先
+        suffix (str): 一時ファイル名の末尾（拡張子で形式を判定するライブラリ向け。例: '.xlsx'）
+    """
+
+    def __init__(self, path: str, suffix: str = ''):
+        self.path = path
+        self.tmp_path = f'{path}.{os.getpid()}.tmp{suffix}'
+
+    def __enter__(self) -> str:
+        return self.tmp_path
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+
+    def commit(self):
+        """一時ファイルで出力先を置き換える"""
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        """一時ファイルを削除する（出力先はそのまま）"""
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'wb', encoding: Optional[str] = None) -> Iterator[IO]:
+    """一時ファイルを開いて返し、書き終えたら path に置き換える"""
+    with AtomicFile(path) as tmp_path, open(tmp_path, mode, encoding=encoding) as f:
+        yield f
@@ -0,0 +1,196 @@
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple, Union
+import numpy as np
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.formatting.formatting import ConditionalFormattingList
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.styles import Border, PatternFill
+from openpyxl.utils import get_column_letter
+from src.models.task import Task
+from src.models.task_table import TaskTable
+from src.utils.file_io import AtomicFile
+from src.utils.style_constants import ORANGE_FILL, THIN_BORDER
+from src.config.settings import *
+
+HEADER_ROW = 2           # 見出し行（カレンダーの日付もこの行に書く）
+FIRST_DATA_ROW = 3
+START_COLUMN = 4         # D列: 開始日(予想)
+END_COLUMN = 5           # E列: 終了日(予想)
+CALENDAR_COLUMN = 11     # K列: ガントチャートの開始列
+
+MODES = ('fill', 'conditional', 'write_only')
+
+
+class GanttExporter:
+    """
+    スケジュール結果とガントチャートのExcel出力。
+
+    Args:
+        mode (str): 'fill' はセルごとに塗りつぶし、'conditional' はシートに1つの条件付き書式で
+            バーを描画、'write_only' は行をストリーミングで書き出す（大規模な計画向け）。
+            'write_only' はブック全体を値のみで書き直すため、セルの書式・列幅などが失われる。
+            明示的に指定した場合のみ使い、None の場合は 'conditional' とする。
+    """
+
+    def __init__(self, mode: Optional[str] = GANTT_EXPORT_MODE):
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"不明な出力モードです: {mode} ({', '.join(MODES)} のいずれか)")
+        self.mode = mode
+
+    def export(self, file_path: str, sheet_name: str, tasks: Union[TaskTable, List[Task]]):
+        """結果をExcelファイルに出力する"""
+        table = tasks if isinstance(tasks, TaskTable) else TaskTable.from_tasks(tasks)
+        row_of_id = dict(zip(table.ids.tolist(), range(len(table))))
+        starts = table.cp_estimated_start_time.tolist()
+        ends = table.cp_estimated_end_time.tolist()
+        days = self.date_range(table)
+        mode = self.mode or 'conditional'
+
+        if mode == 'write_only':
+            self._export_write_only(file_path, sheet_name, row_of_id, starts, ends, days)
+            return
+
+        workbook = openpyxl.load_workbook(file_path)
+        sheet = workbook[sheet_name]
+        for i, day in enumerate(days):
+            sheet.cell(row=HEADER_ROW, column=CALENDAR_COLUMN + i, value=day).number_format = 'm/d'
+        # 前回のカレンダーの方が長い場合は、範囲外の日付を消す（条件付き書式のバーも日付がなければ描かれない）
+        stale_column = CALENDAR_COLUMN + len(days)
+        for column in range(stale_column, sheet.max_column + 1):
+            sheet.cell(row=HEADER_ROW, column=column).value = None
+
+        last_row = HEADER_ROW
+        for row in sheet.iter_rows(min_row=FIRST_DATA_ROW, max_col=END_COLUMN):
+            task_id = row[0].value
+            if task_id is None:
+                break
+            last_row = row[0].row
+
+            i = row_of_id.get(task_id)
+            if i is not None:
+                row[START_COLUMN - 1].value = starts[i]
+                row[END_COLUMN - 1].value = ends[i]
+                if mode == 'fill':
+                    self._fill_row(sheet, row[0].row, starts[i], ends[i], days)
+
+        if mode == 'fill' and sheet.max_column >= stale_column and last_row >= FIRST_DATA_ROW:
+            self._clear_cells(sheet, stale_column, last_row)
+        if mode == 'conditional' and last_row >= FIRST_DATA_ROW:
+            self._add_bar_rule(sheet, len(days), last_row)
+
+        workbook.save(file_path)
+
+    @staticmethod
+    def date_range(table: TaskTable) -> List[date]:
+        """スケジュールの最初の開始日から最後の終了日までの日付"""
+        starts = table.cp_estimated_start_time[~np.isnat(table.cp_estimated_start_time)]
+        ends = table.cp_estimated_end_time[~np.isnat(table.cp_estimated_end_time)]
+        if not len(starts) or not len(ends):
+            return []
+        first, last = starts.min().astype('datetime64[D]'), ends.max().astype('datetime64[D]')
+        return np.arange(first, last + 1).tolist()
+
+    @staticmethod
+    def _bar_columns(start: Optional[datetime], end: Optional[datetime], days: List[date]) -> Tuple[int, int]:
+        """タスクのバーが占める列の範囲 [開始, 終了)（カレンダー先頭からの位置）"""
+        if not start or not end:
+            return 0, 0
+        first = days[0]
+        return (start.date() - first).days, (end.date() - first).days + 1
+
+    def _fill_row(self, sheet, row_index: int, start: Optional[datetime], end: Optional[datetime], days: List[date]):
+        bar_start, bar_end = self._bar_columns(start, end, days)
+        for i in range(len(days)):
+            cell = sheet.cell(row=row_index, column=CALENDAR_COLUMN + i)
+            cell.border = THIN_BORDER
+            if bar_start <= i < bar_end:
+                cell.fill = ORANGE_FILL
+
+    @staticmethod
+    def _clear_cells(sheet, first_column: int, last_row: int):
+        """前回の 'fill' で塗った、カレンダー範囲外のセルの塗りつぶし・罫線を消す"""
+        for row in sheet.iter_rows(min_row=FIRST_DATA_ROW, max_row=last_row, min_col=first_column):
+            for cell in row:
+                if cell.has_style:
+                    cell.fill = PatternFill()
+                    cell.border = Border()
+
+    @staticmethod
+    def _add_bar_rule(sheet, num_days: int, last_row: int):
+        """
+        カレンダー範囲にバーの条件付き書式を1つ設定（前回の設定は置き換える）
+
+        バーのセルは塗りつぶしと罫線で描く。セルごとの書式は持たない。
+        """
+        first_col = get_column_letter(CALENDAR_COLUMN)
+        last_col = get_column_letter(CALENDAR_COLUMN + num_days - 1)
+        start_col = get_column_letter(START_COLUMN)
+        end_col = get_column_letter(END_COLUMN)
+        cell_range = f'{first_col}{FIRST_DATA_ROW}:{last_col}{last_row}'
+
+        rules = ConditionalFormattingList()
+        for formatting in sheet.conditional_formatting:
+            if not str(formatting.sqref).startswith(f'{first_col}{FIRST_DATA_ROW}:'):
+                for rule in formatting.rules:
+                    rules.add(str(formatting.sqref), rule)
+        sheet.conditional_formatting = rules
+        if not num_days:
+            return
+
+        bar = (f'AND(ISNUMBER(${start_col}{FIRST_DATA_ROW}),'
+               f'{first_col}${HEADER_ROW}>=INT(${start_col}{FIRST_DATA_ROW}),'
+               f'{first_col}${HEADER_ROW}<=INT(${end_col}{FIRST_DATA_ROW}))')
+        sheet.conditional_formatting.add(cell_range, FormulaRule(formula=[bar], fill=ORANGE_FILL, border=THIN_BORDER))
+
+    def _export_write_only(self, file_path: str, sheet_name: str, row_of_id: Dict[int, int],
+                           starts: List[Optional[datetime]], ends: List[Optional[datetime]], days: List[date]):
+        """
+        元のブックを read_only で読み、write_only のブックへ行をストリーミングで書き出す
+
+        ガントチャートのバーは条件付き書式で描画するため、セルごとの書式は持たない。
+        全シートを値のみで書き直すため、元のブックの書式・列幅・結合セルなどは引き継がれない。
+        """
+        source = openpyxl.load_workbook(file_path, read_only=True)
+        target = openpyxl.Workbook(write_only=True)
+        try:
+            for source_sheet in source.worksheets:
+                sheet = target.create_sheet(source_sheet.title)
+                if source_sheet.title != sheet_name:
+                    for values in source_sheet.iter_rows(values_only=True):
+                        sheet.append(values)
+                    continue
+
+                last_row = HEADER_ROW
+                in_data = True
+                for row_index, values in enumerate(source_sheet.iter_rows(values_only=True), start=1):
+                    values = list(values)
+                    if row_index == HEADER_ROW:
+                        values = values[:CALENDAR_COLUMN - 1] + [None] * (CALENDAR_COLUMN - 1 - len(values))
+                        values += [self._date_cell(sheet, day) for day in days]
+                    elif row_index >= FIRST_DATA_ROW and in_data:
+                        task_id = values[0] if values else None
+                        if task_id is None:
+                            in_data = False
+                        else:
+                            last_row = row_index
+                            i = row_of_id.get(task_id)
+                            if i is not None:
+                                values += [None] * (END_COLUMN - len(values))
+                                values[START_COLUMN - 1] = starts[i]
+                                values[END_COLUMN - 1] = ends[i]
+                    sheet.append(values)
+
+                if days and last_row >= FIRST_DATA_ROW:
+                    self._add_bar_rule(sheet, len(days), last_row)
+        finally:
+            source.close()
+
+        with AtomicFile(file_path, suffix='.xlsx') as tmp_path:
+            target.save(tmp_path)
+
+    @staticmethod
+    def _date_cell(sheet, day: date) -> WriteOnlyCell:
+        cell = WriteOnlyCell(sheet, value=day)
+        cell.number_format = 'm/d'
+        return cell
@@ -0,0 +1,29 @@
+import importlib
+from typing import Callable, Dict, List, Tuple
+
+
+def lazy_exports(namespace: dict, exports: Dict[str, str]) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """
+    パッケージの公開名を初回アクセス時に読み込む __getattr__ と __dir__ を返す（PEP 562）
+
+    Args:
+        namespace (dict): パッケージの globals()
+        exports (dict): 公開名 → 定義しているモジュール（パッケージからの相対名）
+
+    Returns:
+        tuple: (__getattr__, __dir__)
+    """
+    package = namespace['__name__']
+
+    def __getattr__(name):
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(f'.{module}', package), name)
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(list(namespace) + list(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,6 @@
+import os
+
+
+def search_workers_per_process(processes: int) -> int:
+    """processes 個のプロセスを並列に動かす場合の、1プロセスあたりの CP-SAT 探索ワーカー数（CPU コアを等分）"""
+    return max(1, (os.cpu_count() or 1) // max(1, processes))
@@ -0,0 +1,80 @@
+import numpy as np
+import openpyxl
+from src.models.risk import RiskReport
+from src.models.task_table import TaskTable
+from src.utils.data_converter import DateConverter
+from src.config.settings import *
+
+SUMMARY_ROW = 1
+HEADER_ROW = 2
+FIRST_DATA_ROW = 3
+DATETIME_FORMAT = 'yyyy/m/d h:mm'
+
+
+class RiskExporter:
+    """
+    リスク分析の結果をブックのシートに出力する。
+
+    タスクごとに 工数(予想)どおりの終了日と目標終了時間との差分を並べ、その隣に
+    パーセンタイルごとの終了日・差分とクリティカル度を書き出します。1行目には完了日のパーセンタイルを書きます。
+    シートが既にある場合は置き換えます。
+    """
+
+    def __init__(self, sheet_name: str = RISK_SHEET_NAME):
+        self.sheet_name = sheet_name
+
+    def export(self, file_path: str, table: TaskTable, report: RiskReport):
+        workbook = openpyxl.load_workbook(file_path)
+        if self.sheet_name in workbook.sheetnames:
+            del workbook[self.sheet_name]
+        sheet = workbook.create_sheet(self.sheet_name)
+
+        percents = sorted(report.end_dates)
+        summary = [f'試行数 {report.samples}（{report.distribution}）',
+                   f'基準 {report.baseline_makespan:g}時間']
+        summary += [f'P{percent} {_format(report.finish_dates.get(percent))}（{report.finish_percentiles[percent]:.2f}時間）'
+                    for percent in percents]
+        for column, value in enumerate(summary, start=1):
+            sheet.cell(row=SUMMARY_ROW, column=column, value=value)
+
+        header = ['タスク番号', 'タスク名', '工数(予想)', '目標終了時間', '終了日(基準)', '差分']
+        for percent in percents:
+            header += [f'終了日(P{percent})', f'差分(P{percent})']
+        header.append('クリティカル度')
+        for column, value in enumerate(header, start=1):
+            sheet.cell(row=HEADER_ROW, column=column, value=value)
+
+        columns = [
+            table.ids.tolist(),
+            table.names.tolist(),
+            table.durations.tolist(),
+            _cells(table.target_end_time),
+            _cells(report.baseline_end_dates),
+            _differences(table.target_end_time, report.baseline_end_dates),
+        ]
+        for percent in percents:
+            columns += [_cells(report.end_dates[percent]), _differences(table.target_end_time, report.end_dates[percent])]
+        columns.append(np.round(report.criticality, 3).tolist())
+
+        datetime_columns = {4, 5} | {7 + 2 * i for i in range(len(percents))}
+        for row_index, values in enumerate(zip(*columns), start=FIRST_DATA_ROW):
+            for column, value in enumerate(values, start=1):
+                cell = sheet.cell(row=row_index, column=column, value=value)
+                if column in datetime_columns and value is not None:
+                    cell.number_format = DATETIME_FORMAT
+        workbook.save(file_path)
+
+
+def _cells(values: np.ndarray) -> list:
+    """datetime64 の配列をセルの値（未設定は None）にする"""
+    return np.asarray(values, dtype='datetime64[s]').tolist()
+
+
+def _differences(target_end_times: np.ndarray, end_times: np.ndarray) -> list:
+    """目標終了時間との差（時間、目標が未設定の場合は None）"""
+    differences = DateConverter.compute_differences(target_end_times, end_times)
+    return [None if np.isnan(value) else round(value, 2) for value in differences.tolist()]
+
+
+def _format(value) -> str:
+    return value.strftime('%Y/%m/%d %H:%M') if value else '-'
@@ -0,0 +1,78 @@
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import resource  # Windows には無い
+except ImportError:
+    resource = None
+
+
+def _max_rss_bytes() -> Optional[int]:
+    """プロセスの最大常駐メモリ（取得できない環境では None）"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if os.uname().sysname == 'Darwin' else rss * 1024
+
+
+class RunProfiler:
+    """
+    スケジューリング実行の段階ごとの計測。
+
+    各段階の経過時間・CPU時間・ピークメモリと、タスク数・制約数・ソルバー統計などの値を記録し、
+    出力ブックの隣に JSON のサイドカーファイルとして書き出します。
+
+    Args:
+        trace_memory (bool): True の場合は tracemalloc で段階ごとのピークメモリを計測する（処理は遅くなる）。
+            False の場合はプロセスの最大常駐メモリを記録する。
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: List[Dict] = []
+        self.started_at = datetime.now()
+
+    @contextmanager
+    def stage(self, name: str, **values):
+        """段階を計測するコンテキスト。yield された dict に値を追加できる"""
+        record = {'stage': name, **values}
+        own_trace = self.trace_memory and not tracemalloc.is_tracing()
+        if own_trace:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_time'] = time.perf_counter() - wall
+            record['cpu_time'] = time.process_time() - cpu
+            if self.trace_memory:
+                record['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+                if own_trace:
+                    tracemalloc.stop()
+            else:
+                record['max_rss_bytes'] = _max_rss_bytes()
+            self.stages.append(record)
+
+    @staticmethod
+    def sidecar_path(output_path: str) -> str:
+        return f'{os.path.splitext(output_path)[0]}.stats.json'
+
+    def write_sidecar(self, output_path: str) -> str:
+        """計測結果を出力ブックの隣（<出力ファイル名>.stats.json）に書き出す"""
+        path = self.sidecar_path(output_path)
+        report = {
+            'output': os.path.basename(output_path),
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total_wall_time': sum(stage['wall_time'] for stage in self.stages),
+            'stages': self.stages,
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+        return path
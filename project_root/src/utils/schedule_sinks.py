@@ -0,0 +1,315 @@
+"""
+スケジュール結果の出力先（シンク）。
+
+各シンクは TaskTable を SINK_CHUNK_ROWS 行ずつ受け取り、ファイルへ逐次書き出します。
+Excel 以外はブック全体を読み込まないため、ダッシュボードなど下流のシステム向けに高速に出力できます。
+
+    with sink_for('plan.csv') as sink:
+        sink.write(table)
+"""
+import abc
+import csv
+import html
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Type
+import numpy as np
+from src.models.task_table import TaskTable
+from src.utils.file_io import AtomicFile
+from src.config.settings import *
+
+# 出力する列（Excel の見出しと同じ並び）
+FIELDS = (
+    'id', 'name', 'duration', 'start', 'end', 'actual_start', 'actual_end', 'target_end', 'difference',
+    'predecessors',
+)
+
+
+def iter_chunks(table: TaskTable, chunk_rows: int = SINK_CHUNK_ROWS) -> Iterator[Dict[str, list]]:
+    """テーブルを chunk_rows 行ずつ、列名 → 値のリストの辞書として返す"""
+    for first in range(0, len(table), chunk_rows):
+        rows = slice(first, first + chunk_rows)
+        difference = table.difference[rows]
+        yield {
+            'id': table.ids[rows].tolist(),
+            'name': table.names[rows].tolist(),
+            'duration': table.durations[rows].tolist(),
+            'start': table.cp_estimated_start_time[rows].tolist(),
+            'end': table.cp_estimated_end_time[rows].tolist(),
+            'actual_start': table.actual_start_time[rows].tolist(),
+            'actual_end': table.actual_end_time[rows].tolist(),
+            'target_end': table.target_end_time[rows].tolist(),
+            'difference': np.where(np.isnan(difference), None, difference).tolist(),
+            'predecessors': table.predecessor_lists(first, first + chunk_rows),
+        }
+
+
+class ScheduleSink(abc.ABC):
+    """
+    出力先の基底クラス。
+
+    open で書き出しを始め、write_chunk を列ごとの値で繰り返し呼び、close で確定します。
+    すべてのシンクは一時ファイル（_tmp_path）に書き出し、close で置き換えるため、
+    途中で失敗しても既存のファイルは残ります。
+    """
+
+    extension = ''
+    tmp_suffix = ''  # 一時ファイル名の末尾（拡張子で形式を判定するライブラリ向け）
+
+    def __init__(self, path: str):
+        self.path = path
+        self._target = AtomicFile(path, suffix=self.tmp_suffix)
+        self._tmp_path = self._target.tmp_path
+
+    def __enter__(self) -> 'ScheduleSink':
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, table: TaskTable, chunk_rows: int = SINK_CHUNK_ROWS):
+        """テーブル全体を chunk_rows 行ずつ書き出す"""
+        self.open(table)
+        for chunk in iter_chunks(table, chunk_rows):
+            self.write_chunk(chunk)
+
+    @abc.abstractmethod
+    def open(self, table: TaskTable):
+        """書き出しを始める（見出しなど、テーブル全体から決まる部分を書く）"""
+
+    @abc.abstractmethod
+    def write_chunk(self, chunk: Dict[str, list]):
+        """iter_chunks の1チャンク分の行を書く"""
+
+    def close(self):
+        try:
+            self._finish()
+        except BaseException:
+            self._target.discard()
+            raise
+        self._target.commit()
+
+    def abort(self):
+        try:
+            self._finish()
+        finally:
+            self._target.discard()
+
+    def _finish(self):
+        """開いているファイルを閉じる"""
+
+
+class _TextSink(ScheduleSink):
+    encoding = 'utf-8'
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = None
+
+    def open(self, table: TaskTable):
+        self._file = open(self._tmp_path, 'w', encoding=self.encoding, newline='')
+
+    def _finish(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class CsvSink(_TextSink):
+    """CSV（BOM 付き UTF-8。Excel でもそのまま開ける）"""
+
+    extension = '.csv'
+    encoding = 'utf-8-sig'
+
+    def open(self, table: TaskTable):
+        super().open(table)
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(FIELDS)
+
+    def write_chunk(self, chunk: Dict[str, list]):
+        chunk = {**chunk, 'predecessors': [','.join(map(str, ids)) for ids in chunk['predecessors']]}
+        self._writer.writerows(zip(*(chunk[name] for name in FIELDS)))
+
+
+class JsonLinesSink(_TextSink):
+    """JSON Lines（1行1タスク、日時は ISO 形式）"""
+
+    extension = '.jsonl'
+
+    def write_chunk(self, chunk: Dict[str, list]):
+        for values in zip(*(chunk[name] for name in FIELDS)):
+            self._file.write(json.dumps(dict(zip(FIELDS, values)), ensure_ascii=False, default=_isoformat))
+            self._file.write('\n')
+
+
+class ParquetSink(ScheduleSink):
+    """Parquet（pyarrow が必要。チャンクごとに1つの行グループとして書き出す）"""
+
+    extension = '.parquet'
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._writer = None
+
+    def open(self, table: TaskTable):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet の出力には pyarrow が必要です（pip install pyarrow）") from e
+
+        timestamp = pa.timestamp('s')
+        self._schema = pa.schema([
+            ('id', pa.int64()), ('name', pa.string()), ('duration', pa.float64()),
+            ('start', timestamp), ('end', timestamp), ('actual_start', timestamp), ('actual_end', timestamp),
+            ('target_end', timestamp), ('difference', pa.float64()), ('predecessors', pa.list_(pa.int64())),
+        ])
+        self._pa = pa
+        self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+
+    def write_chunk(self, chunk: Dict[str, list]):
+        batch = self._pa.Table.from_pydict({name: chunk[name] for name in FIELDS}, schema=self._schema)
+        self._writer.write_table(batch)
+
+    def _finish(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class HtmlGanttSink(_TextSink):
+    """外部ファイルを参照しない1枚の HTML のガントチャート（バーの位置は全体期間に対する割合）"""
+
+    extension = '.html'
+
+    def open(self, table: TaskTable):
+        super().open(table)
+        starts = table.cp_estimated_start_time[~np.isnat(table.cp_estimated_start_time)]
+        ends = table.cp_estimated_end_time[~np.isnat(table.cp_estimated_end_time)]
+        self._first = starts.min() if len(starts) else None
+        span = (ends.max() - self._first) if len(ends) and len(starts) else np.timedelta64(0, 's')
+        self._span = max(span / np.timedelta64(1, 's'), 1.0)
+        title = html.escape(os.path.splitext(os.path.basename(self.path))[0])
+        period = (f'{_format(self._first.item())} 〜 {_format(ends.max().item())}'
+                  if self._first is not None and len(ends) else '')
+        self._file.write(HTML_HEAD.format(title=title, period=period, tasks=len(table)))
+
+    def write_chunk(self, chunk: Dict[str, list]):
+        lines = []
+        for task_id, name, start, end in zip(chunk['id'], chunk['name'], chunk['start'], chunk['end']):
+            bar = ''
+            if start is not None and end is not None and self._first is not None:
+                left = (np.datetime64(start, 's') - self._first) / np.timedelta64(1, 's') / self._span * 100
+                width = max((end - start).total_seconds() / self._span * 100, 0.1)
+                bar = (f'<div class="bar" style="left:{left:.3f}%;width:{width:.3f}%" '
+                       f'title="{_format(start)} 〜 {_format(end)}"></div>')
+            lines.append(f'<tr><td>{task_id}</td><td>{html.escape(str(name))}</td>'
+                         f'<td>{_format(start)}</td><td>{_format(end)}</td><td class="track">{bar}</td></tr>\n')
+        self._file.write(''.join(lines))
+
+    def _finish(self):
+        if self._file is not None:
+            self._file.write(HTML_TAIL)
+        super()._finish()
+
+
+class ExcelSink(ScheduleSink):
+    """
+    既存の Excel 出力（ブックの開始日・終了日(予想)とガントチャート）
+
+    ブックは行単位では書けないため、close で既存のブックを一時ファイルに複製してまとめて書き込み、置き換える。
+    """
+
+    extension = '.xlsx'
+    tmp_suffix = '.xlsx'  # openpyxl は拡張子でファイル形式を判定する
+
+    def __init__(self, path: str, sheet_name: str = DEFAULT_SHEET_NAME, mode: Optional[str] = GANTT_EXPORT_MODE):
+        super().__init__(path)
+        self.sheet_name = sheet_name
+        self.mode = mode
+        self._table = None
+
+    def write(self, table: TaskTable, chunk_rows: int = SINK_CHUNK_ROWS):
+        self.open(table)
+
+    def open(self, table: TaskTable):
+        self._table = table
+
+    def write_chunk(self, chunk: Dict[str, list]):
+        pass
+
+    def abort(self):
+        self._table = None
+        super().abort()
+
+    def _finish(self):
+        from src.utils.excel_handler import ExcelHandler
+
+        if self._table is not None:
+            table, self._table = self._table, None
+            shutil.copyfile(self.path, self._tmp_path)
+            ExcelHandler(cache_dir=None).export_results(self._tmp_path, self.sheet_name, table, [], mode=self.mode)
+
+
+SINKS: Dict[str, Type[ScheduleSink]] = {
+    sink.extension: sink for sink in (CsvSink, JsonLinesSink, ParquetSink, HtmlGanttSink, ExcelSink)
+}
+SINKS['.htm'] = HtmlGanttSink
+
+
+def sink_for(path: str, **options) -> ScheduleSink:
+    """拡張子に対応するシンクを返す（options は ExcelSink の sheet_name・mode）"""
+    extension = os.path.splitext(path)[1].lower()
+    sink = SINKS.get(extension)
+    if sink is None:
+        raise ValueError(f"対応していない出力形式です: {path} ({', '.join(sorted(SINKS))} のいずれか)")
+    return sink(path, **options) if sink is ExcelSink else sink(path)
+
+
+def export_schedule(table: TaskTable, paths: List[str], **options):
+    """スケジュールを拡張子に応じた形式で各ファイルに書き出す"""
+    for path in paths:
+        with sink_for(path, **options) as sink:
+            sink.write(table)
+
+
+def _isoformat(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} は JSON に変換できません")
+
+
+def _format(value: Optional[datetime]) -> str:
+    return value.strftime('%Y/%m/%d %H:%M') if value else ''
+
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="ja">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; font-size: 13px; margin: 16px; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ border: 1px solid #ccc; padding: 2px 6px; white-space: nowrap; }}
+th {{ background: #f3f3f3; position: sticky; top: 0; }}
+td.track {{ position: relative; width: 60%; padding: 0; }}
+.bar {{ position: absolute; top: 3px; bottom: 3px; background: #ffa500; border-radius: 2px; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+<p>{period}（{tasks} タスク）</p>
+<table>
+<tr><th>タスク番号</th><th>タスク名</th><th>開始日(予想)</th><th>終了日(予想)</th><th></th></tr>
+"""
+
+HTML_TAIL = """</table>
+</body>
+</html>
+"""
@@ -0,0 +1,200 @@
+import glob
+import hashlib
+import os
+import pickle
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.models.task import Task
+from src.models.task_table import TaskTable, TaskTableBuilder
+from src.utils.file_io import atomic_write
+from src.config.settings import *
+
+# キャッシュ形式のバージョン（Task の構造や値の解釈を変えた場合は更新する）
+CACHE_FORMAT_VERSION = 3
+
+HEADER_ROW = 2  # 見出し行（1始まり）
+
+# 見出し → Task の属性
+COLUMNS = {
+    'タスク番号': 'id',
+    'タスク名': 'name',
+    '工数(予想)': 'duration',
+    '開始日(予想)': 'cp_estimated_start_time',
+    '終了日(予想)': 'cp_estimated_end_time',
+    '開始日(実際)': 'actual_start_time',
+    '終了日(実際)': 'actual_end_time',
+    '目標終了時間': 'target_end_time',
+    '先行タスク番号': 'predecessors',
+}
+
+# リスク分析用の工数の幅（任意の列）
+RANGE_COLUMNS = {
+    '工数(楽観)': 'optimistic',
+    '工数(悲観)': 'pessimistic',
+}
+
+
+def parse_predecessors(value) -> List[int]:
+    """先行タスク番号のセル（"0,1" や 2 など）をタスク番号のリストに変換"""
+    if value is None or value == '':
+        return []
+    if isinstance(value, (int, float)):
+        return [] if value != value else [int(value)]  # NaN は空欄扱い
+    return [int(p) for p in str(value).split(',') if p.strip().isdigit()]
+
+
+def parse_number(value):
+    """工数のセルを数値に変換（整数値は int、空欄は未設定として NaN とする）"""
+    if value is None or value == '':
+        return float('nan')
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def parse_datetime(value) -> Optional[datetime]:
+    """日時のセルを datetime に変換（空欄は None）"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(str(value).strip())
+
+
+def file_digest(file_path: str) -> str:
+    """ファイル内容の SHA-256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class WbsReader:
+    """
+    WBSシートのストリーミング読込。
+
+    read_only モードで1行ずつ読み、列ごとの型変換で TaskTable の列へ直接追加します。
+    解析結果はファイル内容のハッシュをキーにバイナリで保存し、
+    内容が変わらない限り再実行時は Excel の解析を省略します。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = PARSE_CACHE_DIR, max_entries: int = PARSE_CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+
+    def read(self, file_path: str, sheet_name: str) -> List[Task]:
+        """タスクを Task のリストとして読み込む"""
+        return self.read_table(file_path, sheet_name).to_tasks()
+
+    def read_table(self, file_path: str, sheet_name: str) -> TaskTable:
+        """タスクを列指向の TaskTable として読み込む（キャッシュがあればそれを返す）"""
+        if not self.cache_dir:
+            return self.build_table(file_path, sheet_name)
+
+        cache_path = self._cache_path(file_digest(file_path), sheet_name)
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            pass
+
+        table = self.build_table(file_path, sheet_name)
+        self._store(cache_path, table)
+        return table
+
+    def build_table(self, file_path: str, sheet_name: str) -> TaskTable:
+        """シートを1行ずつ読み、列に直接追加して TaskTable を生成する"""
+        builder = TaskTableBuilder()
+        for row in self.iter_rows(file_path, sheet_name):
+            builder.append(*row)
+        return builder.build()
+
+    def iter_tasks(self, file_path: str, sheet_name: str) -> Iterator[Task]:
+        """シートを1行ずつ読み、Task を生成する"""
+        for task_id, name, duration, predecessors, *datetimes in self.iter_rows(file_path, sheet_name):
+            yield Task(task_id, name, duration, *datetimes, predecessors=predecessors)
+
+    def iter_rows(self, file_path: str, sheet_name: str) -> Iterator[tuple]:
+        """
+        シートを1行ずつ読み、型変換した値を返す
+
+        値の並びは (タスク番号, タスク名, 工数, 先行タスク番号, 開始日(予想), 終了日(予想),
+        開始日(実際), 終了日(実際), 目標終了時間)
+        """
+        import openpyxl  # キャッシュが使える場合は読み込まない
+
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook[sheet_name].iter_rows(min_row=HEADER_ROW, values_only=True)
+            header = next(rows, ())
+            columns = {COLUMNS[name]: i for i, name in enumerate(header) if name in COLUMNS}
+            missing = [name for name, attr in COLUMNS.items() if attr in ('id', 'name', 'duration') and attr not in columns]
+            if missing:
+                raise ValueError(f"{file_path} のシート {sheet_name} に必要な列がありません: {missing}")
+
+            def cell(row, attr):
+                i = columns.get(attr)
+                return row[i] if i is not None and i < len(row) else None
+
+            for row in rows:
+                task_id = cell(row, 'id')
+                if task_id is None or task_id == '':
+                    continue
+                yield (
+                    int(task_id),
+                    str(cell(row, 'name') or ''),
+                    parse_number(cell(row, 'duration')),
+                    parse_predecessors(cell(row, 'predecessors')),
+                    parse_datetime(cell(row, 'cp_estimated_start_time')),
+                    parse_datetime(cell(row, 'cp_estimated_end_time')),
+                    parse_datetime(cell(row, 'actual_start_time')),
+                    parse_datetime(cell(row, 'actual_end_time')),
+                    parse_datetime(cell(row, 'target_end_time')),
+                )
+        finally:
+            workbook.close()
+
+    def read_duration_ranges(self, file_path: str, sheet_name: str) -> Dict[int, Tuple[Optional[float], Optional[float]]]:
+        """工数(楽観)・工数(悲観) の列を読み、タスク番号 → (楽観, 悲観) を返す（列がない・空欄は None）"""
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            rows = workbook[sheet_name].iter_rows(min_row=HEADER_ROW, values_only=True)
+            header = next(rows, ())
+            id_column = next((i for i, name in enumerate(header) if COLUMNS.get(name) == 'id'), None)
+            columns = {RANGE_COLUMNS[name]: i for i, name in enumerate(header) if name in RANGE_COLUMNS}
+            if id_column is None or not columns:
+                return {}
+
+            def number(row, attr):
+                i = columns.get(attr)
+                value = row[i] if i is not None and i < len(row) else None
+                return None if value is None or value == '' else float(value)
+
+            return {
+                int(row[id_column]): (number(row, 'optimistic'), number(row, 'pessimistic'))
+                for row in rows
+                if id_column < len(row) and row[id_column] not in (None, '')
+            }
+        finally:
+            workbook.close()
+
+    def _cache_path(self, digest: str, sheet_name: str) -> str:
+        sheet_key = hashlib.sha256(sheet_name.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f'v{CACHE_FORMAT_VERSION}-{digest}-{sheet_key}.pkl')
+
+    def _store(self, cache_path: str, table: TaskTable):
+        """キャッシュを書き込み、古いものから上限数を超えた分を削除する"""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with atomic_write(cache_path) as f:
+                pickle.dump(table, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+            entries = sorted(glob.glob(os.path.join(self.cache_dir, '*.pkl')), key=os.path.getmtime, reverse=True)
+            for stale in entries[self.max_entries:]:
+                os.remove(stale)
+        except OSError:
+            pass  # キャッシュに書けなくても読込結果はそのまま使う